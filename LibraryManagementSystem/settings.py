@@ -54,6 +54,8 @@ SPECTACULAR_SETTINGS = {
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # gzip / brotli 压缩，放在读取或修改响应体的中间件之前
+    'utils.compression.CompressionMiddleware',
     # 'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     # 'django.middleware.csrf.CsrfViewMiddleware',
@@ -90,8 +92,49 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # 每个线程复用数据库连接，空闲 60 秒后重连；复用前检查连接是否可用
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # 等待锁的秒数（SQLite busy timeout）
+            'timeout': 5,
+            # 事务开始即获取写锁，避免读事务升级为写事务时相互等待
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # 统计分析与推荐使用的只读副本：主库的 SQLite 快照，由 refresh_replica 命令定期刷新。
+    # 以 mode=ro 的 URI 打开，误路由到副本的写入会直接报错
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{BASE_DIR / 'db.replica.sqlite3'}?mode=ro",
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 5,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+
+# analytics_reads() 范围内的读请求走副本，写入和迁移只在主库，见 utils/routers.py
+DATABASE_ROUTERS = ['utils.routers.ReplicaRouter']
+REPLICA_DATABASE = 'replica'
+# refresh_replica --loop 的刷新间隔（秒）
+REPLICA_REFRESH_INTERVAL = 300
+
+# 每个 SQLite 连接建立时执行的 PRAGMA，见 utils/db.py
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
 }
+# 遇到 database is locked 时的重试次数和首次退避时间（秒），之后每次翻倍
+SQLITE_BUSY_RETRIES = 3
+SQLITE_BUSY_BACKOFF = 0.05
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -141,9 +184,57 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': ['utils.permissions.RbacPermission'],
     # 'EXCEPTION_HANDLER': 'utils.view.handle_exception',
     'DEFAULT_PAGINATION_CLASS': 'utils.pagination.StandardResultsSetPagination',
+    # orjson 渲染器，响应信封在编码时生成
+    'DEFAULT_RENDERER_CLASSES': [
+        'utils.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'PAGE_SIZE': 10,  # 每页默认返回的记录数
 }
 
+# 缓存（模型版本号、分页总数、列表响应）必须在所有 worker 和管理命令之间共享，
+# 否则其他进程的写入不会让本进程的缓存和 ETag 失效。默认使用本机文件缓存，
+# 可用 DJANGO_CACHE_DIR 指定目录；多台服务器部署时换成 Redis 或 Memcached
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', os.path.join(BASE_DIR, 'cache')),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+# 测试使用临时目录中的缓存，cache.clear() 不会清空运行中服务的缓存
+TEST_RUNNER = 'utils.runner.IsolatedCacheTestRunner'
+
+# 分页总数缓存时间（秒），写入时通过模型版本号自动失效
+COUNT_CACHE_TIMEOUT = 300
+
+# 公共目录列表（图书、分类、作者、公告）响应缓存时间（秒），按模型版本号失效
+RESPONSE_CACHE_TIMEOUT = 300
+# 缓存响应时是否同时保存压缩版本（大于 COMPRESSION_MIN_SIZE 时）
+RESPONSE_CACHE_PRECOMPRESS = True
+
+# 小于该字节数的响应不压缩
+COMPRESSION_MIN_SIZE = 1024
+# 各进程在请求结束后（响应已发出）把压缩节省字节数累加到数据库（CompressionStat）的间隔（秒），0 表示每个请求结束后都写入
+COMPRESSION_STATS_FLUSH_INTERVAL = 60
+
+# 管理员上传导入目录文件的最大字节数，更大的文件用 import_catalogue 命令导入
+CATALOGUE_IMPORT_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+
+# /api/batch/ 每批最多的子请求数，以及同时执行的子请求数（线程数）
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_CONCURRENCY = 4
+
+# 自动补全前缀索引的全量重建间隔（秒），用于同步其他进程的写入，0 表示只做增量更新
+AUTOCOMPLETE_REBUILD_INTERVAL = 600
+
+# 删除记录（墓碑）保留天数，早于该时间的 since 需要客户端全量同步；过期记录由 purge_tombstones 命令定时清理
+DELETION_LOG_RETENTION_DAYS = 30
+
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
         'Bearer': {
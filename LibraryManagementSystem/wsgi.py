@@ -10,7 +10,17 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.db import DatabaseError
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LibraryManagementSystem.settings')
 
 application = get_wsgi_application()
+
+# Warm the in-process autocomplete index before the first request
+from utils.autocomplete import catalogue_index  # noqa: E402
+
+try:
+    catalogue_index.rebuild()
+except DatabaseError:
+    # tables not migrated yet, the index is built on first use
+    pass
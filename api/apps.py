@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from api import signals  # noqa: F401
+        from utils import cache  # noqa: F401  registers check_shared_cache
+        from utils.db import configure_connection
+
+        connection_created.connect(configure_connection, dispatch_uid='configure_sqlite_connection')
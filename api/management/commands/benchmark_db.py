@@ -0,0 +1,157 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from utils.db import apply_pragmas, backoff_delays, call_with_retry
+
+# one catalogue page as the book list reads it
+READ_SQL = ('SELECT book.id, book.title, book.is_available, category.name, author.name FROM book '
+            'JOIN category ON category.id = book.category_id JOIN author ON author.id = book.author_id '
+            'ORDER BY book.title LIMIT 20 OFFSET ?')
+# read-then-write, the shape of approving or returning a borrow
+CHECK_SQL = 'SELECT is_available FROM book WHERE id = ?'
+WRITE_SQL = 'UPDATE book SET is_available = ?, updated_at = ? WHERE id = ?'
+
+
+class Baseline:
+    """Previous setup: rollback journal, a new connection per request, deferred transactions, no retry"""
+    name = 'baseline'
+
+    def __init__(self, path, timeout):
+        self.path, self.timeout = path, timeout
+        db = sqlite3.connect(path)
+        db.execute('PRAGMA journal_mode = DELETE')
+        db.close()
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+
+    def run(self, operation):
+        db = self.connect()
+        try:
+            return operation(db, 'BEGIN')
+        finally:
+            db.close()
+
+
+class Tuned(Baseline):
+    """utils.db setup: WAL and pragmas, one connection per thread, BEGIN IMMEDIATE, retry with backoff"""
+    name = 'tuned'
+
+    def __init__(self, path, timeout):
+        self.path, self.timeout = path, timeout
+        self.local = threading.local()
+        db = sqlite3.connect(path)
+        apply_pragmas(db)
+        db.close()
+
+    def run(self, operation):
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = self.local.db = self.connect()
+            apply_pragmas(db)
+        return call_with_retry(operation, db, 'BEGIN IMMEDIATE', errors=(sqlite3.OperationalError,),
+                               delays=backoff_delays())
+
+
+class Command(BaseCommand):
+    help = ("Concurrent read/write throughput of the SQLite database, before (rollback journal, "
+            "connection per request) and after the utils.db connection setup. Runs on copies, "
+            "the database itself is not written")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8, help='Reader threads (default: 8)')
+        parser.add_argument('--writers', type=int, default=2, help='Writer threads (default: 2)')
+        parser.add_argument('--duration', type=float, default=5, help='Seconds per setup (default: 5)')
+        parser.add_argument('--only', choices=[Baseline.name, Tuned.name], help='Run a single setup')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('benchmark_db measures the SQLite connection setup')
+        connection.ensure_connection()
+        timeout = settings.DATABASES['default'].get('OPTIONS', {}).get('timeout', 5)
+
+        setups = [setup for setup in (Baseline, Tuned) if options['only'] in (None, setup.name)]
+        self.stdout.write(f"{options['readers']} readers, {options['writers']} writers, "
+                          f"{options['duration']}s per setup, lock timeout {timeout}s")
+        self.stdout.write(f"{'setup':<10} {'reads/s':>10} {'writes/s':>10} {'errors':>8} "
+                          f"{'read p95':>10} {'write p95':>10}")
+        with tempfile.TemporaryDirectory() as directory:
+            for setup in setups:
+                path = os.path.join(directory, f'{setup.name}.sqlite3')
+                self.copy_database(path)
+                result = self.measure(setup(path, timeout), options)
+                self.stdout.write(
+                    f"{setup.name:<10} {result['reads'] / result['elapsed']:>10.0f} "
+                    f"{result['writes'] / result['elapsed']:>10.0f} {result['errors']:>8} "
+                    f"{result['read_p95'] * 1000:>8.1f}ms {result['write_p95'] * 1000:>8.1f}ms")
+
+    def copy_database(self, path):
+        """Consistent copy of the live database with the online backup API"""
+        target = sqlite3.connect(path)
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+
+    def measure(self, setup, options):
+        with sqlite3.connect(setup.path) as db:
+            book_ids = [row[0] for row in db.execute('SELECT id FROM book')]
+        if not book_ids:
+            raise CommandError('No books to read or update, load some data first')
+
+        lock = threading.Lock()
+        totals = {'reads': 0, 'writes': 0, 'errors': 0, 'read_times': [], 'write_times': []}
+        deadline = time.monotonic() + options['duration']
+
+        def read(db, begin):
+            return db.execute(READ_SQL, [random.randrange(max(len(book_ids) - 20, 1))]).fetchall()
+
+        def write(db, begin):
+            book_id = random.choice(book_ids)
+            db.execute(begin)
+            try:
+                available = db.execute(CHECK_SQL, [book_id]).fetchone()[0]
+                db.execute(WRITE_SQL, [not available, time.strftime('%Y-%m-%d %H:%M:%S'), book_id])
+                db.execute('COMMIT')
+            except BaseException:
+                if db.in_transaction:
+                    db.execute('ROLLBACK')
+                raise
+
+        def worker(kind, operation):
+            count, errors, times = 0, 0, []
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    setup.run(operation)
+                except sqlite3.OperationalError:
+                    errors += 1
+                    continue
+                times.append(time.perf_counter() - started)
+                count += 1
+            with lock:
+                totals[kind] += count
+                totals['errors'] += errors
+                totals[kind[:-1] + '_times'] += times
+
+        threads = [threading.Thread(target=worker, args=('reads', read)) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=worker, args=('writes', write)) for _ in range(options['writers'])]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        totals['elapsed'] = time.monotonic() - started
+        for kind in ('read', 'write'):
+            times = sorted(totals.pop(f'{kind}_times'))
+            totals[f'{kind}_p95'] = times[int(len(times) * 0.95)] if times else 0
+        return totals
@@ -0,0 +1,60 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Book, BorrowRecord
+from api.serializers import BookSerializer, BorrowRecordSerializer
+from utils.renderers import FastJSONRenderer, envelope
+
+
+class EnvelopedResponse:
+    """Stands in for a MineApiViewSet response, so FastJSONRenderer adds the envelope"""
+    envelope_code = 0
+
+
+class Command(BaseCommand):
+    help = ("Render time of large serialized pages (books, borrow records) with DRF's JSONRenderer, "
+            "the envelope copied first as finalize_response used to do, and with FastJSONRenderer. "
+            "Reads the first --rows rows of the database, see generate_dataset")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per payload (default: 1000)')
+        parser.add_argument('--rounds', type=int, default=5, help='Renders averaged per timing (default: 5)')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['rounds'] < 1:
+            raise CommandError('--rows and --rounds must be positive')
+        payloads = self.payloads(options['rows'])
+        if not any(payloads.values()):
+            raise CommandError('No books or borrow records to render, load some data first')
+
+        baseline_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+        context = {'response': EnvelopedResponse()}
+        self.stdout.write(f"{'payload':<16} {'rows':>6} {'JSONRenderer':>14} {'FastJSONRenderer':>18} "
+                          f"{'speedup':>8} {'bytes':>10}")
+        for name, data in payloads.items():
+            baseline, baseline_content = self.time_render(
+                lambda d: baseline_renderer.render(envelope(d, 0)), data, options['rounds'])
+            fast, fast_content = self.time_render(
+                lambda d: fast_renderer.render(d, renderer_context=context), data, options['rounds'])
+            if json.loads(fast_content) != json.loads(baseline_content):
+                raise CommandError(f'{name}: renderers produced different documents')
+            self.stdout.write(f"{name:<16} {len(data):>6} {baseline * 1000:>12.2f}ms {fast * 1000:>16.2f}ms "
+                              f"{baseline / fast if fast else 0:>7.1f}x {len(fast_content):>10}")
+
+    @staticmethod
+    def payloads(rows):
+        books = BookSerializer(Book.objects.select_related('author', 'category').order_by('pk')[:rows],
+                               many=True).data
+        records = BorrowRecordSerializer(BorrowRecord.objects.select_related('user', 'book').order_by('pk')[:rows],
+                                         many=True).data
+        return {'books': books, 'borrow records': records}
+
+    @staticmethod
+    def time_render(render, data, rounds):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            content = render(data)
+        return (time.perf_counter() - start) / rounds, content
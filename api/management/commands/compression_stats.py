@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from utils.compression import get_compression_stats, reset_compression_stats
+
+
+class Command(BaseCommand):
+    help = "Report bytes saved by response compression per route"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Clear the counters after reporting')
+
+    def handle(self, *args, **options):
+        stats = get_compression_stats()
+        if not stats:
+            self.stdout.write(self.style.WARNING(
+                'No compressed responses recorded (serving processes write their counters every '
+                'COMPRESSION_STATS_FLUSH_INTERVAL seconds)'))
+            return
+
+        self.stdout.write(f"{'route':<45} {'responses':>10} {'original':>12} {'sent':>12} {'saved':>12} {'ratio':>7}")
+        for route, row in sorted(stats.items(), key=lambda item: -item[1]['saved']):
+            ratio = row['compressed'] / row['original'] if row['original'] else 1
+            self.stdout.write(f"{route:<45} {row['responses']:>10} {row['original']:>12} "
+                              f"{row['compressed']:>12} {row['saved']:>12} {ratio:>7.1%}")
+
+        total = sum(row['saved'] for row in stats.values())
+        self.stdout.write(self.style.SUCCESS(f'Total bytes saved: {total}'))
+        if options['reset']:
+            reset_compression_stats()
@@ -0,0 +1,338 @@
+import random
+import time
+from datetime import date, datetime, time as dt_time, timedelta, timezone as dt_timezone
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from api.models import (Announcement, Author, Book, BorrowRecord, Category, DeletionLog, Rating, Recommendation,
+                        User, UserType)
+from utils import search
+from utils.borrowing import LOAN_DAYS
+from utils.cache import bump_model_version
+from utils.counters import ACTIVE_STATUSES, BORROWED_STATUSES
+from utils.db import DEFAULT_PRAGMAS, apply_pragmas, get_pragmas
+
+ADJECTIVES = ('Silent', 'Hidden', 'Last', 'Broken', 'Golden', 'Distant', 'Burning', 'Forgotten', 'Endless',
+              'Crimson', 'Quiet', 'Lost', 'Northern', 'Secret', 'Wild', 'Winter', 'Glass', 'Iron', 'Paper', 'Red')
+NOUNS = ('River', 'Empire', 'Garden', 'Mirror', 'Harbor', 'Kingdom', 'Forest', 'Letter', 'Machine', 'Ocean',
+         'Orchard', 'Bridge', 'Winter', 'Atlas', 'Lantern', 'Archive', 'Island', 'Station', 'Theory', 'Voyage')
+FIRST_NAMES = ('Anna', 'Li', 'Omar', 'Sofia', 'Kenji', 'Maria', 'David', 'Chen', 'Amara', 'Lucas',
+               'Elena', 'Ravi', 'Grace', 'Yusuf', 'Ingrid', 'Mateo', 'Hana', 'Peter', 'Zara', 'Wei')
+LAST_NAMES = ('Smith', 'Wang', 'Garcia', 'Kowalski', 'Tanaka', 'Okafor', 'Novak', 'Silva', 'Larsen', 'Haddad',
+              'Zhang', 'Muller', 'Rossi', 'Ivanova', 'Kim', 'Dubois', 'Patel', 'Moreau', 'Lopez', 'Berg')
+GENRES = ('Fiction', 'Science Fiction', 'Fantasy', 'Mystery', 'History', 'Biography', 'Poetry', 'Philosophy',
+          'Computer Science', 'Mathematics', 'Physics', 'Economics', 'Art', 'Travel', 'Children', 'Classics')
+WORDS = ('library', 'reading', 'hours', 'event', 'members', 'books', 'new', 'collection', 'opening', 'closed',
+         'holiday', 'workshop', 'catalogue', 'return', 'reminder', 'study', 'room', 'service', 'update', 'week')
+
+# status of a finished request: most borrows are returned, some requests are turned down
+SETTLED_STATUSES = (('returned', 90), ('rejected', 10))
+# requests of the last weeks are still in progress
+RECENT_STATUSES = (('borrowed', 55), ('pending', 15), ('returned', 20), ('approval', 5), ('rejected', 5))
+RECENT_DAYS = 30
+SCORE_WEIGHTS = (5, 10, 20, 35, 30)
+# page cache while loading: keeps the borrow_record indexes in memory as they grow
+LOAD_PRAGMAS = {'cache_size': -524288}  # KiB, i.e. 512 MB
+
+
+def weighted(rng, choices):
+    values, weights = zip(*choices)
+    cum_weights = list(accumulate(weights))
+    return lambda: rng.choices(values, cum_weights=cum_weights)[0]
+
+
+class Dataset:
+    """
+    Rows of every table, generated from one seeded Random in a fixed order so
+    the same seed, end date and database give the same data. Popular books and
+    active readers are skewed (a few of each account for most borrows), and
+    borrow dates lean towards the recent end of the history.
+    """
+
+    def __init__(self, options, now):
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.now = now
+        self.start = now - timedelta(days=365 * options['years'])
+        self.span = (now - self.start).total_seconds()
+
+    def skewed(self, count):
+        """Index in [0, count), low indexes much more likely"""
+        return int(count * self.rng.random() ** 3)
+
+    def moment(self, lean=1.0):
+        """A datetime in the history, lean < 1 favouring recent ones"""
+        return self.start + timedelta(seconds=self.span * self.rng.random() ** lean)
+
+    def person(self):
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def sentence(self, words):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+class Command(BaseCommand):
+    help = ("Generate a large, realistic, seeded dataset (readers, catalogue, years of borrow records, "
+            "ratings and announcements) for load and scale tests. Rows are written with executemany in "
+            "large batches; book counters, the search index and planner statistics are brought up to date")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+        parser.add_argument('--readers', type=int, default=10000, help='Readers (default: 10000)')
+        parser.add_argument('--librarians', type=int, default=10, help='Librarians (default: 10)')
+        parser.add_argument('--authors', type=int, default=5000, help='Authors (default: 5000)')
+        parser.add_argument('--categories', type=int, default=len(GENRES), help='Categories (default: 16)')
+        parser.add_argument('--books', type=int, default=100000, help='Books (default: 100000)')
+        parser.add_argument('--borrows', type=int, default=1000000, help='Borrow records (default: 1000000)')
+        parser.add_argument('--ratings', type=int, default=300000, help='Ratings (default: 300000)')
+        parser.add_argument('--announcements', type=int, default=1000, help='Announcements (default: 1000)')
+        parser.add_argument('--years', type=int, default=5, help='Years of borrow history (default: 5)')
+        parser.add_argument('--end', type=date.fromisoformat, default=None,
+                            help='Last day of the history, YYYY-MM-DD (default: today, UTC)')
+        parser.add_argument('--batch-size', type=int, default=50000, help='Rows per transaction (default: 50000)')
+        parser.add_argument('--flush', action='store_true',
+                            help='First delete the catalogue, borrow records, ratings, recommendations, '
+                                 'announcements and non-superuser readers and librarians')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Do not ask for confirmation before --flush deletes data')
+
+    def handle(self, *args, **options):
+        if any(options[name] < 0 for name in ('readers', 'librarians', 'authors', 'categories', 'books',
+                                               'borrows', 'ratings', 'announcements')):
+            raise CommandError('Counts cannot be negative')
+        if options['batch_size'] < 1 or options['years'] < 1:
+            raise CommandError('--batch-size and --years must be positive')
+        if (options['borrows'] or options['ratings']) and not (options['readers'] and options['books']):
+            raise CommandError('Borrow records and ratings need readers and books')
+        if options['books'] and not (options['authors'] and options['categories']):
+            raise CommandError('Books need authors and categories')
+        if options['ratings'] > options['readers'] * options['books']:
+            raise CommandError('More ratings than reader/book pairs')
+
+        if options['flush']:
+            if options['interactive'] and not self.confirm_flush():
+                self.stdout.write('Cancelled, nothing was deleted or generated')
+                return
+            self.flush()
+        self.batch_size = options['batch_size']
+        self.timestamp = (str if connection.vendor == 'sqlite' else lambda value:
+                          connection.ops.adapt_datetimefield_value(value.replace(tzinfo=dt_timezone.utc)))
+        # midnight, so the same seed on the same day gives the same timestamps
+        end = options['end'] or timezone.now().astimezone(dt_timezone.utc).date()
+        data = Dataset(options, datetime.combine(end, dt_time.min))
+        started = time.perf_counter()
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                apply_pragmas(cursor, LOAD_PRAGMAS)
+        try:
+            total = self.generate(data, options)
+        finally:
+            if connection.vendor == 'sqlite':
+                with connection.cursor() as cursor:
+                    apply_pragmas(cursor, {name: get_pragmas().get(name, DEFAULT_PRAGMAS[name])
+                                           for name in LOAD_PRAGMAS})
+
+        seconds = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} rows generated in {seconds:.1f}s ({total / seconds if seconds else 0:.0f} rows/s)'))
+
+    def generate(self, data, options):
+        readers = self.generate_users(data)
+        total = len(readers) + options['librarians']
+        created = self.timestamp(data.start)
+        authors = self.insert(Author, ('id', 'name', 'updated_at'), (
+            (pk, data.person(), created) for pk in self.new_ids(Author, options['authors'])))
+        categories = self.insert(Category, ('id', 'name', 'updated_at'), (
+            (pk, GENRES[i] if i < len(GENRES) else f"{GENRES[i % len(GENRES)]} {i // len(GENRES) + 1}", created)
+            for i, pk in enumerate(self.new_ids(Category, options['categories']))))
+        books = self.generate_books(data, authors, categories)
+        total += len(authors) + len(categories) + len(books)
+
+        counters = {pk: [0, 0, 0, 0] for pk in books}
+        total += self.generate_borrows(data, readers, books, counters)
+        total += self.generate_ratings(data, readers, books, counters)
+        total += self.generate_announcements(data)
+        self.update_books(counters)
+        self.finish()
+        return total
+
+    def confirm_flush(self):
+        answer = input(f"This deletes every book, author, category, borrow record, rating, recommendation, "
+                       f"announcement and non-superuser reader and librarian of the database "
+                       f"'{connection.settings_dict['NAME']}'.\nType 'yes' to continue, or 'no' to cancel: ")
+        return answer.strip().lower() == 'yes'
+
+    def flush(self):
+        with transaction.atomic():
+            for model in (Recommendation, Rating, BorrowRecord, DeletionLog, Book, Author, Category, Announcement):
+                with connection.cursor() as cursor:
+                    cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+            User.objects.filter(is_super=False, user_type__in=(UserType.READER, UserType.LIBRARIAN)).delete()
+        self.stdout.write(self.style.WARNING('Existing data deleted'))
+
+    def new_ids(self, model, count):
+        first = (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        return range(first, first + count)
+
+    def insert(self, model, columns, rows):
+        """executemany in transactions of batch_size rows; returns the inserted ids (first column)"""
+        qn = connection.ops.quote_name
+        fields = {field.name: field.column for field in model._meta.concrete_fields}
+        sql = (f'INSERT INTO {qn(model._meta.db_table)} ({", ".join(qn(fields[name]) for name in columns)}) '
+               f'VALUES ({", ".join(["%s"] * len(columns))})')
+        ids = []
+        started = time.perf_counter()
+        batch = []
+
+        def flush_batch():
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, batch)
+            ids.extend(row[0] for row in batch)
+            batch.clear()
+
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                flush_batch()
+        if batch:
+            flush_batch()
+        seconds = time.perf_counter() - started
+        if ids:
+            self.stdout.write(f'{model._meta.db_table}: {len(ids)} rows in {seconds:.1f}s '
+                              f'({len(ids) / seconds if seconds else 0:.0f} rows/s)')
+        return ids
+
+    def generate_users(self, data):
+        """Readers (returned, for the records) and librarians; usernames carry the id"""
+        options = data.options
+        ids = self.new_ids(User, options['readers'] + options['librarians'])
+        readers = ids[:options['readers']]
+        rows = [(pk, f'reader{pk}', '123456', False, UserType.READER, True) for pk in readers]
+        rows += [(pk, f'librarian{pk}', '123456', False, UserType.LIBRARIAN, True) for pk in ids[options['readers']:]]
+        self.insert(User, ('id', 'username', 'password', 'is_super', 'user_type', 'is_active'), rows)
+        return list(readers)
+
+    def generate_books(self, data, authors, categories):
+        titles = set(Book.objects.values_list('title', flat=True))
+        stamp = self.timestamp
+
+        def rows():
+            for pk in self.new_ids(Book, data.options['books']):
+                title = f"The {data.rng.choice(ADJECTIVES)} {data.rng.choice(NOUNS)}"
+                if title in titles:
+                    title = f"{title} {pk}"
+                titles.add(title)
+                created = data.moment()
+                yield (pk, title, data.sentence(12), True, categories[data.skewed(len(categories))],
+                       authors[data.rng.randrange(len(authors))], stamp(created), stamp(created), 0, 0, 0, 0, 0.0)
+
+        return self.insert(Book, ('id', 'title', 'description', 'is_available', 'category', 'author', 'created_at',
+                                  'updated_at', 'borrow_count', 'active_borrow_count', 'rating_count',
+                                  'rating_sum', 'avg_rating'), rows())
+
+    def generate_borrows(self, data, readers, books, counters):
+        """
+        Borrow records over the history. Finished requests are mostly returned;
+        the ones of the last RECENT_DAYS are in every state, with at most one
+        borrowed record per book as the approval rule guarantees.
+        """
+        settled, recent = weighted(data.rng, SETTLED_STATUSES), weighted(data.rng, RECENT_STATUSES)
+        recent_since = data.now - timedelta(days=RECENT_DAYS)
+        loan = timedelta(days=LOAN_DAYS)
+        stamp = self.timestamp
+
+        def rows():
+            for pk in self.new_ids(BorrowRecord, data.options['borrows']):
+                book = books[data.skewed(len(books))]
+                borrowed_at = data.moment(lean=0.6)
+                status = recent() if borrowed_at >= recent_since else settled()
+                if status == 'borrowed' and counters[book][1]:
+                    status = 'returned'
+                if status in BORROWED_STATUSES:
+                    counters[book][0] += 1
+                if status in ACTIVE_STATUSES:
+                    counters[book][1] = 1
+                return_date = borrowed_at + loan if status in ('borrowed', 'returned', 'approval') else None
+                if status == 'returned':
+                    updated = min(borrowed_at + timedelta(days=data.rng.uniform(1, LOAN_DAYS)), data.now)
+                else:
+                    updated = borrowed_at
+                yield (pk, readers[data.skewed(len(readers))], book, stamp(borrowed_at),
+                       stamp(return_date) if return_date else None, status, stamp(updated))
+
+        return len(self.insert(BorrowRecord, ('id', 'user', 'book', 'borrow_date', 'return_date', 'status',
+                                              'updated_at'), rows()))
+
+    def generate_ratings(self, data, readers, books, counters):
+        """
+        Ratings skewed towards popular books, one per reader and book, mostly
+        positive. When they fill more than half of the reader/book pairs,
+        redrawing taken pairs would take ever longer: distinct pairs are then
+        sampled directly, without the skew.
+        """
+        rated = set()
+        scores = weighted(data.rng, zip(range(1, 6), SCORE_WEIGHTS))
+        stamp = self.timestamp
+        count, pairs = data.options['ratings'], len(readers) * len(books)
+        picks = iter(data.rng.sample(range(pairs), count)) if count * 2 > pairs else None
+
+        def pair():
+            if picks is not None:
+                reader, book = divmod(next(picks), len(books))
+                return readers[reader], books[book]
+            while True:
+                user, book = readers[data.rng.randrange(len(readers))], books[data.skewed(len(books))]
+                if (user, book) not in rated:
+                    return user, book
+
+        def rows():
+            for pk in self.new_ids(Rating, count):
+                user, book = pair()
+                rated.add((user, book))
+                score = scores()
+                counters[book][2] += 1
+                counters[book][3] += score
+                comment = data.sentence(8) if data.rng.random() < 0.3 else None
+                yield pk, user, book, score, comment, stamp(data.moment(lean=0.6))
+
+        return len(self.insert(Rating, ('id', 'user', 'book', 'score', 'comment', 'created_at'), rows()))
+
+    def generate_announcements(self, data):
+        stamp = self.timestamp
+
+        def rows():
+            for pk in self.new_ids(Announcement, data.options['announcements']):
+                published = data.moment()
+                yield (pk, data.sentence(4)[:-1], data.sentence(40), data.rng.random() < 0.9,
+                       stamp(published), stamp(published), stamp(published))
+
+        return len(self.insert(Announcement, ('id', 'title', 'content', 'is_visible', 'created_at', 'updated_at',
+                                              'published_at'), rows()))
+
+    def update_books(self, counters):
+        """The denormalized counters (see utils/counters.py) accumulated while generating"""
+        qn = connection.ops.quote_name
+        rows = [(borrows, active, count, total, total / count if count else 0.0, not active, pk)
+                for pk, (borrows, active, count, total) in counters.items() if borrows or count]
+        sql = (f'UPDATE {qn(Book._meta.db_table)} SET borrow_count = %s, active_borrow_count = %s, '
+               'rating_count = %s, rating_sum = %s, avg_rating = %s, is_available = %s WHERE id = %s')
+        for start in range(0, len(rows), self.batch_size):
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, rows[start:start + self.batch_size])
+
+    def finish(self):
+        """Search index, planner statistics and cache versions for the new rows"""
+        started = time.perf_counter()
+        if search.is_available():
+            with transaction.atomic(), connection.cursor() as cursor:
+                search.create_tables(cursor)
+                search.rebuild(cursor)
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        bump_model_version(User, Author, Category, Book, BorrowRecord, Rating, Announcement)
+        self.stdout.write(f'search index and statistics rebuilt in {time.perf_counter() - started:.1f}s')
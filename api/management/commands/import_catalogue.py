@@ -0,0 +1,49 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils import catalogue_import
+
+
+class Command(BaseCommand):
+    help = "Import books, authors and categories from a CSV or JSONL file (title, author, category, description)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, '-' for standard input")
+        parser.add_argument('--format', choices=catalogue_import.FORMATS, default=None,
+                            help='Input format (default: from the file extension, else csv)')
+        parser.add_argument('--chunk-size', type=int, default=catalogue_import.CHUNK_SIZE,
+                            help='Rows per transaction')
+        parser.add_argument('--batch-size', type=int, default=catalogue_import.BATCH_SIZE,
+                            help='Rows per INSERT statement')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or catalogue_import.detect_format(path)
+        if options['chunk_size'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--chunk-size and --batch-size must be positive')
+
+        def progress(run):
+            self.stdout.write(f'{run.rows} rows read, {run.created} books created ({run.rows_per_second:.0f} rows/s)')
+
+        try:
+            binary = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        except OSError as exc:
+            raise CommandError(str(exc))
+        try:
+            run = catalogue_import.import_catalogue(catalogue_import.text_stream(binary), fmt,
+                                                    options['chunk_size'], options['batch_size'], progress)
+        finally:
+            if binary is not sys.stdin.buffer:
+                binary.close()
+
+        for error in run.errors:
+            self.stdout.write(self.style.WARNING(f"line {error[0]}: {error[1]}"))
+        self.stdout.write(self.style.SUCCESS(
+            f'{run.created} books created from {run.rows} rows in {run.seconds:.2f}s '
+            f'({run.rows_per_second:.0f} rows/s): {run.duplicates} duplicate titles, {run.invalid} invalid rows, '
+            f'{run.authors_created} new authors, {run.categories_created} new categories'))
+        if run.failure is not None:
+            failure = run.failure
+            raise CommandError(f"Import stopped at lines {failure['first_line']}-{failure['last_line']} "
+                               f"({failure['stage']}): {failure['error']}; earlier rows are imported")
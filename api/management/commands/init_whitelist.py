@@ -19,8 +19,13 @@ class Command(BaseCommand):
             # Public APIs below
             ('book-list', 'Book List (GET)'),
             ('book-detail', 'Book Detail (GET)'),
+            ('book-changes', 'Book Changes Since Timestamp (GET)'),
+            ('book-search', 'Book Full-Text Search (GET)'),
+            ('book-autocomplete', 'Book Title / Author Autocomplete (GET)'),
             ('announcement-list', 'Announcement List (GET)'),
             ('announcement-detail', 'Announcement Detail (GET)'),
+            ('announcement-changes', 'Announcement Changes Since Timestamp (GET)'),
+            ('announcement-search', 'Announcement Full-Text Search (GET)'),
             ('category-list', 'Category List (GET)'),
             ('category-detail', 'Category Detail (GET)'),
             ('author-list', 'Author List (GET)'),
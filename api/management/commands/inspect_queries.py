@@ -0,0 +1,250 @@
+import re
+from collections import Counter
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import get_resolver, resolve, reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Book, User, UserType
+from utils.auth import User as Principal
+from utils.query_plan import explain_sql, full_scans, index_scans, temp_btrees
+from utils.routers import replica_available
+
+# Representative query parameters per route; {book_id} / {since} are filled from the current data
+REPRESENTATIVE_PARAMS = {
+    'book-list': {'title': 'a', 'page_size': '20'},
+    'book-search': {'q': 'history'},
+    'book-autocomplete': {'q': 'a'},
+    'book-changes': {'since': '{since}'},
+    'announcement-list': {'title': 'a'},
+    'announcement-search': {'q': 'library'},
+    'announcement-changes': {'since': '{since}'},
+    'borrow-record-list': {'status': 'borrowed', 'page_size': '20'},
+    'borrow-record-changes': {'since': '{since}'},
+    'borrow-record-check-book-status': {'book_id': '{book_id}'},
+    'borrow-record-book-statuses': {'book_ids': '{book_ids}'},
+    'borrow-record-pending-approvals': {},
+    'rating-get-user-rating': {'book_id': '{book_id}'},
+    'user-list': {'page_size': '20'},
+}
+
+# Streamed exports read the whole table in primary key order by design
+WHOLE_TABLE_ACTIONS = ('export',)
+
+ROLES = {
+    'reader': UserType.READER,
+    'librarian': UserType.LIBRARIAN,
+    'admin': UserType.SYSTEM_ADMIN,
+}
+
+COLUMN_RE = r'"{table}"\."(\w+)"'
+
+
+class Command(BaseCommand):
+    help = ("Run every GET route of the registered viewsets (list, retrieve and custom actions) "
+            "with representative filters and report the query plans: full scans, temp B-trees, "
+            "repeated queries and estimated rows read")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as', dest='role', choices=sorted(ROLES), default='admin',
+                            help='Role of the principal the requests run as (default: admin)')
+        parser.add_argument('--only', action='append', default=[],
+                            help='Only inspect routes whose name contains this text (repeatable)')
+        parser.add_argument('--skip', action='append', default=[],
+                            help='Skip routes whose name contains this text (repeatable)')
+        parser.add_argument('--analyze', action='store_true',
+                            help='Run ANALYZE first so index row estimates come from sqlite_stat1')
+        parser.add_argument('--fail-on-issues', action='store_true',
+                            help='Exit with an error when a full scan or temp B-tree is found')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('inspect_queries reads SQLite EXPLAIN QUERY PLAN output')
+
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        self.table_rows = {}
+        self.index_stats = self.load_index_stats()
+
+        principal = self.get_principal(options['role'])
+        context = {
+            'book_id': Book.objects.values_list('id', flat=True).first() or 1,
+            'book_ids': ','.join(str(pk) for pk in Book.objects.values_list('id', flat=True)[:20]) or '1',
+            'since': (timezone.now() - timedelta(days=7)).isoformat(),
+        }
+
+        issues = 0
+        routes = 0
+        # cached counts / pages / validators would hide the queries
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            for name, path, params in self.get_routes(context, options['only'], options['skip']):
+                routes += 1
+                issues += self.inspect_route(name, path, params, principal)
+
+        summary = f'{routes} routes inspected, {issues} issues'
+        if issues:
+            self.stdout.write(self.style.WARNING(summary))
+            if options['fail_on_issues']:
+                raise CommandError(summary)
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
+
+    def get_principal(self, role):
+        user_type = ROLES[role]
+        user = User.objects.filter(user_type=user_type).order_by('id').first()
+        return Principal(id=user.id if user else 0, username=user.username if user else role, exp=None,
+                         is_super=False, user_type=user_type, roles=[])
+
+    def get_routes(self, context, only, skip):
+        """(url name, path, query params) of every GET viewset route, detail routes on an existing row"""
+        seen = set()
+        for pattern, prefix in self.walk(get_resolver().url_patterns):
+            callback = pattern.callback
+            actions = getattr(callback, 'actions', None)
+            if not actions or 'get' not in actions or not pattern.name or pattern.name in seen:
+                continue
+            if 'format' in pattern.pattern.regex.groupindex:
+                continue
+            if (only and not any(text in pattern.name for text in only)) or any(text in pattern.name for text in skip):
+                continue
+            seen.add(pattern.name)
+            if actions['get'] in WHOLE_TABLE_ACTIONS:
+                self.stdout.write(f'{pattern.name}: skipped, streams the whole table')
+                continue
+
+            kwargs = {}
+            if 'pk' in pattern.pattern.regex.groupindex:
+                queryset = getattr(callback.cls, 'queryset', None)
+                model = queryset.model if queryset is not None else callback.cls.serializer_class.Meta.model
+                pk = model._default_manager.values_list('pk', flat=True).first()
+                if pk is None:
+                    self.stdout.write(f'{pattern.name}: skipped, no rows to retrieve')
+                    continue
+                kwargs['pk'] = pk
+            params = {key: value.format(**context) for key, value in REPRESENTATIVE_PARAMS.get(pattern.name, {}).items()}
+            yield pattern.name, reverse(pattern.name, kwargs=kwargs), params
+
+    def walk(self, patterns, prefix=''):
+        for pattern in patterns:
+            if hasattr(pattern, 'url_patterns'):
+                yield from self.walk(pattern.url_patterns, prefix + str(pattern.pattern))
+            else:
+                yield pattern, prefix
+
+    def inspect_route(self, name, path, params, principal):
+        request = APIRequestFactory().get(path, params)
+        request.resolver_match = match = resolve(path)
+        force_authenticate(request, user=principal)
+
+        # analytics reads may be routed to the replica, capture every database
+        with ExitStack() as stack:
+            captured = {alias: stack.enter_context(CaptureQueriesContext(connections[alias]))
+                        for alias in connections if alias == DEFAULT_DB_ALIAS or replica_available(alias)}
+            try:
+                with transaction.atomic():
+                    response = match.func(request, *match.args, **match.kwargs)
+                    transaction.set_rollback(True)
+            except Exception as exc:
+                self.stdout.write(self.style.ERROR(f'{name}: {type(exc).__name__}: {exc}'))
+                return 0
+
+        statements = [(alias, query['sql']) for alias, context in captured.items() for query in context.captured_queries
+                      if query['sql'].lstrip().upper().startswith(('SELECT', 'WITH'))]
+        shapes = Counter(re.sub(r"'[^']*'|\b\d+\b", '?', sql) for alias, sql in statements)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{name}  GET {path}{"?" + request.META["QUERY_STRING"] if params else ""}  '
+            f'[{response.status_code}] {len(statements)} queries'))
+
+        issues = 0
+        reported = set()
+        for alias, sql in statements:
+            shape = re.sub(r"'[^']*'|\b\d+\b", '?', sql)
+            if shape in reported:
+                continue
+            reported.add(shape)
+            plan = explain_sql(sql, using=alias)
+            lines = []
+            for table in full_scans(plan):
+                if ' LIMIT ' in sql and not self.filtered_columns(sql, table):
+                    lines.append(f'bounded scan of {table} (LIMIT, no filter)')
+                    continue
+                issues += 1
+                lines.append(self.style.ERROR(
+                    f'FULL SCAN {table} (~{self.count_rows(table)} rows){self.index_hint(sql, table)}'))
+            for table in index_scans(plan):
+                lines.append(f'index-order scan of {table} (~{self.count_rows(table)} rows unless LIMIT stops it)')
+            for detail in temp_btrees(plan):
+                issues += 1
+                lines.append(self.style.WARNING(detail))
+            if shapes[shape] > 1:
+                issues += 1
+                lines.append(self.style.WARNING(f'same query run {shapes[shape]} times (N+1?)'))
+            estimate = self.estimate_rows(plan)
+            summary = sql if len(sql) <= 160 else sql[:157] + '...'
+            self.stdout.write(f'  {summary}' if alias == DEFAULT_DB_ALIAS else f'  [{alias}] {summary}')
+            for detail in plan:
+                self.stdout.write(f'    | {detail}')
+            if estimate is not None:
+                self.stdout.write(f'    ~{estimate} rows read')
+            for line in lines:
+                self.stdout.write(f'    ! {line}')
+        return issues
+
+    def filtered_columns(self, sql, table):
+        """Columns of the table referenced after WHERE"""
+        where = sql.split(' WHERE ', 1)
+        if len(where) < 2:
+            return []
+        return sorted(set(re.findall(COLUMN_RE.format(table=re.escape(table)), where[1].split(' ORDER BY ')[0])))
+
+    def index_hint(self, sql, table):
+        columns = self.filtered_columns(sql, table)
+        if not columns:
+            return ''
+        if re.search(r"LIKE '%", sql):
+            return f'; filters {", ".join(columns)} with a leading-wildcard LIKE, only full-text search avoids the scan'
+        return f'; consider an index on {table}({", ".join(columns)})'
+
+    def count_rows(self, table):
+        if table not in self.table_rows:
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+                self.table_rows[table] = cursor.fetchone()[0]
+        return self.table_rows[table]
+
+    def load_index_stats(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return {}
+            cursor.execute('SELECT tbl, idx, stat FROM sqlite_stat1')
+            return {(table, index): stat.split() for table, index, stat in cursor.fetchall()}
+
+    def estimate_rows(self, plan):
+        """Rough number of rows read: table size for scans, sqlite_stat1 averages for index searches"""
+        total = 0
+        for detail in plan:
+            scan = re.match(r'^SCAN (\w+)', detail)
+            if scan and 'VIRTUAL TABLE' not in detail:
+                total += self.count_rows(scan.group(1))
+                continue
+            search = re.match(r'^SEARCH (\w+)(?: AS \w+)? USING (?:COVERING )?INDEX (\w+) \((.*)\)', detail)
+            if search:
+                table, index, constraints = search.groups()
+                stat = self.index_stats.get((table, index))
+                equalities = constraints.count('=?') - constraints.count('>=?') - constraints.count('<=?')
+                if stat and 0 < equalities < len(stat):
+                    total += int(stat[equalities])
+                elif stat:
+                    total += int(stat[0])
+                else:
+                    return None
+            elif re.match(r'^SEARCH \w+(?: AS \w+)? USING INTEGER PRIMARY KEY \(rowid=\?\)', detail):
+                total += 1
+        return total
@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import DeletionLog
+
+
+class Command(BaseCommand):
+    help = ("Delete the tombstones older than DELETION_LOG_RETENTION_DAYS. The changes endpoints never read "
+            "them (older `since` values get a full snapshot), run this from cron, e.g. daily")
+
+    def handle(self, *args, **options):
+        retention = timedelta(days=getattr(settings, 'DELETION_LOG_RETENTION_DAYS', 30))
+        deleted, _ = DeletionLog.objects.filter(deleted_at__lt=timezone.now() - retention).delete()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} expired tombstones deleted'))
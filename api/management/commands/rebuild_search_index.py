@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from api.models import Announcement, Book
+from utils import search
+from utils.cache import bump_model_version
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of books and announcements"
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            self.stdout.write(self.style.WARNING('Full-text search needs SQLite FTS5, nothing to do'))
+            return
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            search.create_tables(cursor)
+            search.rebuild(cursor)
+            cursor.execute(f"SELECT COUNT(*) FROM {search.BOOK_TABLE}")
+            books = cursor.fetchone()[0]
+            cursor.execute(f"SELECT COUNT(*) FROM {search.ANNOUNCEMENT_TABLE}")
+            announcements = cursor.fetchone()[0]
+        # cached search pages and counts were computed from the old index
+        bump_model_version(Book, Announcement)
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {books} books and {announcements} announcements'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from utils.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recompute the borrow and rating counters of every book and repair the ones that drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the drift')
+
+    def handle(self, *args, **options):
+        drifted = reconcile(dry_run=options['dry_run'])
+        for item in drifted:
+            changes = ', '.join(f'{field} {stored} -> {expected}'
+                                for field, (stored, expected) in item['changes'].items())
+            self.stdout.write(f"#{item['id']} {item['title']}: {changes}")
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('All book counters are consistent'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drifted)} books drifted (dry run, nothing changed)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{len(drifted)} books repaired'))
@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.routers import refresh_replica, replica_alias
+
+
+class Command(BaseCommand):
+    help = "Refresh the analytics read replica with an online backup of the primary database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and refresh every --interval seconds')
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Seconds between refreshes with --loop (default: REPLICA_REFRESH_INTERVAL)')
+
+    def handle(self, *args, **options):
+        alias = replica_alias()
+        if alias not in settings.DATABASES:
+            raise CommandError(f"No '{alias}' database configured")
+        interval = options['interval'] or getattr(settings, 'REPLICA_REFRESH_INTERVAL', 300)
+
+        while True:
+            try:
+                seconds, size = refresh_replica(alias)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(self.style.SUCCESS(
+                f"Replica '{alias}' refreshed in {seconds * 1000:.0f}ms ({size / 1024:.0f} KiB)"))
+            if not options['loop']:
+                return
+            time.sleep(interval)
@@ -0,0 +1,44 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_user_is_active_user_last_login_alter_user_password_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='Model')),
+                ('object_id', models.BigIntegerField(verbose_name='Object ID')),
+                ('owner_id', models.BigIntegerField(blank=True, null=True, verbose_name='Owner ID')),
+                ('deleted_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Deleted At')),
+            ],
+            options={
+                'verbose_name': 'Deletion Log',
+                'verbose_name_plural': 'Deletion Logs',
+                'db_table': 'deletion_log',
+                'indexes': [models.Index(fields=['model', 'deleted_at'], name='deletion_lo_model_f4850f_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='borrowrecord',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now, verbose_name='Updated At'),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='announcement',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Updated At'),
+        ),
+        migrations.AlterField(
+            model_name='book',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Updated At'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+from utils import search
+
+
+def create_search_index(apps, schema_editor):
+    if not search.is_available(schema_editor.connection):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        search.create_tables(cursor)
+        search.rebuild(cursor)
+
+
+def drop_search_index(apps, schema_editor):
+    if not search.is_available(schema_editor.connection):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        search.drop_tables(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_deletionlog_borrowrecord_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
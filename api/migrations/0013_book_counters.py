@@ -0,0 +1,53 @@
+from django.db import migrations, models
+
+from utils.counters import counter_expressions
+
+
+def fill_counters(apps, schema_editor):
+    Book = apps.get_model('api', 'Book')
+    expressions = counter_expressions(apps.get_model('api', 'BorrowRecord'), apps.get_model('api', 'Rating'))
+    Book.objects.using(schema_editor.connection.alias).update(**expressions)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='borrow_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Borrow Count'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='active_borrow_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Active Borrow Count'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Rating Count'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Rating Sum'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='avg_rating',
+            field=models.FloatField(default=0, verbose_name='Average Rating'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['-borrow_count', '-id'], name='book_borrow_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['-avg_rating', '-rating_count', '-id'], name='book_avg_rating_idx'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
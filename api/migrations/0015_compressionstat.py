@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_author_category_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompressionStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('route', models.CharField(max_length=255, unique=True, verbose_name='Route')),
+                ('responses', models.PositiveBigIntegerField(default=0, verbose_name='Responses')),
+                ('original_bytes', models.PositiveBigIntegerField(default=0, verbose_name='Original Bytes')),
+                ('compressed_bytes', models.PositiveBigIntegerField(default=0, verbose_name='Compressed Bytes')),
+            ],
+            options={
+                'verbose_name': 'Compression Stat',
+                'verbose_name_plural': 'Compression Stats',
+                'db_table': 'compression_stat',
+            },
+        ),
+    ]
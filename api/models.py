@@ -71,6 +71,10 @@ class User(models.Model):
         verbose_name = 'User'
         verbose_name_plural = 'Users'
         ordering = ['-id']
+        indexes = [
+            # LoginView looks users up by username and user_type
+            models.Index(fields=['username', 'user_type'], name='user_username_type_idx'),
+        ]
 
     def __str__(self):
         return f"{self.username} - {self.get_user_type_display()}"
@@ -137,7 +141,7 @@ class Announcement(models.Model):
     content = models.TextField(verbose_name="Content")
     is_visible = models.BooleanField(default=True, verbose_name="Is Visible")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
-    updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Updated At")
     published_at = models.DateTimeField(default=timezone.now, verbose_name="Published At")
 
     class Meta:
@@ -170,6 +174,8 @@ class Announcement(models.Model):
 class Category(models.Model):
     """Book category"""
     name = models.CharField(max_length=255, verbose_name="Category Name")
+    # ETags and Last-Modified of the category / author lists and of the books joining them
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Updated At")
 
     class Meta:
         db_table = 'category'
@@ -183,6 +189,8 @@ class Category(models.Model):
 class Author(models.Model):
     """Author information"""
     name = models.CharField(max_length=255, verbose_name="Author Name")
+    # ETags and Last-Modified of the category / author lists and of the books joining them
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Updated At")
 
     class Meta:
         db_table = 'author'
@@ -201,13 +209,26 @@ class Book(models.Model):
     description = models.TextField(blank=True, null=True, verbose_name="Description")
     is_available = models.BooleanField(default=True, verbose_name="Is Available")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
-    updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Updated At")
+    # Denormalized from BorrowRecord / Rating, kept by utils.counters (reconcile_book_counters repairs drift)
+    borrow_count = models.PositiveIntegerField(default=0, verbose_name="Borrow Count")
+    active_borrow_count = models.PositiveIntegerField(default=0, verbose_name="Active Borrow Count")
+    rating_count = models.PositiveIntegerField(default=0, verbose_name="Rating Count")
+    rating_sum = models.PositiveIntegerField(default=0, verbose_name="Rating Sum")
+    avg_rating = models.FloatField(default=0, verbose_name="Average Rating")
 
     class Meta:
         db_table = 'book'
         verbose_name = "Book"
         verbose_name_plural = "Books"
         ordering = ['title']
+        indexes = [
+            # default ordering, keyset pagination and the duplicate title check
+            models.Index(fields=['title'], name='book_title_idx'),
+            # ?ordering=popular and ?ordering=rating
+            models.Index(fields=['-borrow_count', '-id'], name='book_borrow_count_idx'),
+            models.Index(fields=['-avg_rating', '-rating_count', '-id'], name='book_avg_rating_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -226,12 +247,21 @@ class BorrowRecord(models.Model):
         ('rejected', 'Rejected'),
     )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Status")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Updated At")
 
     class Meta:
         db_table = 'borrow_record'
         verbose_name = "Borrow Record"
         verbose_name_plural = "Borrow Records"
         ordering = ['-borrow_date']
+        indexes = [
+            # latest record of a user for a book (check_book_status)
+            models.Index(fields=['user', 'book', 'borrow_date'], name='borrow_user_book_date_idx'),
+            # a reader's own records, newest first
+            models.Index(fields=['user', 'borrow_date'], name='borrow_user_date_idx'),
+            # pending approvals and the analytics, filtered by status over time
+            models.Index(fields=['status', 'borrow_date'], name='borrow_status_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.book.title}"
@@ -271,3 +301,36 @@ class Rating(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.book.title} ({self.score})"
+
+
+class DeletionLog(models.Model):
+    """Tombstones of deleted rows, read by delta-sync clients"""
+    model = models.CharField(max_length=100, verbose_name="Model")
+    object_id = models.BigIntegerField(verbose_name="Object ID")
+    owner_id = models.BigIntegerField(blank=True, null=True, verbose_name="Owner ID")
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name="Deleted At")
+
+    class Meta:
+        db_table = 'deletion_log'
+        verbose_name = "Deletion Log"
+        verbose_name_plural = "Deletion Logs"
+        indexes = [models.Index(fields=['model', 'deleted_at'])]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id}"
+
+
+class CompressionStat(models.Model):
+    """Bytes saved by response compression per route, summed over every serving process"""
+    route = models.CharField(max_length=255, unique=True, verbose_name="Route")
+    responses = models.PositiveBigIntegerField(default=0, verbose_name="Responses")
+    original_bytes = models.PositiveBigIntegerField(default=0, verbose_name="Original Bytes")
+    compressed_bytes = models.PositiveBigIntegerField(default=0, verbose_name="Compressed Bytes")
+
+    class Meta:
+        db_table = 'compression_stat'
+        verbose_name = "Compression Stat"
+        verbose_name_plural = "Compression Stats"
+
+    def __str__(self):
+        return self.route
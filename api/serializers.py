@@ -5,6 +5,7 @@
 @time: April 09, 2025 9:44
 Convert data objects to JSON format
 """
+from django.utils import timezone
 from rest_framework import serializers
 from api.models import Announcement, Book, BorrowRecord, Recommendation, Rating, Category, Author, User
 from rest_framework.validators import UniqueTogetherValidator
@@ -73,6 +74,15 @@ class BookSerializer(serializers.ModelSerializer):
     class Meta:
         model = Book
         fields = '__all__'
+        # maintained by utils.counters
+        read_only_fields = ('borrow_count', 'active_borrow_count', 'rating_count', 'rating_sum', 'avg_rating')
+
+
+class BookListSerializer(BookSerializer):
+    """Catalogue list serializer, leaves out the long description"""
+    class Meta(BookSerializer.Meta):
+        fields = None
+        exclude = ['description']
 
 
 class BorrowRecordSerializer(serializers.ModelSerializer):
@@ -80,7 +90,8 @@ class BorrowRecordSerializer(serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.username', read_only=True)
     borrower = serializers.CharField(source='user.username', read_only=True)
     borrower_id = serializers.IntegerField(source='user.id', read_only=True)
-    borrower_email = serializers.EmailField(source='user.email', read_only=True, allow_null=True)
+    # api.User has no email column; kept in the payload for frontend compatibility
+    borrower_email = serializers.SerializerMethodField()
     borrower_type = serializers.CharField(source='user.user_type', read_only=True, allow_null=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     can_approve = serializers.SerializerMethodField()
@@ -95,6 +106,29 @@ class BorrowRecordSerializer(serializers.ModelSerializer):
     class Meta:
         model = BorrowRecord
         fields = '__all__'
+        # columns read by the method fields, used by sparse fieldsets (?fields=)
+        method_field_sources = {
+            'borrower_email': [],
+            'can_approve': ['status'],
+            'can_return': ['status'],
+            'status_text': ['status'],
+            'status_color': ['status'],
+            'formatted_return_date': ['return_date'],
+            'formatted_borrow_date': ['borrow_date'],
+            'is_overdue': ['status', 'return_date'],
+            'days_remaining': ['status', 'return_date'],
+        }
+
+    def get_today(self):
+        """
+        Current date, computed once per response and shared by every row
+        """
+        if 'today' not in self.context:
+            self.context['today'] = timezone.now().date()
+        return self.context['today']
+
+    def get_borrower_email(self, obj):
+        return None
 
     def get_can_approve(self, obj):
         """
@@ -155,10 +189,7 @@ class BorrowRecordSerializer(serializers.ModelSerializer):
         Check if the book is overdue
         """
         if obj.status == 'borrowed' and obj.return_date:
-            from django.utils import timezone
-            today = timezone.now().date()
-            return_date = obj.return_date.date()
-            return today > return_date
+            return self.get_today() > obj.return_date.date()
         return False
         
     def get_days_remaining(self, obj):
@@ -166,10 +197,7 @@ class BorrowRecordSerializer(serializers.ModelSerializer):
         Calculate days remaining until return date
         """
         if obj.status == 'borrowed' and obj.return_date:
-            from django.utils import timezone
-            today = timezone.now().date()
-            return_date = obj.return_date.date()
-            return (return_date - today).days
+            return (obj.return_date.date() - self.get_today()).days
         return None
 
 
@@ -204,6 +232,9 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = '__all__'
+        method_field_sources = {
+            'formatted_last_login': ['last_login'],
+        }
         
     def get_formatted_last_login(self, obj):
         """Return formatted last login time"""
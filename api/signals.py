@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+@File: signals.py
+Keep derived data in step with model writes
+"""
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from api.models import Announcement, Author, Book, BorrowRecord, Category, CompressionStat, DeletionLog
+from utils import search
+from utils.autocomplete import AUTHOR, TITLE, catalogue_index
+from utils.cache import bump_model_version
+
+# Models whose deletions are reported to delta-sync clients (see DeltaSyncMixin)
+TOMBSTONE_MODELS = (Book, Announcement, BorrowRecord)
+# Bookkeeping tables that no cached response or count reads, their writes invalidate nothing
+UNVERSIONED_MODELS = (CompressionStat, DeletionLog)
+
+
+def is_api_model(sender):
+    return getattr(sender, '_meta', None) is not None and sender._meta.app_label == 'api'
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_version_on_write(sender, **kwargs):
+    """Invalidate counts and cached responses of the written model"""
+    if is_api_model(sender) and sender not in UNVERSIONED_MODELS:
+        bump_model_version(sender)
+
+
+@receiver(m2m_changed)
+def bump_version_on_m2m_change(sender, instance, action, model=None, **kwargs):
+    """Role/permission assignments change the data of both sides of the relation"""
+    if action.startswith('post_') and is_api_model(type(instance)):
+        bump_model_version(type(instance), model)
+
+
+@receiver(post_delete)
+def record_tombstone(sender, instance, **kwargs):
+    """Remember deleted ids for the changes endpoints (expired ones are dropped by purge_tombstones)"""
+    if sender not in TOMBSTONE_MODELS:
+        return
+    DeletionLog.objects.create(
+        model=sender._meta.label_lower, object_id=instance.pk,
+        owner_id=getattr(instance, 'user_id', None), deleted_at=timezone.now(),
+    )
+
+
+@receiver(post_save, sender=Book)
+def index_book(sender, instance, **kwargs):
+    """Keep the full-text index in step with the book and its author / category names"""
+    search.index_book(instance.pk)
+
+
+@receiver(post_save, sender=Author)
+def index_author_books(sender, instance, created, **kwargs):
+    if not created:
+        search.index_books_by_author(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def index_category_books(sender, instance, created, **kwargs):
+    if not created:
+        search.index_books_by_category(instance.pk)
+
+
+@receiver(post_save, sender=Announcement)
+def index_announcement(sender, instance, **kwargs):
+    search.index_announcement(instance)
+
+
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Announcement)
+def unindex_deleted(sender, instance, **kwargs):
+    table = search.BOOK_TABLE if sender is Book else search.ANNOUNCEMENT_TABLE
+    search.unindex(table, instance.pk)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Author)
+def autocomplete_add(sender, instance, **kwargs):
+    """Book create/update and Author get_or_create update the type-ahead index in place"""
+    if sender is Book:
+        catalogue_index.add(TITLE, instance.pk, instance.title)
+    else:
+        catalogue_index.add(AUTHOR, instance.pk, instance.name)
+
+
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Author)
+def autocomplete_remove(sender, instance, **kwargs):
+    catalogue_index.remove(TITLE if sender is Book else AUTHOR, instance.pk)
@@ -1,3 +1,10 @@
 """
 测试模块初始化文件
-""" 
\ No newline at end of file
+"""
+
+
+def make_principal(user):
+    """构造与 JWT 认证一致的请求主体"""
+    from utils.auth import User as Principal
+    return Principal(id=user.id, username=user.username, exp=None,
+                     is_super=user.is_super, user_type=user.user_type, roles=[])
@@ -0,0 +1,85 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.models import Author, Book, Category, User, UserType
+from api.tests import make_principal
+from utils.autocomplete import AUTHOR, TITLE, PrefixIndex, catalogue_index
+
+
+class PrefixIndexTests(TestCase):
+    """测试前缀索引"""
+
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.index.load([
+            (TITLE, 1, "The Hobbit"),
+            (TITLE, 2, "Hobbit Tales"),
+            (TITLE, 3, "Crème Brûlée Recipes"),
+            (AUTHOR, 1, "Tolkien"),
+        ])
+
+    def test_word_prefix(self):
+        """匹配任意单词开头，忽略大小写和重音"""
+        self.assertEqual({pk for _, pk, _ in self.index.search('hob')}, {1, 2})
+        self.assertEqual(self.index.search('creme b'), [(TITLE, 3, "Crème Brûlée Recipes")])
+        self.assertEqual(self.index.search('TOL', kinds=(AUTHOR,)), [(AUTHOR, 1, "Tolkien")])
+        self.assertEqual(self.index.search('tol', kinds=(TITLE,)), [])
+        self.assertEqual(self.index.search('   '), [])
+
+    def test_incremental_updates(self):
+        """新增、改名、删除后索引即时更新"""
+        self.index.add(TITLE, 4, "Hobbiton Maps")
+        self.assertEqual(len(self.index.search('hobbit')), 3)
+        self.index.add(TITLE, 1, "There and Back Again")
+        self.assertEqual({pk for _, pk, _ in self.index.search('hobbit')}, {2, 4})
+        self.assertEqual(self.index.search('back'), [(TITLE, 1, "There and Back Again")])
+        self.index.remove(TITLE, 2)
+        self.assertEqual({pk for _, pk, _ in self.index.search('hobbit')}, {4})
+        self.assertEqual(len(self.index), 4)
+
+    def test_limit(self):
+        """结果数量受 limit 限制"""
+        self.assertEqual(len(self.index.search('h', limit=1)), 1)
+
+
+class AutocompleteEndpointTests(TestCase):
+    """测试自动补全接口"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Novel")
+        self.author = Author.objects.create(name="Tolkien")
+        Book.objects.create(title="The Hobbit", category=self.category, author=self.author)
+        catalogue_index.rebuild()
+        librarian = User.objects.create(username="staff", password="x", user_type=UserType.LIBRARIAN)
+        self.client = APIClient()
+        self.client.force_authenticate(user=make_principal(librarian))
+
+    def test_no_database_queries(self):
+        """补全请求不访问数据库"""
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('book-autocomplete'), {'q': 'hob'})
+        self.assertEqual(response.data['results'], [
+            {'type': TITLE, 'id': Book.objects.get().pk, 'text': "The Hobbit"},
+        ])
+
+    def test_create_updates_index(self):
+        """通过接口创建图书和作者后立即可补全"""
+        response = self.client.post(reverse('book-list'), {
+            'title': "Silmarillion", 'author': "Christopher Tolkien", 'category': "Novel",
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        titles = self.client.get(reverse('book-autocomplete'), {'q': 'silm', 'type': 'title'}).data['results']
+        self.assertEqual([row['text'] for row in titles], ["Silmarillion"])
+        authors = self.client.get(reverse('book-autocomplete'), {'q': 'tolk', 'type': 'author'}).data['results']
+        self.assertEqual({row['text'] for row in authors}, {"Tolkien", "Christopher Tolkien"})
+
+    def test_update_and_delete(self):
+        """修改标题和删除图书后补全结果同步"""
+        book = Book.objects.get()
+        response = self.client.patch(reverse('book-detail', args=[book.pk]), {'title': "There and Back Again"},
+                                     format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(reverse('book-autocomplete'), {'q': 'hob'}).data['results'], [])
+        book.delete()
+        self.assertEqual(self.client.get(reverse('book-autocomplete'), {'q': 'there'}).data['results'], [])
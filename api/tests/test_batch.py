@@ -0,0 +1,119 @@
+import json
+
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Author, Book, BorrowRecord, Category, User, WhitelistUrl
+from api.tests import make_principal
+
+
+class BatchTests(TestCase):
+    """/api/batch/ 一次请求执行多个只读子请求，共享认证"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Novel")
+        author = Author.objects.create(name="Author")
+        self.book = Book.objects.create(title="Dune", category=self.category, author=author)
+        self.reader = User.objects.create(username="reader", password="x")
+        BorrowRecord.objects.create(user=self.reader, book=self.book, status='pending')
+        self.client = APIClient()
+        self.client.force_authenticate(user=make_principal(self.reader))
+        self.url = reverse('batch')
+
+    def batch(self, requests, client=None):
+        return (client or self.client).post(self.url, {'requests': requests}, format='json')
+
+    def test_responses_match_individual_requests(self):
+        """每个子响应与单独请求的响应一致，并带上耗时"""
+        requests = [
+            {'id': 'books', 'path': '/api/books/', 'query': {'page_size': 5}},
+            {'id': 'categories', 'path': '/api/categories/'},
+            {'id': 'borrows', 'path': '/api/borrow-records/?status=pending'},
+            {'path': '/api/borrow-records/check-book-status/', 'query': f'book_id={self.book.pk}'},
+        ]
+
+        response = self.batch(requests)
+
+        self.assertEqual(response.status_code, 200)
+        payload = json.loads(response.content)
+        self.assertEqual(payload['code'], 0)
+        results = payload['data']['responses']
+        self.assertEqual([result['id'] for result in results], ['books', 'categories', 'borrows', 3])
+        for request, result in zip(requests, results):
+            query = request.get('query', {})
+            single = self.client.get(f"{request['path']}?{query}") if isinstance(query, str) \
+                else self.client.get(request['path'], query)
+            self.assertEqual(result['status'], single.status_code)
+            self.assertEqual(result['body'], json.loads(single.content))
+            self.assertGreaterEqual(result['duration_ms'], 0)
+        self.assertEqual(results[2]['body']['results'][0]['status'], 'pending')
+
+    def test_sub_request_errors_are_reported_per_request(self):
+        """不支持的方法、未知路径和嵌套批量只影响各自的子响应"""
+        response = self.batch([
+            {'method': 'DELETE', 'path': f'/api/books/{self.book.pk}/'},
+            {'path': '/api/missing/'},
+            {'path': '/api/batch/'},
+            {'path': f'/api/books/{self.book.pk + 100}/'},
+            {'query': {}},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        statuses = [result['status'] for result in json.loads(response.content)['data']['responses']]
+        self.assertEqual(statuses, [405, 404, 400, 404, 400])
+        self.assertTrue(Book.objects.filter(pk=self.book.pk).exists())
+
+    def test_rejects_empty_or_oversized_batch(self):
+        self.assertEqual(self.batch([]).status_code, 400)
+        self.assertEqual(self.batch([{'path': '/api/books/'}] * (settings.BATCH_MAX_REQUESTS + 1)).status_code, 400)
+
+    def test_token_is_checked_once(self):
+        """JWT 只在批量请求上解码一次，子请求不再查询白名单和用户"""
+        token = jwt.encode({'id': self.reader.pk, 'username': self.reader.username,
+                            'exp': timezone.now() + timezone.timedelta(days=1)},
+                           settings.SECRET_KEY, algorithm='HS256')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        whitelist_table = WhitelistUrl._meta.db_table
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.batch([{'path': '/api/categories/'}, {'path': '/api/announcements/'},
+                                   {'path': '/api/borrow-records/'}], client=client)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(result['status'] == 200
+                            for result in json.loads(response.content)['data']['responses']))
+        whitelist_lookups = [query for query in captured.captured_queries if whitelist_table in query['sql']]
+        self.assertEqual(len(whitelist_lookups), 1)
+
+        anonymous = APIClient().post(self.url, {'requests': [{'path': '/api/books/'}]}, format='json')
+        self.assertIn(anonymous.status_code, (401, 403))
+
+
+class ConcurrentBatchTests(TransactionTestCase):
+    """子请求在线程池中并发执行，结果顺序不变"""
+
+    def test_thread_pool_keeps_order(self):
+        category = Category.objects.create(name="Novel")
+        author = Author.objects.create(name="Author")
+        for i in range(3):
+            Book.objects.create(title=f"Book {i}", category=category, author=author)
+        client = APIClient()
+        client.force_authenticate(user=make_principal(User.objects.create(username="reader", password="x")))
+        requests = [{'id': i, 'path': f'/api/books/{book_id}/'}
+                    for i, book_id in enumerate(Book.objects.order_by('id').values_list('id', flat=True))]
+
+        with self.settings(BATCH_MAX_CONCURRENCY=3):
+            response = client.post(reverse('batch'), {'requests': requests}, format='json')
+
+        results = json.loads(response.content)['data']['responses']
+        self.assertEqual([result['status'] for result in results], [200, 200, 200])
+        self.assertEqual([result['body']['title'] for result in results], ["Book 0", "Book 1", "Book 2"])
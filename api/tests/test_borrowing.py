@@ -0,0 +1,236 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Author, Book, BorrowRecord, Category, Rating, User, UserType
+from api.tests import make_principal
+from utils import borrowing, counters
+
+
+class BorrowTransitionTests(TestCase):
+    """借阅状态变更是带条件的 UPDATE，并发审批只有一个成功"""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name="Novel")
+        author = Author.objects.create(name="Author")
+        self.book = Book.objects.create(title="Dune", category=category, author=author)
+        self.reader = User.objects.create(username="reader", password="x")
+        self.other_reader = User.objects.create(username="reader2", password="x")
+        librarian = User.objects.create(username="librarian", password="x", user_type=UserType.LIBRARIAN)
+        self.client = APIClient()
+        self.client.force_authenticate(user=make_principal(librarian))
+
+    def request(self, user):
+        return BorrowRecord.objects.create(user=user, book=self.book, status='pending')
+
+    def approve(self, record, approval_status='borrowed'):
+        return self.client.post(reverse('borrow-record-approve-borrow', kwargs={'pk': record.pk}),
+                                {'status': approval_status}, format='json')
+
+    def test_approve_is_two_updates(self):
+        """批准借阅：一条记录 UPDATE 加一条图书 UPDATE"""
+        record = self.request(self.reader)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertTrue(borrowing.approve_borrow(record))
+        statements = [query['sql'] for query in captured.captured_queries
+                      if not query['sql'].startswith(('BEGIN', 'COMMIT', 'SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(len(statements), 2, statements)
+        self.assertTrue(all(sql.startswith('UPDATE') for sql in statements), statements)
+        self.assertEqual(record.status, 'borrowed')
+        self.assertIsNotNone(record.return_date)
+
+    def test_stale_record_cannot_be_approved_twice(self):
+        """两个管理员先后处理同一个已加载的申请，第二个失败"""
+        record = self.request(self.reader)
+        stale = BorrowRecord.objects.get(pk=record.pk)
+        self.assertTrue(borrowing.approve_borrow(record))
+
+        self.assertFalse(borrowing.reject_borrow(stale))
+        self.assertEqual(borrowing.conflict_reason(stale), "Borrow record is already 'borrowed'")
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.borrow_count, 1)
+
+    def test_second_request_for_borrowed_book_conflicts(self):
+        """同一本书的两个借阅申请只能批准一个"""
+        first, second = self.request(self.reader), self.request(self.other_reader)
+
+        self.assertEqual(self.approve(first).status_code, 200)
+        response = self.approve(second)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['error'], "The book is already borrowed by another reader")
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'pending')
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.borrow_count, self.book.active_borrow_count), (1, 1))
+
+    def test_reject_leaves_book_alone(self):
+        record = self.request(self.reader)
+        response = self.approve(record, 'rejected')
+        self.assertEqual(response.status_code, 200)
+        record.refresh_from_db()
+        self.assertEqual(record.status, 'rejected')
+        self.book.refresh_from_db()
+        self.assertTrue(self.book.is_available)
+
+    def test_return_request_becomes_pending(self):
+        """归还申请把记录改回 pending，管理员可再次批准"""
+        record = self.request(self.reader)
+        self.approve(record)
+        reader_client = APIClient()
+        reader_client.force_authenticate(user=make_principal(self.reader))
+
+        response = reader_client.post(reverse('borrow-record-return-book', kwargs={'pk': record.pk}))
+
+        self.assertEqual(response.status_code, 200)
+        record.refresh_from_db()
+        self.assertEqual(record.status, 'pending')
+        self.assertEqual(self.approve(record).status_code, 200)
+
+    def test_confirm_return(self):
+        record = self.request(self.reader)
+        borrowing.approve_borrow(record)
+        BorrowRecord.objects.filter(pk=record.pk).update(status='approval')
+        counters.status_changed(self.book.pk, 'borrowed', 'approval')
+        record.refresh_from_db()
+
+        self.assertTrue(borrowing.confirm_return(record))
+
+        self.book.refresh_from_db()
+        self.assertTrue(self.book.is_available)
+        self.assertEqual((self.book.borrow_count, self.book.active_borrow_count), (1, 0))
+        self.assertEqual(counters.reconcile(dry_run=True), [])
+        self.assertFalse(borrowing.confirm_return(record))
+
+
+class BulkApproveTests(TestCase):
+    """批量审批：一个事务内按集合更新，逐条返回结果"""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name="Novel")
+        author = Author.objects.create(name="Author")
+        self.books = [Book.objects.create(title=f"Book {i}", category=category, author=author) for i in range(30)]
+        self.readers = [User.objects.create(username=f"reader{i}", password="x") for i in range(2)]
+        self.librarian = User.objects.create(username="librarian", password="x", user_type=UserType.LIBRARIAN)
+        self.client = APIClient()
+        self.client.force_authenticate(user=make_principal(self.librarian))
+        self.url = reverse('borrow-record-bulk-approve')
+
+    def test_approves_backlog_with_constant_queries(self):
+        """查询数与记录数无关"""
+        records = [BorrowRecord.objects.create(user=self.readers[0], book=book, status='pending') for book in self.books]
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post(self.url, {'ids': [record.pk for record in records], 'status': 'borrowed'},
+                                        format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['approved'], response.data['failed']), (30, 0))
+        self.assertLess(len(captured.captured_queries), 15)
+        self.assertEqual(BorrowRecord.objects.filter(status='borrowed').count(), 30)
+        self.assertFalse(Book.objects.filter(is_available=True).exists())
+        self.assertEqual(set(Book.objects.values_list('borrow_count', flat=True)), {1})
+
+    def test_per_id_results(self):
+        """同书第二个申请、已处理记录、不存在的 id 和非法状态逐条报告"""
+        first = BorrowRecord.objects.create(user=self.readers[0], book=self.books[0], status='pending')
+        second = BorrowRecord.objects.create(user=self.readers[1], book=self.books[0], status='pending')
+        done = BorrowRecord.objects.create(user=self.readers[0], book=self.books[1], status='rejected')
+        reject = BorrowRecord.objects.create(user=self.readers[1], book=self.books[2], status='pending')
+
+        response = self.client.post(self.url, {'items': [
+            {'id': first.pk, 'status': 'borrowed'},
+            {'id': second.pk, 'status': 'borrowed'},
+            {'id': done.pk, 'status': 'borrowed'},
+            {'id': reject.pk, 'status': 'rejected'},
+            {'id': 999999, 'status': 'rejected'},
+            {'id': first.pk, 'status': 'rejected'},
+            {'id': reject.pk + 1000, 'status': 'returned'},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual([result['success'] for result in results], [True, False, False, True, False, False, False])
+        self.assertEqual(results[1]['error'], "The book is already borrowed by another reader")
+        self.assertEqual(results[2]['error'], "Borrow record is already 'rejected'")
+        self.assertEqual(results[4]['error'], "Borrow record does not exist")
+        self.assertEqual(results[5]['error'], "Duplicate record id")
+        self.assertEqual((response.data['approved'], response.data['rejected'], response.data['failed']), (1, 1, 5))
+        reject.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((reject.status, second.status), ('rejected', 'pending'))
+
+    def test_readers_cannot_bulk_approve(self):
+        client = APIClient()
+        client.force_authenticate(user=make_principal(self.readers[0]))
+        response = client.post(self.url, {'ids': [1], 'status': 'borrowed'}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_rejects_malformed_body(self):
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'items': [{'status': 'borrowed'}]}, format='json').status_code, 400)
+
+
+class BookStatusesTests(TestCase):
+    """目录页一次取回整页图书的借阅状态和本人评分"""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name="Novel")
+        author = Author.objects.create(name="Author")
+        self.books = [Book.objects.create(title=f"Book {i}", category=category, author=author) for i in range(20)]
+        self.reader = User.objects.create(username="reader", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(user=make_principal(self.reader))
+        self.url = reverse('borrow-record-book-statuses')
+
+    def statuses(self, book_ids):
+        return self.client.get(self.url, {'book_ids': ','.join(str(book_id) for book_id in book_ids)})
+
+    def test_matches_check_book_status(self):
+        """每本书的结果与单本 check-book-status 一致，并带上本人评分"""
+        borrowed = BorrowRecord.objects.create(user=self.reader, book=self.books[0], status='borrowed')
+        BorrowRecord.objects.filter(pk=borrowed.pk).update(return_date=timezone.now() + timedelta(days=10))
+        BorrowRecord.objects.create(user=self.reader, book=self.books[1], status='returned')
+        BorrowRecord.objects.create(user=self.reader, book=self.books[1], status='pending')
+        BorrowRecord.objects.create(user=self.reader, book=self.books[2], status='rejected')
+        Rating.objects.create(user=self.reader, book=self.books[1], score=4, comment="good")
+        book_ids = [book.pk for book in self.books[:4]]
+
+        response = self.statuses(book_ids)
+
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual([result['book_id'] for result in results], book_ids)
+        for result in results:
+            single = self.client.get(reverse('borrow-record-check-book-status'), {'book_id': result['book_id']})
+            self.assertEqual({key: value for key, value in result.items() if key != 'rating'}, single.data)
+        self.assertEqual([result['status'] for result in results], ['borrowed', 'pending', 'available', 'available'])
+        self.assertEqual(results[0]['days_remaining'], 10)
+        self.assertEqual(results[1]['rating']['score'], 4)
+        self.assertIsNone(results[0]['rating'])
+
+    def test_two_queries_for_a_page(self):
+        """整页 20 本书只需两条查询"""
+        for book in self.books:
+            BorrowRecord.objects.create(user=self.reader, book=book, status='returned')
+            Rating.objects.create(user=self.reader, book=book, score=3)
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(borrowing.user_overlay(self.reader.pk, [book.pk for book in self.books]).keys(),
+                             {book.pk for book in self.books})
+        self.assertEqual(len(captured.captured_queries), 2)
+
+    def test_unknown_and_invalid_ids(self):
+        response = self.statuses([self.books[0].pk, 999999])
+        self.assertEqual(response.data['not_found'], [999999])
+        self.assertEqual(self.client.get(self.url, {'book_ids': '1,x'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.statuses(range(1, 102)).status_code, 400)
@@ -0,0 +1,174 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.models import Author, Book, Category, User, UserType
+from api.tests import make_principal
+from utils import catalogue_import, search
+from utils.autocomplete import TITLE, catalogue_index
+from utils.cache import get_model_version
+
+
+class CatalogueImportTests(TestCase):
+    """批量导入目录：名称映射、标题去重、分块 bulk_create"""
+
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(name="Frank Herbert")
+        self.category = Category.objects.create(name="Science Fiction")
+        Book.objects.create(title="Dune", author=self.author, category=self.category)
+
+    def run_csv(self, text, **kwargs):
+        return catalogue_import.import_catalogue(io.StringIO(text), 'csv', **kwargs)
+
+    def test_csv_import(self):
+        """复用已有作者和分类，跳过重复标题和不完整的行"""
+        version = get_model_version(Book)
+        run = self.run_csv(
+            "title,author,category,description\n"
+            "Dune,Frank Herbert,Science Fiction,\n"
+            "Children of Dune,Frank Herbert,Science Fiction,Sequel\n"
+            "Emma,Jane Austen,Classics,\n"
+            "Emma,Jane Austen,Classics,\n"
+            ",Nobody,Classics,\n"
+        )
+
+        self.assertEqual((run.rows, run.created, run.duplicates, run.invalid), (5, 2, 2, 1))
+        self.assertEqual((run.authors_created, run.categories_created), (1, 1))
+        self.assertEqual(run.errors, [(6, "Missing title")])
+        sequel = Book.objects.get(title="Children of Dune")
+        self.assertEqual((sequel.author_id, sequel.category_id, sequel.description),
+                         (self.author.pk, self.category.pk, "Sequel"))
+        self.assertEqual(Author.objects.filter(name="Jane Austen").count(), 1)
+        self.assertNotEqual(get_model_version(Book), version)
+
+    def test_queries_per_chunk_not_per_row(self):
+        """查询数随分块数增长，与行数无关"""
+        rows = "".join(f"Book {i},Author {i % 7},Category {i % 3}\n" for i in range(300))
+        with CaptureQueriesContext(connection) as captured:
+            run = self.run_csv("title,author,category\n" + rows, chunk_size=100, batch_size=50)
+        self.assertEqual(run.created, 300)
+        self.assertLess(len(captured.captured_queries), 60)
+        self.assertEqual(Book.objects.count(), 301)
+
+    def test_imported_books_are_searchable(self):
+        """导入的图书进入全文索引和自动补全索引"""
+        catalogue_index.rebuild()
+        self.addCleanup(catalogue_index.rebuild)
+        catalogue_import.import_catalogue(io.StringIO(
+            json.dumps({"title": "Foundation", "author": "Isaac Asimov", "category": "Science Fiction"}) + "\n"
+            "not json\n"
+        ), 'jsonl')
+
+        book = Book.objects.get(title="Foundation")
+        if search.is_available():
+            found = search.search(Book.objects.all(), search.BOOK_TABLE, search.BOOK_RANK, "asimov")
+            self.assertEqual(list(found), [book])
+        self.assertIn((TITLE, book.pk, "Foundation"), catalogue_index.search("found", kinds=(TITLE,)))
+
+    def test_failing_chunk_keeps_earlier_chunks(self):
+        """某个分块写入失败时回滚该分块，之前的分块保留，报告失败的行号"""
+        rows = "".join(f"Book {i},Author,Category\n" for i in range(10))
+        write = catalogue_import.CatalogueImport.write
+        calls = []
+
+        def failing_write(run, chunk):
+            calls.append(len(chunk))
+            if len(calls) == 2:
+                raise OperationalError("database is locked")
+            return write(run, chunk)
+
+        with mock.patch.object(catalogue_import.CatalogueImport, 'write', failing_write):
+            run = self.run_csv("title,author,category\n" + rows, chunk_size=4)
+
+        self.assertEqual(run.created, 4)
+        self.assertEqual(run.failure, {'stage': 'database', 'first_line': 6, 'last_line': 9,
+                                       'error': "database is locked"})
+        self.assertFalse(run.report()['completed'])
+        self.assertEqual(Book.objects.filter(title__startswith="Book ").count(), 4)
+
+    def test_unreadable_input_keeps_rows_before_it(self):
+        """无法解码的内容之前读到的行仍然导入"""
+        head = "".join(f"Book {i},Author,Category\n" for i in range(2000)).encode()
+        stream = catalogue_import.text_stream(io.BytesIO(b"title,author,category\n" + head + b"\xff\xfe,x,y\n"))
+        run = catalogue_import.import_catalogue(stream, 'csv')
+
+        self.assertEqual(run.failure['stage'], 'input')
+        self.assertEqual(run.created, run.rows)
+        self.assertGreater(run.created, 0)
+        self.assertEqual(run.failure['first_line'], run.rows + 2)
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False, encoding='utf-8') as handle:
+            handle.write(json.dumps({"title": "Emma", "author": "Jane Austen", "category": "Classics"}) + "\n")
+        self.addCleanup(os.remove, handle.name)
+
+        out = io.StringIO()
+        call_command('import_catalogue', handle.name, stdout=out)
+
+        self.assertIn('1 books created from 1 rows', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+
+
+class CatalogueImportEndpointTests(TestCase):
+    """管理员上传文件导入目录"""
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('book-import-catalogue')
+
+    def client_for(self, user_type):
+        user = User.objects.create(username=f"user{user_type}", password="x", user_type=user_type)
+        client = APIClient()
+        client.force_authenticate(user=make_principal(user))
+        return client
+
+    def upload(self, client, name, content):
+        return client.post(self.url, {'file': SimpleUploadedFile(name, content)}, format='multipart')
+
+    def test_librarian_upload(self):
+        response = self.upload(self.client_for(UserType.LIBRARIAN), 'books.csv',
+                               "﻿title,author,category\nEmma,Jane Austen,Classics\n".encode('utf-8'))
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['created'], 1)
+        self.assertIn('rows_per_second', response.data)
+        self.assertTrue(Book.objects.filter(title="Emma", author__name="Jane Austen").exists())
+
+    def test_failure_returns_partial_report(self):
+        """导入中途失败返回部分结果而不是 500"""
+        with mock.patch.object(catalogue_import.CatalogueImport, 'write',
+                               side_effect=OperationalError("database is locked")):
+            response = self.upload(self.client_for(UserType.LIBRARIAN), 'books.csv',
+                                   b"title,author,category\nEmma,Jane Austen,Classics\n")
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.data['completed'])
+        self.assertEqual((response.data['created'], response.data['failure']['first_line']), (0, 2))
+
+    def test_large_files_go_to_the_command(self):
+        with mock.patch('api.views.settings.CATALOGUE_IMPORT_MAX_UPLOAD_SIZE', 10, create=True):
+            response = self.upload(self.client_for(UserType.LIBRARIAN), 'books.csv',
+                                   b"title,author,category\nEmma,Jane Austen,Classics\n")
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('import_catalogue', response.data['message'])
+        self.assertFalse(Book.objects.exists())
+
+    def test_readers_cannot_import(self):
+        response = self.upload(self.client_for(UserType.READER), 'books.csv', b"title,author,category\nA,B,C\n")
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Book.objects.exists())
+
+    def test_missing_file(self):
+        response = self.client_for(UserType.LIBRARIAN).post(self.url, {}, format='multipart')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,112 @@
+import gzip
+import json
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.models import Author, Book, Category, CompressionStat, User
+from api.tests import make_principal
+from utils import compression
+from utils.compression import CompressionMiddleware, choose_encoding, get_compression_stats
+
+
+class CompressionMiddlewareTests(TestCase):
+    """测试响应压缩中间件"""
+
+    def setUp(self):
+        cache.clear()
+        compression.reset_compression_stats()
+        category = Category.objects.create(name="Novel")
+        author = Author.objects.create(name="Author")
+        for i in range(40):
+            Book.objects.create(title=f"Book {i:02d}", category=category, author=author, description="d" * 100)
+        self.client = APIClient()
+        self.client.force_authenticate(user=make_principal(User.objects.create(username="reader", password="x")))
+
+    def test_large_json_is_gzipped(self):
+        """大于阈值的 JSON 响应按 gzip 压缩并统计节省字节"""
+        url = reverse('book-list') + '?page_size=40&include=description'
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = json.loads(gzip.decompress(response.content))
+        self.assertEqual(body['count'], 40)
+        stats = get_compression_stats()['book-list']
+        self.assertEqual(stats['responses'], 1)
+        self.assertEqual(stats['saved'], stats['original'] - len(response.content))
+
+    def test_small_or_unaccepted_bodies_untouched(self):
+        """小响应与不支持压缩的客户端保持原样"""
+        small = self.client.get(reverse('book-list') + '?page_size=1', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(small.has_header('Content-Encoding'))
+        plain = self.client.get(reverse('book-list') + '?page_size=40')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+
+    def test_reuses_precompressed_cache_entry(self):
+        """命中响应缓存时直接使用缓存中的压缩字节"""
+        url = reverse('book-list') + '?page_size=40'
+        self.client.get(url)
+        with mock.patch.object(compression, 'compress', side_effect=AssertionError('compressed again')):
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['X-Response-Cache'], 'hit')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_streaming_response(self):
+        """流式响应边生成边压缩"""
+        request = RequestFactory().get('/export/', HTTP_ACCEPT_ENCODING='gzip')
+        response = StreamingHttpResponse((b'row,%d\n' % i for i in range(1000)), content_type='text/csv')
+        response = CompressionMiddleware(lambda r: response)(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)).count(b'\n'), 1000)
+
+    @override_settings(COMPRESSION_MIN_SIZE=10)
+    def test_non_text_content_skipped(self):
+        """非文本类型不压缩"""
+        request = RequestFactory().get('/file/', HTTP_ACCEPT_ENCODING='gzip')
+        response = CompressionMiddleware(lambda r: HttpResponse(b'\x89PNG' * 100, content_type='image/png'))(request)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_negotiation(self):
+        """按 q 值和服务器偏好选择编码"""
+        self.assertEqual(choose_encoding('gzip, deflate', ('br', 'gzip')), 'gzip')
+        self.assertEqual(choose_encoding('gzip, br', ('br', 'gzip')), 'br')
+        self.assertEqual(choose_encoding('br;q=0.5, gzip', ('br', 'gzip')), 'gzip')
+        self.assertIsNone(choose_encoding('gzip;q=0, identity', ('gzip',)))
+        self.assertEqual(choose_encoding('*', ('gzip',)), 'gzip')
+
+    def test_stats_command(self):
+        """compression_stats 命令按路由输出节省字节数"""
+        self.client.get(reverse('book-list') + '?page_size=40', HTTP_ACCEPT_ENCODING='gzip')
+        out = StringIO()
+        call_command('compression_stats', '--reset', stdout=out)
+        self.assertIn('book-list', out.getvalue())
+        self.assertEqual(get_compression_stats(), {})
+
+    @override_settings(COMPRESSION_STATS_FLUSH_INTERVAL=0)
+    def test_counters_written_to_database(self):
+        """计数写入数据库，compression_stats 命令在其他进程中也能读到"""
+        url = reverse('book-list') + '?page_size=40'
+        for _ in range(2):
+            self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        stat = CompressionStat.objects.get(route='book-list')
+        self.assertEqual(stat.responses, 2)
+        self.assertGreater(stat.original_bytes, stat.compressed_bytes)
+
+    @override_settings(COMPRESSION_STATS_FLUSH_INTERVAL=0)
+    def test_middleware_does_not_write(self):
+        """中间件只累加内存计数，写库在请求结束后进行"""
+        request = RequestFactory().get(reverse('book-list'), HTTP_ACCEPT_ENCODING='gzip')
+        body = HttpResponse(b'{"a": "' + b'x' * 4096 + b'"}', content_type='application/json')
+        with self.assertNumQueries(0):
+            response = CompressionMiddleware(lambda request: body)(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(CompressionStat.objects.exists())
+        request_finished.send(sender=self.__class__)
+        self.assertEqual(CompressionStat.objects.get(route=reverse('book-list')).responses, 1)
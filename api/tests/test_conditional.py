@@ -0,0 +1,96 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Author, Book, Category, User
+from api.tests import make_principal
+
+
+class ConditionalGetTests(TestCase):
+    """测试 ETag / Last-Modified 条件请求"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Novel")
+        self.author = Author.objects.create(name="Author")
+        self.books = [
+            Book.objects.create(title=f"Book {i}", category=self.category, author=self.author)
+            for i in range(5)
+        ]
+        self.client = APIClient()
+        reader = User.objects.create(username="reader", password="x")
+        self.client.force_authenticate(user=make_principal(reader))
+        self.url = reverse('book-list')
+
+    def test_list_not_modified(self):
+        """ETag 未变化时返回 304，且不再查询和序列化"""
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+        self.assertEqual(not_modified['ETag'], etag)
+
+    def test_list_etag_changes_on_write(self):
+        """更新、删除图书或修改作者后 ETag 变化"""
+        etag = self.client.get(self.url)['ETag']
+
+        self.books[0].title = "Book 0 revised"
+        self.books[0].save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        self.books[1].delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        self.author.name = "Renamed"
+        self.author.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_depends_on_query(self):
+        """不同筛选条件或分页的 ETag 不同"""
+        first = self.client.get(self.url + '?page=1&page_size=2')['ETag']
+        second = self.client.get(self.url + '?page=2&page_size=2')['ETag']
+        self.assertNotEqual(first, second)
+        response = self.client.get(self.url + '?page_size=2&page=1', HTTP_IF_NONE_MATCH=first)
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_if_modified_since(self):
+        """详情接口支持 If-Modified-Since"""
+        url = reverse('book-detail', args=[self.books[0].pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        last_modified = response['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        Book.objects.filter(pk=self.books[0].pk).update(updated_at=timezone.now() + timezone.timedelta(seconds=5))
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+    def test_category_and_author_validators_from_database(self):
+        """分类、作者列表的 ETag 由数据库中的 updated_at 和行数生成，与缓存中的版本号无关"""
+        for url, obj in ((reverse('category-list'), self.category), (reverse('author-list'), self.author)):
+            response = self.client.get(url)
+            etag = response['ETag']
+            self.assertIn('Last-Modified', response)
+            cache.clear()
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            obj.name = "Renamed"
+            obj.save()
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_book_detail_sees_author_rename(self):
+        url = reverse('book-detail', args=[self.books[0].pk])
+        etag = self.client.get(url)['ETag']
+        self.author.name = "Renamed"
+        self.author.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -0,0 +1,140 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Author, Book, BorrowRecord, Category, Rating, User, UserType
+from api.tests import make_principal
+from utils.cache import get_model_version
+from utils.counters import reconcile
+
+
+class BookCounterTests(TestCase):
+    """图书上的借阅、评分计数随借阅审批和评分原子更新"""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name="Novel")
+        author = Author.objects.create(name="Author")
+        self.book = Book.objects.create(title="Dune", category=category, author=author)
+        self.other = Book.objects.create(title="Emma", category=category, author=author)
+        Book.objects.update(updated_at=timezone.now() - timedelta(days=1))
+        self.reader = User.objects.create(username="reader", password="x")
+        self.librarian = User.objects.create(username="librarian", password="x", user_type=UserType.LIBRARIAN)
+        self.reader_client = APIClient()
+        self.reader_client.force_authenticate(user=make_principal(self.reader))
+        self.librarian_client = APIClient()
+        self.librarian_client.force_authenticate(user=make_principal(self.librarian))
+
+    def approve(self, record, approval_status='borrowed'):
+        return self.librarian_client.post(reverse('borrow-record-approve-borrow', kwargs={'pk': record.pk}),
+                                          {'status': approval_status}, format='json')
+
+    def test_approve_borrow_counts(self):
+        """批准借阅：borrow_count 与 active_borrow_count 加一，更新 updated_at 和版本号"""
+        record = BorrowRecord.objects.create(user=self.reader, book=self.book, status='pending')
+        version = get_model_version(Book)
+
+        response = self.approve(record)
+
+        self.assertEqual(response.status_code, 200)
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.borrow_count, self.book.active_borrow_count), (1, 1))
+        self.assertFalse(self.book.is_available)
+        self.assertGreater(self.book.updated_at, timezone.now() - timedelta(minutes=1))
+        self.assertNotEqual(get_model_version(Book), version)
+
+    def test_reject_does_not_count(self):
+        record = BorrowRecord.objects.create(user=self.reader, book=self.book, status='pending')
+        self.approve(record, 'rejected')
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.borrow_count, self.book.active_borrow_count), (0, 0))
+
+    def test_return_request_ends_active_borrow(self):
+        """申请归还后记录回到 pending 状态，两个借阅计数都减一"""
+        record = BorrowRecord.objects.create(user=self.reader, book=self.book, status='pending')
+        self.approve(record)
+
+        response = self.reader_client.post(reverse('borrow-record-return-book', kwargs={'pk': record.pk}))
+
+        self.assertEqual(response.status_code, 200)
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.borrow_count, self.book.active_borrow_count), (0, 0))
+
+    def test_approve_return_reapprove_has_no_drift(self):
+        """批准、申请归还、再次批准、确认归还，每一步的计数都与 reconcile 的结果一致"""
+        record = BorrowRecord.objects.create(user=self.reader, book=self.book, status='pending')
+        steps = (
+            lambda: self.approve(record),
+            lambda: self.reader_client.post(reverse('borrow-record-return-book', kwargs={'pk': record.pk})),
+            lambda: self.approve(record),
+        )
+        for step in steps:
+            self.assertEqual(step().status_code, 200)
+            self.assertEqual(reconcile(dry_run=True), [])
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.borrow_count, self.book.active_borrow_count), (1, 1))
+
+        BorrowRecord.objects.filter(pk=record.pk).update(status='approval')
+        Book.objects.filter(pk=self.book.pk).update(borrow_count=0, active_borrow_count=0)
+        self.assertEqual(self.approve(BorrowRecord.objects.get(pk=record.pk)).status_code, 200)
+        self.assertEqual(reconcile(dry_run=True), [])
+
+    def test_rating_counts(self):
+        """评分：rating_count、rating_sum 与 avg_rating 在一次 UPDATE 中更新"""
+        other_reader = User.objects.create(username="reader2", password="x")
+        for user, score in ((self.reader, 5), (other_reader, 2)):
+            client = APIClient()
+            client.force_authenticate(user=make_principal(user))
+            response = client.post(reverse('rating-list'), {'book': self.book.pk, 'score': score}, format='json')
+            self.assertEqual(response.status_code, 201, response.data)
+
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.rating_count, self.book.rating_sum), (2, 7))
+        self.assertAlmostEqual(self.book.avg_rating, 3.5)
+
+    def test_counters_read_only(self):
+        """计数字段不能通过接口写入"""
+        response = self.librarian_client.get(reverse('book-detail', kwargs={'pk': self.book.pk}))
+        self.assertEqual(response.data['borrow_count'], 0)
+        self.assertIn('avg_rating', response.data)
+
+    def test_reconcile_repairs_drift(self):
+        """reconcile 找出与明细表不一致的计数并修复"""
+        BorrowRecord.objects.create(user=self.reader, book=self.book, status='borrowed')
+        BorrowRecord.objects.create(user=self.reader, book=self.book, status='returned')
+        Rating.objects.create(user=self.reader, book=self.book, score=4)
+        Book.objects.filter(pk=self.other.pk).update(borrow_count=3)
+
+        drifted = reconcile(dry_run=True)
+        self.assertEqual({item['id'] for item in drifted}, {self.book.pk, self.other.pk})
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.borrow_count, 0)
+
+        out = StringIO()
+        call_command('reconcile_book_counters', stdout=out)
+        self.assertIn('2 books repaired', out.getvalue())
+        self.book.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.book.borrow_count, self.book.active_borrow_count), (2, 1))
+        self.assertEqual((self.book.rating_count, self.book.rating_sum, self.book.avg_rating), (1, 4, 4.0))
+        self.assertEqual(self.other.borrow_count, 0)
+        self.assertEqual(reconcile(dry_run=True), [])
+
+    def test_ordering_by_popularity_and_rating(self):
+        """目录按借阅次数或评分排序，游标分页沿用同一排序"""
+        Book.objects.filter(pk=self.other.pk).update(borrow_count=5, avg_rating=2, rating_count=1)
+        Book.objects.filter(pk=self.book.pk).update(borrow_count=1, avg_rating=4.5, rating_count=2)
+
+        response = self.reader_client.get(reverse('book-list'), {'ordering': 'popular'})
+        self.assertEqual([row['title'] for row in response.data['results']], ["Emma", "Dune"])
+        response = self.reader_client.get(reverse('book-list'), {'ordering': 'rating', 'pagination': 'cursor',
+                                                                 'page_size': 1})
+        self.assertEqual([row['title'] for row in response.data['results']], ["Dune"])
+        response = self.reader_client.get(response.data['next'])
+        self.assertEqual([row['title'] for row in response.data['results']], ["Emma"])
@@ -0,0 +1,55 @@
+from unittest import mock
+
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase
+
+from utils.db import call_with_retry, retry_on_busy
+
+
+class SQLiteConnectionTests(TestCase):
+    """SQLite 连接初始化：PRAGMA 与忙等重试"""
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite connection setup')
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied(self):
+        """新连接设置了 synchronous、cache_size 和 temp_store"""
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('cache_size'), -64000)
+        self.assertEqual(self.pragma('temp_store'), 2)
+        self.assertIn(retry_on_busy, connection.execute_wrappers)
+
+    def test_retries_busy_errors(self):
+        """database is locked 时退避重试，成功后返回结果"""
+        func = mock.Mock(side_effect=[OperationalError('database is locked'), 'ok'])
+        with mock.patch('utils.db.time.sleep') as sleep:
+            self.assertEqual(call_with_retry(func, delays=[0.01, 0.02]), 'ok')
+        self.assertEqual(func.call_count, 2)
+        sleep.assert_called_once_with(0.01)
+
+    def test_gives_up_after_retries(self):
+        """重试次数用完后抛出原错误"""
+        func = mock.Mock(side_effect=OperationalError('database is locked'))
+        with mock.patch('utils.db.time.sleep'), self.assertRaises(OperationalError):
+            call_with_retry(func, delays=[0.01, 0.02])
+        self.assertEqual(func.call_count, 3)
+
+    def test_other_errors_not_retried(self):
+        """其他数据库错误不重试"""
+        func = mock.Mock(side_effect=OperationalError('no such table: missing'))
+        with self.assertRaises(OperationalError):
+            call_with_retry(func, delays=[0.01])
+        self.assertEqual(func.call_count, 1)
+
+    def test_no_retry_inside_transaction(self):
+        """事务内的语句不重试，锁冲突交给事务开始时的 BEGIN 处理"""
+        execute = mock.Mock(side_effect=OperationalError('database is locked'))
+        with transaction.atomic(), mock.patch('utils.db.time.sleep'), self.assertRaises(OperationalError):
+            retry_on_busy(execute, 'SELECT 1', None, False, {'connection': connection})
+        self.assertEqual(execute.call_count, 1)
@@ -0,0 +1,156 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Announcement, Author, Book, BorrowRecord, Category, DeletionLog, User, UserType
+from api.tests import make_principal
+
+
+class DeltaSyncTests(TestCase):
+    """测试 changes?since= 增量同步接口"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Novel")
+        self.author = Author.objects.create(name="Author")
+        self.books = [
+            Book.objects.create(title=f"Book {i}", category=self.category, author=self.author)
+            for i in range(4)
+        ]
+        self.past = timezone.now() - timedelta(days=1)
+        Book.objects.update(updated_at=self.past)
+        Author.objects.update(updated_at=self.past)
+        Category.objects.update(updated_at=self.past)
+        self.since = self.past + timedelta(minutes=1)
+        self.reader = User.objects.create(username="reader", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(user=make_principal(self.reader))
+
+    def changes(self, route, **params):
+        response = self.client.get(reverse(route), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_upserts_and_tombstones(self):
+        """返回 since 之后新增、修改的图书和删除的图书 id"""
+        self.books[0].title = "Book 0 revised"
+        self.books[0].save()
+        deleted_id = self.books[1].pk
+        self.books[1].delete()
+        created = Book.objects.create(title="New", category=self.category, author=self.author)
+
+        data = self.changes('book-changes', since=self.since.isoformat())
+        self.assertFalse(data['reset'])
+        self.assertEqual([row['id'] for row in data['upserts']], [self.books[0].pk, created.pk])
+        self.assertIn('description', data['upserts'][0])
+        self.assertEqual(data['deleted'], [deleted_id])
+
+        later = self.changes('book-changes', since=data['watermark'].isoformat())
+        self.assertEqual(later['upserts'], [])
+        self.assertEqual(later['deleted'], [])
+
+    def test_snapshot_without_since(self):
+        """没有 since 时返回全量数据"""
+        data = self.changes('book-changes')
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['upserts']), 4)
+        self.assertEqual(data['deleted'], [])
+
+    def test_invalid_since(self):
+        """非法时间戳返回 400"""
+        response = self.client.get(reverse('book-changes'), {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_limit_resumes_from_cursor(self):
+        """超过 limit 时分批返回，下一批从 cursor 继续，删除记录随最后一批返回"""
+        for book in self.books:
+            book.save()
+        book_ids = {book.pk for book in self.books}
+        first = self.changes('book-changes', since=self.since.isoformat(), limit=3)
+        self.assertTrue(first['has_more'])
+        self.assertIsNone(first['watermark'])
+        self.assertEqual(len(first['upserts']), 3)
+        deleted_id = self.books[0].pk
+        self.books[0].delete()
+        second = self.changes('book-changes', cursor=first['cursor'], limit=3)
+        self.assertFalse(second['has_more'])
+        self.assertIsNone(second['cursor'])
+        self.assertEqual(second['deleted'], [deleted_id])
+        ids = {row['id'] for row in first['upserts'] + second['upserts']}
+        self.assertEqual(ids, book_ids)
+
+    def test_rows_sharing_a_timestamp_span_batches(self):
+        """超过 limit 的行共用同一 updated_at 时，按 cursor 翻页不重复也不卡住"""
+        extra = [Book(title=f"Extra {i}", category=self.category, author=self.author) for i in range(6)]
+        Book.objects.bulk_create(extra)
+        Book.objects.update(updated_at=timezone.now())
+        seen, params = [], {'since': self.since.isoformat(), 'limit': 3}
+        for _ in range(5):
+            data = self.changes('book-changes', **params)
+            seen.extend(row['id'] for row in data['upserts'])
+            if not data['has_more']:
+                break
+            params = {'cursor': data['cursor'], 'limit': 3}
+        self.assertFalse(data['has_more'])
+        self.assertEqual(sorted(seen), sorted(Book.objects.values_list('id', flat=True)))
+
+    def test_author_rename_reaches_books(self):
+        """作者或分类改名后，相关图书出现在增量结果中"""
+        self.author.name = "Renamed"
+        self.author.save()
+        data = self.changes('book-changes', since=self.since.isoformat())
+        self.assertEqual(len(data['upserts']), 4)
+        self.assertEqual({row['author_name'] for row in data['upserts']}, {"Renamed"})
+
+        self.category.name = "Poetry"
+        self.category.save()
+        data = self.changes('book-changes', since=data['watermark'].isoformat())
+        self.assertEqual({row['category_name'] for row in data['upserts']}, {"Poetry"})
+
+    def test_invalid_cursor(self):
+        """非法 cursor 返回 400"""
+        response = self.client.get(reverse('book-changes'), {'cursor': 'bogus'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_borrow_record_tombstones_scoped_to_user(self):
+        """读者只能看到自己借阅记录的删除"""
+        other = User.objects.create(username="other", password="x")
+        own = BorrowRecord.objects.create(user=self.reader, book=self.books[2])
+        foreign = BorrowRecord.objects.create(user=other, book=self.books[3])
+        own_id = own.pk
+        own.delete()
+        foreign.delete()
+        self.assertEqual(DeletionLog.objects.filter(model='api.borrowrecord').count(), 2)
+
+        data = self.changes('borrow-record-changes', since=self.since.isoformat())
+        self.assertEqual(data['deleted'], [own_id])
+
+        librarian = User.objects.create(username="staff", password="x", user_type=UserType.LIBRARIAN)
+        self.client.force_authenticate(user=make_principal(librarian))
+        data = self.changes('borrow-record-changes', since=self.since.isoformat())
+        self.assertEqual(len(data['deleted']), 2)
+
+    def test_unpublished_announcement_is_tombstone_for_readers(self):
+        """公告下线后对读者表现为删除"""
+        announcement = Announcement.objects.create(title="Notice", content="c")
+        announcement.is_visible = False
+        announcement.save()
+        data = self.changes('announcement-changes', since=self.since.isoformat())
+        self.assertEqual(data['upserts'], [])
+        self.assertEqual(data['deleted'], [announcement.pk])
+
+    def test_purge_keeps_recent_tombstones(self):
+        """删除不再清理旧墓碑，purge_tombstones 命令只删除过期记录"""
+        expired = DeletionLog.objects.create(model='api.book', object_id=1000,
+                                             deleted_at=timezone.now() - timedelta(days=60))
+        self.books[0].delete()
+        self.assertTrue(DeletionLog.objects.filter(pk=expired.pk).exists())
+        call_command('purge_tombstones', stdout=StringIO())
+        self.assertFalse(DeletionLog.objects.filter(pk=expired.pk).exists())
+        self.assertEqual(DeletionLog.objects.count(), 1)
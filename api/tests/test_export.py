@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.models import Author, Book, BorrowRecord, Category, Rating, User, UserType
+from api.tests import make_principal
+
+
+class ExportTests(TestCase):
+    """借阅记录和评分以 CSV / JSON Lines 流式导出"""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name="Novel")
+        author = Author.objects.create(name="Author")
+        self.books = [Book.objects.create(title=f"Book {i}", category=category, author=author) for i in range(5)]
+        self.reader = User.objects.create(username="reader", password="x")
+        for book in self.books:
+            BorrowRecord.objects.create(user=self.reader, book=book, status='returned')
+            Rating.objects.create(user=self.reader, book=book, score=4, comment="ok, \"fine\"")
+        BorrowRecord.objects.create(user=self.reader, book=self.books[0], status='borrowed')
+        librarian = User.objects.create(username="librarian", password="x", user_type=UserType.LIBRARIAN)
+        self.client = APIClient()
+        self.client.force_authenticate(user=make_principal(librarian))
+
+    def export(self, route, **params):
+        response = self.client.get(reverse(route), params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_borrow_records_csv(self):
+        """CSV 带表头，按主键顺序，沿用列表的筛选条件"""
+        response, body = self.export('borrow-record-export', status='returned')
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="borrow-records-', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['username'], 'reader')
+        self.assertEqual([row['book_title'] for row in rows], [f"Book {i}" for i in range(5)])
+        self.assertEqual({row['status'] for row in rows}, {'returned'})
+        self.assertEqual(rows[0]['return_date'], '')
+
+    def test_ratings_jsonl(self):
+        response, body = self.export('rating-export', output='jsonl')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['comment'], 'ok, "fine"')
+        self.assertEqual(rows[0]['book_title'], "Book 0")
+        self.assertTrue(rows[0]['created_at'].endswith('Z'))
+
+    def test_one_query_for_all_rows(self):
+        """单次有序扫描，无 COUNT 和 OFFSET，关联表一次 JOIN 读取"""
+        response = self.client.get(reverse('borrow-record-export'))
+        with CaptureQueriesContext(connection) as captured:
+            lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 7)
+        self.assertEqual(len(captured.captured_queries), 1)
+        sql = captured.captured_queries[0]['sql']
+        self.assertIn('JOIN', sql)
+        self.assertNotIn('COUNT', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_librarians_only(self):
+        client = APIClient()
+        client.force_authenticate(user=make_principal(self.reader))
+        self.assertEqual(client.get(reverse('borrow-record-export')).status_code, 403)
+        self.assertEqual(client.get(reverse('rating-export')).status_code, 403)
+
+    def test_unknown_output(self):
+        self.assertEqual(self.client.get(reverse('rating-export'), {'output': 'xml'}).status_code, 400)
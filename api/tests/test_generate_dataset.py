@@ -0,0 +1,91 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase
+
+from api.models import Announcement, Author, Book, BorrowRecord, Category, Rating, User, UserType
+from utils import search
+from utils.counters import reconcile
+
+SMALL = dict(readers=40, librarians=2, authors=10, categories=5, books=60, borrows=800, ratings=300,
+             announcements=5, batch_size=97, interactive=False)
+
+
+class GenerateDatasetTests(TestCase):
+    """generate_dataset 按种子批量生成一致的压测数据"""
+
+    def setUp(self):
+        cache.clear()
+
+    def generate(self, **options):
+        out = StringIO()
+        call_command('generate_dataset', stdout=out, **{**SMALL, **options})
+        return out.getvalue()
+
+    def snapshot(self):
+        return (list(Book.objects.order_by('id').values_list('title', 'author__name', 'borrow_count')),
+                list(BorrowRecord.objects.order_by('id').values_list('user__username', 'book__title', 'status',
+                                                                     'borrow_date')),
+                list(Rating.objects.order_by('id').values_list('user__username', 'book__title', 'score')))
+
+    def test_volumes_and_consistency(self):
+        """各表行数符合参数，计数字段与明细一致，一本书最多一条借出记录"""
+        output = self.generate()
+
+        self.assertIn('rows/s', output)
+        self.assertEqual(User.objects.filter(user_type=UserType.READER).count(), 40)
+        self.assertEqual(User.objects.filter(user_type=UserType.LIBRARIAN).count(), 2)
+        self.assertEqual((Author.objects.count(), Category.objects.count(), Book.objects.count()), (10, 5, 60))
+        self.assertEqual((BorrowRecord.objects.count(), Rating.objects.count(), Announcement.objects.count()),
+                         (800, 300, 5))
+        self.assertEqual(reconcile(dry_run=True), [])
+        self.assertFalse(BorrowRecord.objects.filter(status='borrowed').values('book')
+                         .annotate(n=Count('id')).filter(n__gt=1).exists())
+        self.assertEqual(Book.objects.filter(is_available=False).count(),
+                         BorrowRecord.objects.filter(status='borrowed').count())
+        self.assertEqual(Book.objects.values('title').distinct().count(), 60)
+
+    def test_history_and_status_mix(self):
+        """借阅历史跨多年，早期记录都已结束"""
+        self.generate(years=3)
+        statuses = set(BorrowRecord.objects.values_list('status', flat=True))
+        self.assertTrue({'returned', 'rejected', 'borrowed'} <= statuses)
+        oldest = BorrowRecord.objects.order_by('borrow_date').first()
+        newest = BorrowRecord.objects.order_by('-borrow_date').first()
+        self.assertGreater((newest.borrow_date - oldest.borrow_date).days, 365)
+        self.assertIn(oldest.status, ('returned', 'rejected'))
+
+    def test_same_seed_same_data(self):
+        """相同种子在清空后重新生成完全相同的数据"""
+        self.generate(seed=7)
+        first = self.snapshot()
+        self.generate(seed=7, flush=True)
+        self.assertEqual(self.snapshot(), first)
+        self.generate(seed=8, flush=True)
+        self.assertNotEqual(self.snapshot()[1], first[1])
+
+    def test_generated_books_are_searchable(self):
+        self.generate()
+        if not search.is_available():
+            self.skipTest('SQLite FTS5')
+        book = Book.objects.order_by('id').first()
+        found = search.search(Book.objects.all(), search.BOOK_TABLE, search.BOOK_RANK, book.title)
+        self.assertIn(book, list(found))
+
+    def test_flush_asks_for_confirmation(self):
+        """--flush 删除数据前需要确认，回答 no 时什么都不做"""
+        self.generate()
+        with mock.patch('builtins.input', return_value='no') as prompt:
+            output = self.generate(flush=True, interactive=True)
+        prompt.assert_called_once()
+        self.assertIn('Cancelled', output)
+        self.assertEqual(Book.objects.count(), 60)
+
+    def test_every_pair_rated(self):
+        """评分数等于读者数乘图书数时仍能生成（直接抽取不重复的组合）"""
+        self.generate(readers=6, books=5, borrows=0, ratings=30)
+        self.assertEqual(Rating.objects.values('user', 'book').distinct().count(), 30)
+        self.assertEqual(reconcile(dry_run=True), [])
@@ -0,0 +1,59 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from api.models import Author, Book, BorrowRecord, Category, User, UserType
+
+
+class InspectQueriesCommandTests(TestCase):
+    """inspect_queries 命令逐个接口输出执行计划"""
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN output is SQLite specific')
+        category = Category.objects.create(name="Novel")
+        author = Author.objects.create(name="Tolkien")
+        self.book = Book.objects.create(title="The Hobbit", category=category, author=author)
+        self.admin = User.objects.create(username="admin", password="x", user_type=UserType.SYSTEM_ADMIN)
+        self.reader = User.objects.create(username="reader", password="x")
+        BorrowRecord.objects.create(user=self.reader, book=self.book, status='borrowed')
+
+    def inspect(self, *args):
+        out = StringIO()
+        call_command('inspect_queries', *args, stdout=out, no_color=True)
+        return out.getvalue()
+
+    def test_covers_list_retrieve_and_actions(self):
+        """列表、详情和自定义动作都会被执行"""
+        output = self.inspect('--only', 'book-')
+        self.assertIn('book-list  GET /api/books/?title=a', output)
+        self.assertIn(f'book-detail  GET /api/books/{self.book.id}/', output)
+        self.assertIn('book-changes', output)
+        self.assertNotIn('borrow-record-list', output)
+        self.assertIn('routes inspected', output)
+
+    def test_reports_leading_wildcard_scan(self):
+        """title 的 LIKE '%a%' 过滤被报告为全表扫描"""
+        output = self.inspect('--only', 'book-list')
+        self.assertIn('FULL SCAN book', output)
+        self.assertIn('leading-wildcard LIKE', output)
+
+    def test_indexed_route_is_clean(self):
+        """有索引支撑的接口没有问题，并给出行数估计"""
+        output = self.inspect('--only', 'borrow-record-check-book-status', '--analyze')
+        self.assertIn('borrow_user_book_date_idx', output)
+        self.assertIn('rows read', output)
+        self.assertIn('1 routes inspected, 0 issues', output)
+
+    def test_fail_on_issues(self):
+        """--fail-on-issues 在发现问题时以错误退出"""
+        with self.assertRaises(CommandError):
+            self.inspect('--only', 'book-list', '--fail-on-issues')
+
+    def test_runs_as_reader(self):
+        """以读者身份运行时管理员接口返回 403 而不报错"""
+        output = self.inspect('--as', 'reader', '--only', 'pending-approvals')
+        self.assertIn('[403] 0 queries', output)
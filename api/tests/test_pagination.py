@@ -0,0 +1,109 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Author, Book, BorrowRecord, Category, User
+from api.tests import make_principal
+
+
+class KeysetPaginationTests(TestCase):
+    """测试游标分页"""
+
+    def setUp(self):
+        self.client = APIClient()
+        category = Category.objects.create(name="Novel")
+        author = Author.objects.create(name="Author")
+        # 重复的标题用于验证 (title, id) 排序的稳定性
+        self.books = [
+            Book.objects.create(title=f"Book {i // 2:02d}", category=category, author=author)
+            for i in range(25)
+        ]
+        self.reader = User.objects.create(username="reader", password="x")
+        self.client.force_authenticate(user=make_principal(self.reader))
+
+    def walk(self, url):
+        ids = []
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids, pages
+
+    def test_forward_walk_matches_ordering(self):
+        """向前翻页覆盖所有图书且顺序与 (title, id) 一致"""
+        ids, pages = self.walk(reverse('book-list') + '?pagination=cursor&page_size=4')
+        expected = list(Book.objects.order_by('title', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(pages), 7)
+        self.assertNotIn('count', pages[0])
+        self.assertIsNone(pages[0]['previous'])
+
+    def test_previous_link(self):
+        """previous 链接返回上一页"""
+        first = self.client.get(reverse('book-list') + '?pagination=cursor&page_size=5').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual([row['id'] for row in back['results']], [row['id'] for row in first['results']])
+
+    def test_optional_count(self):
+        """仅在请求时返回总数"""
+        response = self.client.get(reverse('book-list') + '?pagination=cursor&count=true')
+        self.assertEqual(response.data['count'], 25)
+
+    def test_invalid_cursor(self):
+        """非法游标返回 404"""
+        response = self.client.get(reverse('book-list') + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_borrow_records_descending(self):
+        """借阅记录按 (-borrow_date, -id) 翻页"""
+        now = timezone.now()
+        for i, book in enumerate(self.books[:9]):
+            record = BorrowRecord.objects.create(user=self.reader, book=book, status='returned')
+            BorrowRecord.objects.filter(pk=record.pk).update(borrow_date=now - timezone.timedelta(days=i // 3))
+        ids, _ = self.walk(reverse('borrow-record-list') + '?pagination=cursor&page_size=2')
+        expected = list(BorrowRecord.objects.order_by('-borrow_date', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+
+class CountCacheTests(TestCase):
+    """测试分页总数缓存与估算"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.category = Category.objects.create(name="Novel")
+        self.author = Author.objects.create(name="Author")
+        for i in range(5):
+            Book.objects.create(title=f"Book {i}", category=self.category, author=self.author)
+        reader = User.objects.create(username="reader", password="x")
+        self.client.force_authenticate(user=make_principal(reader))
+        self.url = reverse('category-list')
+
+    def test_count_cached_until_write(self):
+        """总数在写入前复用缓存，写入后失效"""
+        self.assertEqual(self.client.get(self.url).data['count'], 1)
+        # 不同的查询串绕过响应缓存，只剩分页查询
+        with self.assertNumQueries(1):
+            self.client.get(self.url + '?page_size=5')
+        Category.objects.create(name="Poetry")
+        self.assertEqual(self.client.get(self.url).data['count'], 2)
+
+    def test_filtered_counts_keyed_by_filter(self):
+        """不同过滤条件使用不同缓存"""
+        url = reverse('book-list')
+        self.assertEqual(self.client.get(url + '?title=Book 1').data['count'], 1)
+        self.assertEqual(self.client.get(url).data['count'], 5)
+
+    def test_estimate_for_unfiltered_table(self):
+        """count=estimate 对未过滤的表返回上界"""
+        Book.objects.filter(title="Book 4").delete()
+        response = self.client.get(reverse('book-list') + '?count=estimate')
+        self.assertTrue(response.data['count_is_estimate'])
+        self.assertGreaterEqual(response.data['count'], 4)
+        filtered = self.client.get(reverse('book-list') + '?count=estimate&title=Book 1')
+        self.assertEqual(filtered.data['count'], 1)
+        self.assertNotIn('count_is_estimate', filtered.data)
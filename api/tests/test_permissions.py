@@ -0,0 +1,67 @@
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+
+from api.models import User, Role
+from utils.auth import User as Principal
+from utils.permissions import RoleResolver, get_role_resolver, IsLibrarianOrSystemAdmin, IsSystemAdmin, IsReader
+from utils.view import PermissionCheckerMixin
+
+
+class RoleResolverTests(TestCase):
+    """测试请求级别的角色解析缓存"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def make_request(self, user):
+        request = Request(self.factory.get('/api/books/'))
+        request.user = user
+        return request
+
+    def test_list_based_principal(self):
+        """JWT 主体的角色是列表，不应走异常分支"""
+        principal = Principal(id=1, username='reader', exp=None, user_type=0, roles=['librarian'])
+        resolver = RoleResolver(principal)
+        self.assertTrue(resolver.is_librarian)
+        self.assertFalse(resolver.is_admin)
+        self.assertTrue(resolver.has_role(0))
+        self.assertTrue(resolver.has_role(1))
+
+    def test_superuser_is_admin(self):
+        """超级用户拥有系统管理员角色"""
+        principal = Principal(id=1, username='root', exp=None, is_super=True, user_type=0)
+        resolver = RoleResolver(principal)
+        self.assertTrue(resolver.is_admin)
+        self.assertTrue(resolver.satisfies('librarian'))
+
+    def test_anonymous(self):
+        """未认证请求没有任何角色"""
+        resolver = RoleResolver(None)
+        self.assertFalse(resolver.is_authenticated)
+        self.assertFalse(resolver.satisfies('reader'))
+
+    def test_resolved_once_per_request(self):
+        """同一请求内多次权限检查只解析一次角色"""
+        role = Role.objects.create(name='System Administrator')
+        user = User.objects.create(username='admin', password='x', user_type=0)
+        user.roles.add(role)
+        request = self.make_request(user)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(IsLibrarianOrSystemAdmin().has_permission(request, None))
+            self.assertTrue(IsSystemAdmin().has_permission(request, None))
+            self.assertTrue(IsReader().has_permission(request, None))
+            mixin = PermissionCheckerMixin()
+            mixin.request = request
+            self.assertTrue(mixin.is_admin())
+            self.assertTrue(mixin.is_librarian())
+
+        self.assertIs(get_role_resolver(request), get_role_resolver(request))
+
+    def test_resolver_follows_user_change(self):
+        """切换请求用户后重新解析"""
+        request = self.make_request(Principal(id=1, username='a', exp=None, user_type=0))
+        self.assertFalse(get_role_resolver(request).is_librarian)
+        request.user = Principal(id=2, username='b', exp=None, user_type=1)
+        self.assertTrue(get_role_resolver(request).is_librarian)
@@ -0,0 +1,137 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Author, Book, BorrowRecord, Category, User
+from api.tests import make_principal
+
+
+class ListQueryCountTests(TestCase):
+    """列表接口的查询次数不应随每页行数增长"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.category = Category.objects.create(name="Science Fiction")
+        self.author = Author.objects.create(name="Isaac Asimov")
+        self.librarian = User.objects.create(username="librarian", password="x", user_type=1)
+        self.readers = [User.objects.create(username=f"reader{i}", password="x") for i in range(5)]
+        self.client.force_authenticate(user=make_principal(self.librarian))
+
+    def create_records(self, count, status='borrowed'):
+        for i in range(count):
+            book = Book.objects.create(title=f"Book {BorrowRecord.objects.count()}",
+                                       category=self.category, author=self.author)
+            BorrowRecord.objects.create(user=self.readers[i % len(self.readers)], book=book, status=status,
+                                        return_date=timezone.now() + timezone.timedelta(days=3))
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_borrow_record_list_constant_queries(self):
+        """借阅记录列表：每页查询数恒定"""
+        url = reverse('borrow-record-list') + '?page_size=100'
+        self.create_records(3)
+        small, _ = self.count_queries(url)
+        self.create_records(30)
+        large, response = self.count_queries(url)
+        self.assertEqual(small, large)
+
+        # the COUNT is served from the count cache, only the joined page SELECT remains
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        row = response.data['results'][0]
+        self.assertEqual(row['days_remaining'], 3)
+        self.assertFalse(row['is_overdue'])
+        self.assertIsNone(row['borrower_email'])
+
+    def test_pending_approvals_constant_queries(self):
+        """待审批列表：每页查询数恒定"""
+        url = reverse('borrow-record-pending-approvals') + '?page_size=100'
+        self.create_records(2, status='pending')
+        small, _ = self.count_queries(url)
+        self.create_records(20, status='pending')
+        large, response = self.count_queries(url)
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data['results']), 22)
+
+    def test_book_list_constant_queries(self):
+        """图书列表：作者和分类随图书一起查询"""
+        url = reverse('book-list') + '?page_size=100'
+        for i in range(3):
+            Book.objects.create(title=f"Title {i}", category=self.category, author=self.author,
+                                description="long text")
+        small, _ = self.count_queries(url)
+        for i in range(3, 40):
+            Book.objects.create(title=f"Title {i}", category=Category.objects.create(name=f"C{i}"),
+                                author=Author.objects.create(name=f"A{i}"), description="long text")
+        large, response = self.count_queries(url)
+        self.assertEqual(small, large)
+        row = response.data['results'][0]
+        self.assertNotIn('description', row)
+        self.assertEqual(row['author_name'], "Isaac Asimov")
+
+    def test_book_list_include_description(self):
+        """图书列表：?include=description 返回完整字段"""
+        Book.objects.create(title="Foundation", category=self.category, author=self.author,
+                            description="A science fiction novel")
+        response = self.client.get(reverse('book-list') + '?include=description')
+        self.assertEqual(response.data['results'][0]['description'], "A science fiction novel")
+
+
+class SparseFieldsetTests(TestCase):
+    """测试 ?fields= / ?exclude= 稀疏字段"""
+
+    def setUp(self):
+        self.client = APIClient()
+        category = Category.objects.create(name="Science Fiction")
+        author = Author.objects.create(name="Isaac Asimov")
+        self.book = Book.objects.create(title="Foundation", category=category, author=author,
+                                        description="A science fiction novel")
+        librarian = User.objects.create(username="librarian", password="x", user_type=1)
+        reader = User.objects.create(username="reader", password="x")
+        BorrowRecord.objects.create(user=reader, book=self.book, status='borrowed',
+                                    return_date=timezone.now() + timezone.timedelta(days=3))
+        self.client.force_authenticate(user=make_principal(librarian))
+
+    def get_with_sql(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, ctx.captured_queries[-1]['sql']
+
+    def test_fields_trim_payload_and_columns(self):
+        """只返回并只查询请求的字段"""
+        response, sql = self.get_with_sql(reverse('borrow-record-list') + '?fields=id,book_title,days_remaining')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'book_title', 'days_remaining'})
+        self.assertEqual(response.data['results'][0]['days_remaining'], 3)
+        self.assertIn('"book"."title"', sql)
+        self.assertNotIn('"user"."username"', sql)
+
+    def test_exclude(self):
+        """排除字段"""
+        response = self.client.get(reverse('borrow-record-list') + '?exclude=is_overdue,status_color')
+        row = response.data['results'][0]
+        self.assertNotIn('is_overdue', row)
+        self.assertIn('status_text', row)
+
+    def test_book_fields_with_description(self):
+        """图书列表可通过 fields 请求描述字段"""
+        response, sql = self.get_with_sql(reverse('book-list') + '?fields=id,title,description,author_name')
+        self.assertEqual(response.data['results'][0],
+                         {'id': self.book.id, 'title': "Foundation",
+                          'description': "A science fiction novel", 'author_name': "Isaac Asimov"})
+        self.assertNotIn('"category"', sql)
+
+    def test_pending_approvals_keeps_approve_url(self):
+        """待审批列表在不返回 id 时仍生成审批链接"""
+        BorrowRecord.objects.update(status='pending')
+        response = self.client.get(reverse('borrow-record-pending-approvals') + '?fields=book_title')
+        row = response.data['results'][0]
+        self.assertTrue(row['approve_url'].endswith('/approve/'))
+        self.assertEqual(row['book_title'], "Foundation")
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import Book, BorrowRecord, User
+from utils.query_plan import explain, full_scans, temp_btrees, used_indexes
+
+
+class HotQueryPlanTests(TestCase):
+    """热点查询的执行计划不能出现全表扫描"""
+
+    def assertIndexed(self, queryset, index=None, ordered=True):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN output is SQLite specific')
+        plan = explain(queryset)
+        self.assertEqual(full_scans(plan), [], plan)
+        if ordered:
+            self.assertEqual(temp_btrees(plan), [], plan)
+        if index:
+            self.assertIn(index, used_indexes(plan), plan)
+
+    def test_check_book_status(self):
+        """check_book_status：按用户、图书取最新借阅记录"""
+        self.assertIndexed(
+            BorrowRecord.objects.filter(user_id=1, book_id=2).order_by('-borrow_date')[:1],
+            'borrow_user_book_date_idx',
+        )
+
+    def test_reader_borrow_records(self):
+        """读者借阅记录列表按借阅时间倒序"""
+        self.assertIndexed(
+            BorrowRecord.objects.filter(user_id=1).select_related('user', 'book').order_by('-borrow_date')[:10],
+            'borrow_user_date_idx',
+        )
+
+    def test_pending_approvals(self):
+        """待审批列表按状态过滤并按时间排序"""
+        self.assertIndexed(
+            BorrowRecord.objects.filter(status='pending').order_by('-borrow_date')[:10],
+            'borrow_status_date_idx',
+        )
+
+    def test_analytics_status_date(self):
+        """统计分析按状态与时间范围读取借阅日期"""
+        self.assertIndexed(
+            BorrowRecord.objects.filter(status='borrowed', borrow_date__gte=timezone.now() - timedelta(days=30))
+            .values_list('borrow_date', flat=True),
+            'borrow_status_date_idx',
+        )
+        self.assertIndexed(
+            BorrowRecord.objects.filter(status='borrowed').values('book__category_id')
+            .annotate(borrow_count=Count('id')),
+            'borrow_status_date_idx', ordered=False,
+        )
+
+    def test_login_and_register(self):
+        """登录按用户名、密码和用户类型查询，注册检查用户名是否存在"""
+        self.assertIndexed(User.objects.filter(username='reader', password='x', user_type=0)[:1])
+        self.assertIndexed(User.objects.filter(username='reader').values('id')[:1])
+
+    def test_book_ordering(self):
+        """图书按标题排序与标题查重"""
+        self.assertIndexed(Book.objects.order_by('title', 'id')[:10], 'book_title_idx')
+        self.assertIndexed(Book.objects.filter(title='The Hobbit').values('id')[:1], 'book_title_idx')
+
+    def test_detects_full_scan(self):
+        """未建索引的过滤条件会被识别为全表扫描"""
+        plan = explain(Book.objects.filter(description='x').order_by())
+        self.assertEqual(full_scans(plan), ['book'])
+        self.assertTrue(temp_btrees(explain(Book.objects.order_by('description'))))
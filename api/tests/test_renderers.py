@@ -0,0 +1,68 @@
+import datetime
+import decimal
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.models import Author, Book, BorrowRecord, Category, User
+from api.serializers import BookSerializer, BorrowRecordSerializer
+from utils.renderers import FastJSONRenderer, envelope
+
+
+class FastJSONRendererTests(TestCase):
+    """测试 orjson 渲染器与 DRF 默认渲染结果一致"""
+
+    def test_matches_drf_encoding(self):
+        """日期、Decimal、集合、惰性字符串的编码与 DRF 一致"""
+        data = {
+            'when': datetime.datetime(2025, 4, 9, 9, 44, 1, 123000, tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2025, 4, 9),
+            'price': decimal.Decimal('12.50'),
+            'methods': {'get'},
+            'message': _("You do not have permission to perform this action"),
+            1: 'int key',
+            'text': 'line\u2028separator',
+        }
+        fast = FastJSONRenderer().render(data)
+        self.assertEqual(json.loads(fast), json.loads(JSONRenderer().render(data)))
+        self.assertIn(b'"2025-04-09T09:44:01.123000Z"', fast)
+        self.assertIn(b'\\u2028', fast)
+
+    def test_indent_falls_back(self):
+        """请求缩进时回退到 DRF 渲染器"""
+        content = FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(content, b'{\n  "a": 1\n}')
+
+    def test_serialized_pages_match_stock_renderer(self):
+        """图书和借阅记录列表加信封后，与 DRF JSONRenderer 的输出一致（耗时对比见 benchmark_renderers 命令）"""
+        category = Category.objects.create(name="Novel")
+        author = Author.objects.create(name="Author")
+        reader = User.objects.create(username="reader", password="x")
+        for i in range(20):
+            book = Book.objects.create(title=f"Book {i}", category=category, author=author,
+                                       description="Lorem ipsum " * 5)
+            BorrowRecord.objects.create(user=reader, book=book, status='borrowed',
+                                        return_date=timezone.now() + datetime.timedelta(days=7))
+
+        class EnvelopedResponse:
+            envelope_code = 0
+
+        for data in (BookSerializer(Book.objects.select_related('author', 'category'), many=True).data,
+                     BorrowRecordSerializer(BorrowRecord.objects.select_related('user', 'book'), many=True).data):
+            fast = FastJSONRenderer().render(data, renderer_context={'response': EnvelopedResponse()})
+            self.assertEqual(json.loads(fast), json.loads(JSONRenderer().render(envelope(data, 0))))
+
+    def test_envelope_added_while_encoding(self):
+        """MineApiViewSet 响应在编码时包上 code/data 信封"""
+        response = APIClient().post(reverse('register'), {'username': 'newreader', 'password': 'secret'},
+                                    format='json')
+        self.assertEqual(response.status_code, 201)
+        body = json.loads(response.content)
+        self.assertEqual(body['code'], 0)
+        self.assertEqual(body['data']['data']['username'], 'newreader')
+        self.assertEqual(response.data['data']['username'], 'newreader')
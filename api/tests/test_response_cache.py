@@ -0,0 +1,117 @@
+import gzip
+import json
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.models import Announcement, Author, Book, Category, User, UserType, WhitelistUrl
+from api.tests import make_principal
+from utils.cache import check_shared_cache, get_model_version
+
+
+class ResponseCacheTests(TestCase):
+    """测试公共目录列表的响应缓存"""
+
+    def setUp(self):
+        cache.clear()
+        for url_pattern in ('book-list', 'category-list', 'author-list', 'announcement-list'):
+            WhitelistUrl.objects.create(url_pattern=url_pattern, description=url_pattern)
+        self.category = Category.objects.create(name="Novel")
+        self.author = Author.objects.create(name="Author")
+        for i in range(30):
+            Book.objects.create(title=f"Book {i:02d}", category=self.category, author=self.author,
+                                description="x" * 200)
+        self.client = APIClient()
+
+    def test_second_request_is_served_from_cache(self):
+        """第二次请求直接返回缓存的响应体，只剩白名单查询"""
+        url = reverse('book-list') + '?page_size=20'
+        first = self.client.get(url)
+        self.assertEqual(first['X-Response-Cache'], 'miss')
+        with self.assertNumQueries(1):
+            second = self.client.get(url)
+        self.assertEqual(second['X-Response-Cache'], 'hit')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Type'], first['Content-Type'])
+
+    def test_query_string_is_normalized(self):
+        """参数顺序不同的请求共用同一缓存项"""
+        self.client.get(reverse('book-list') + '?page=2&page_size=5')
+        response = self.client.get(reverse('book-list') + '?page_size=5&page=2')
+        self.assertEqual(response['X-Response-Cache'], 'hit')
+        other = self.client.get(reverse('book-list') + '?page_size=5&page=3')
+        self.assertEqual(other['X-Response-Cache'], 'miss')
+
+    def test_writes_invalidate(self):
+        """图书、作者的增删改使缓存失效"""
+        url = reverse('book-list') + '?title=Book 00'
+        self.client.get(url)
+        Book.objects.create(title="Book 00 bis", category=self.category, author=self.author)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Response-Cache'], 'miss')
+        self.assertEqual(json.loads(response.content)['count'], 2)
+
+        self.author.name = "Renamed"
+        self.author.save()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Response-Cache'], 'miss')
+        self.assertEqual(json.loads(response.content)['results'][0]['author_name'], "Renamed")
+
+    def test_version_bumped_again_on_commit(self):
+        """写入时立即更新版本号，提交后再更新一次，提交前缓存的旧数据不会被读到"""
+        url = reverse('book-list') + '?title=Book 00'
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(title="Book 00 bis", category=self.category, author=self.author)
+            version = get_model_version(Book)
+            self.client.get(url)
+        self.assertNotEqual(get_model_version(Book), version)
+        self.assertEqual(self.client.get(url)['X-Response-Cache'], 'miss')
+
+    def test_process_local_cache_warns(self):
+        """默认缓存不能在进程间共享时，系统检查给出警告"""
+        self.assertEqual(check_shared_cache(None), [])
+        with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([warning.id for warning in check_shared_cache(None)], ['api.W001'])
+
+    def test_tests_use_a_private_cache(self):
+        """测试运行时缓存位于临时目录，不会清空开发服务器的缓存"""
+        location = settings.CACHES['default']['LOCATION']
+        self.assertNotEqual(os.path.abspath(location), os.path.abspath(os.path.join(settings.BASE_DIR, 'cache')))
+        self.assertTrue(os.path.basename(location).startswith('lms-test-cache-')
+                        or os.path.basename(location).startswith('worker-'))
+
+    def test_precompressed_body(self):
+        """支持 gzip 的客户端直接获得缓存中预压缩的响应体"""
+        url = reverse('book-list') + '?page_size=30&include=description'
+        plain = self.client.get(url)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['X-Response-Cache'], 'hit')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_announcement_audiences(self):
+        """公告按匿名、读者、管理员分别缓存，未发布公告不会泄露"""
+        Announcement.objects.create(title="Public", content="c")
+        Announcement.objects.create(title="Draft", content="c", is_visible=False)
+        url = reverse('announcement-list')
+
+        anonymous = json.loads(self.client.get(url).content)
+        self.assertEqual([row['title'] for row in anonymous['results']], ["Public"])
+
+        admin = User.objects.create(username="staff", password="x", user_type=UserType.LIBRARIAN)
+        client = APIClient()
+        client.force_authenticate(user=make_principal(admin))
+        response = client.get(url)
+        self.assertEqual(response['X-Response-Cache'], 'miss')
+        self.assertEqual(json.loads(response.content)['count'], 2)
+
+        reader = User.objects.create(username="reader", password="x")
+        client.force_authenticate(user=make_principal(reader))
+        response = client.get(url)
+        self.assertEqual(response['X-Response-Cache'], 'miss')
+        self.assertEqual(json.loads(response.content)['count'], 1)
@@ -0,0 +1,88 @@
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.db import OperationalError, connection, connections
+from django.test import TestCase, TransactionTestCase
+
+from api.models import Author, Book, Category
+from utils.routers import ReplicaRouter, analytics_reads, in_analytics_reads, refresh_replica, replica_available
+
+
+class ReplicaRouterTests(TestCase):
+    """统计分析读副本，写入始终走主库"""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_in_analytics_scope_use_replica(self):
+        """analytics_reads 范围内的读请求路由到副本"""
+        with mock.patch('utils.routers.replica_available', return_value=True):
+            self.assertEqual(self.router.db_for_read(Book), 'default')
+            with analytics_reads():
+                self.assertEqual(self.router.db_for_read(Book), 'replica')
+                self.assertEqual(self.router.db_for_write(Book), 'default')
+            self.assertEqual(self.router.db_for_read(Book), 'default')
+
+    def test_decorator(self):
+        """analytics_reads 可以作为装饰器使用，结束后恢复"""
+        @analytics_reads()
+        def report():
+            return in_analytics_reads()
+
+        self.assertTrue(report())
+        self.assertFalse(in_analytics_reads())
+
+    def test_mirror_is_not_a_replica(self):
+        """测试环境副本镜像主库，分析查询仍读主库"""
+        self.assertFalse(replica_available())
+        with analytics_reads():
+            self.assertEqual(self.router.db_for_read(Book), 'default')
+
+    def test_migrations_only_on_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'api'))
+        self.assertFalse(self.router.allow_migrate('replica', 'api'))
+
+
+class RefreshReplicaTests(TransactionTestCase):
+    """refresh_replica 用在线备份复制主库"""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite backup API')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'replica.sqlite3')
+        settings_dict = connections['replica'].settings_dict
+        original = settings_dict['NAME']
+        settings_dict['NAME'] = f'file:{self.path}?mode=ro'
+        self.addCleanup(settings_dict.__setitem__, 'NAME', original)
+        self.addCleanup(connections['replica'].close)
+
+    def test_snapshot_contains_primary_rows(self):
+        """快照包含主库的表和数据，之后副本可用"""
+        Book.objects.create(title="Dune", category=Category.objects.create(name="SF"),
+                            author=Author.objects.create(name="Herbert"))
+        self.assertFalse(replica_available())
+
+        seconds, size = refresh_replica()
+
+        self.assertGreater(size, 0)
+        self.assertTrue(replica_available())
+        snapshot = sqlite3.connect(self.path)
+        try:
+            titles = [row[0] for row in snapshot.execute('SELECT title FROM book')]
+        finally:
+            snapshot.close()
+        self.assertEqual(titles, ["Dune"])
+
+    def test_replica_is_read_only(self):
+        """副本连接只读：误路由的写入报错，快照不变"""
+        refresh_replica()
+        with connections['replica'].cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM book')
+            self.assertEqual(cursor.fetchone()[0], 0)
+            with self.assertRaises(OperationalError):
+                cursor.execute("INSERT INTO category (name, updated_at) VALUES ('SF', '2025-01-01')")
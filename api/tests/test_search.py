@@ -0,0 +1,85 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.models import Announcement, Author, Book, Category, User
+from api.tests import make_principal
+from utils import search
+
+
+class FullTextSearchTests(TestCase):
+    """测试 FTS5 全文检索"""
+
+    def setUp(self):
+        cache.clear()
+        self.novel = Category.objects.create(name="Novel")
+        self.science = Category.objects.create(name="Science")
+        self.tolkien = Author.objects.create(name="Tolkien")
+        self.hawking = Author.objects.create(name="Hawking")
+        self.hobbit = Book.objects.create(title="The Hobbit", category=self.novel, author=self.tolkien,
+                                          description="A journey there and back again")
+        self.history = Book.objects.create(title="A Brief History of Time", category=self.science,
+                                           author=self.hawking, description="Black holes and the hobbit paradox")
+        self.rings = Book.objects.create(title="The Fellowship of the Ring", category=self.novel,
+                                         author=self.tolkien, description="Hobbits leave the Shire")
+        self.client = APIClient()
+        self.client.force_authenticate(user=make_principal(User.objects.create(username="reader", password="x")))
+
+    def search_titles(self, route, q):
+        response = self.client.get(reverse(route), {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return [row['title'] for row in response.data['results']]
+
+    def test_title_hits_rank_first(self):
+        """标题命中的结果排在正文命中之前"""
+        titles = self.search_titles('book-search', 'hobbit')
+        self.assertEqual(titles[0], "The Hobbit")
+        self.assertIn("A Brief History of Time", titles)
+
+    def test_prefix_and_author_match(self):
+        """最后一个词按前缀匹配，作者与分类也参与检索"""
+        self.assertEqual(self.search_titles('book-search', 'fellow'), ["The Fellowship of the Ring"])
+        self.assertEqual(set(self.search_titles('book-search', 'tolkien')), {"The Hobbit", "The Fellowship of the Ring"})
+        self.assertEqual(self.search_titles('book-search', 'science black'), ["A Brief History of Time"])
+
+    def test_index_follows_writes(self):
+        """图书、作者的修改和删除同步到索引"""
+        self.tolkien.name = "J. R. R. Tolkien"
+        self.tolkien.save()
+        self.assertEqual(len(self.search_titles('book-search', 'tolkien')), 2)
+        self.hobbit.title = "There and Back Again"
+        self.hobbit.save()
+        self.assertIn("There and Back Again", self.search_titles('book-search', 'back'))
+        self.rings.delete()
+        self.assertEqual(self.search_titles('book-search', 'fellowship'), [])
+
+    def test_announcement_visibility(self):
+        """读者检索不到未发布的公告"""
+        Announcement.objects.create(title="Library closed", content="Closed for maintenance")
+        Announcement.objects.create(title="Draft notice", content="Library maintenance plan", is_visible=False)
+        self.assertEqual(self.search_titles('announcement-search', 'maintenance'), ["Library closed"])
+
+    def test_query_required(self):
+        """缺少 q 参数返回 400，纯符号查询返回空结果"""
+        self.assertEqual(self.client.get(reverse('book-search')).status_code, 400)
+        self.assertEqual(self.search_titles('book-search', '"*'), [])
+
+    def test_rebuild_command(self):
+        """rebuild_search_index 会重新写入绕过信号的批量修改"""
+        Book.objects.filter(pk=self.hobbit.pk).update(title="Silmarillion")
+        self.assertEqual(self.search_titles('book-search', 'silmarillion'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search_titles('book-search', 'silmarillion'), ["Silmarillion"])
+
+    def test_match_expression(self):
+        """用户输入被转义为 FTS5 查询"""
+        self.assertEqual(search.match_expression('brief "hist'), '"brief" "hist"*')
+        self.assertIsNone(search.match_expression('  '))
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {search.BOOK_TABLE}")
+            self.assertEqual(cursor.fetchone()[0], 3)
@@ -9,7 +9,7 @@ from rest_framework.routers import DefaultRouter
 
 from api import views
 from api.views import LoginView, AnnouncementViewSet, BookViewSet, BorrowRecordViewSet, \
-    RecommendationViewSet, RegisterView , CategoryViewSet, AuthorViewSet, UserViewSet, RatingViewSet
+    RecommendationViewSet, RegisterView , CategoryViewSet, AuthorViewSet, UserViewSet, RatingViewSet, BatchView
 
 router = DefaultRouter()
 router.register(r'announcements', AnnouncementViewSet, basename='announcement')
@@ -33,6 +33,7 @@ recommendations_predictive = RecommendationViewSet.as_view({
 urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
     path('register/', RegisterView.as_view(), name='register'),
+    path('batch/', BatchView.as_view(), name='batch'),
     path('recommendations/popular_books_analysis/', recommendations_list, name='recommendation-popular-books'),
     path('recommendations/predictive_analysis/', recommendations_predictive, name='recommendation-predictive'),
     path('', include(router.urls)),
@@ -12,12 +12,16 @@ from LibraryManagementSystem import settings
 from api.models import Menu, Permission, Announcement, Book, Recommendation, Category, \
     Author, Rating
 from api.models import Role
-from api.serializers import LoginSerializer, AnnouncementSerializer, BookSerializer, BorrowRecordSerializer, \
-    RecommendationSerializer, CategorySerializer, AuthorSerializer, UserSerializer, RatingSerializer
+from api.serializers import LoginSerializer, AnnouncementSerializer, BookSerializer, BookListSerializer, \
+    BorrowRecordSerializer, RecommendationSerializer, CategorySerializer, AuthorSerializer, UserSerializer, RatingSerializer
 from utils.suanfa import get_user_behavior_from_db, recommendation
 from utils.pagination import StandardResultsSetPagination
 from utils.tree import PermissionTree
-from utils.view import MineApiViewSet, MineModelViewSet
+from utils.view import DeltaSyncMixin, ExportMixin, FullTextSearchMixin, MineApiViewSet, MineModelViewSet
+from utils import search as fulltext
+from utils.autocomplete import AUTHOR, TITLE, catalogue_index
+from utils.routers import analytics_reads
+from utils import batch, borrowing, catalogue_import, counters
 from utils.permissions import IsLibrarian, IsSystemAdmin, IsLibrarianOrSystemAdmin, IsReader, IsSelfOrAdmin, RbacPermission
 from utils.decorators import role_required, librarian_required, system_admin_required, reader_required
 import pandas as pd
@@ -44,6 +48,7 @@ from statsmodels.tsa.arima.model import ARIMA
 from statsmodels.tsa.seasonal import seasonal_decompose
 from sklearn.ensemble import IsolationForest
 import pandas as pd
+from django.db import transaction
 from django.db.models import Avg, Count
 from django.db.models import Q, F, Sum
 import pytz
@@ -134,7 +139,7 @@ class LoginView(MineApiViewSet):
         return Response(context)
 
 
-class AnnouncementViewSet(MineModelViewSet):
+class AnnouncementViewSet(DeltaSyncMixin, FullTextSearchMixin, MineModelViewSet):
     """
     Announcement ViewSet, supporting CRUD operations.
     """
@@ -143,6 +148,10 @@ class AnnouncementViewSet(MineModelViewSet):
     pagination_class = StandardResultsSetPagination
     filter_backends = [DjangoFilterBackend]
     permission_classes = [RbacPermission]  # Basic permission check
+    response_cache_models = (Announcement,)
+    conditional_timestamp_field = 'updated_at'
+    search_table = fulltext.ANNOUNCEMENT_TABLE
+    search_rank = fulltext.ANNOUNCEMENT_RANK
     
     def get_permissions(self):
         """
@@ -202,40 +211,22 @@ class AnnouncementViewSet(MineModelViewSet):
             "data": serializer.data
         }, status=status.HTTP_201_CREATED, headers=headers)
     
-    def get_queryset(self):
+    def sees_hidden_announcements(self):
         """
-        Filter announcements based on user type
+        Whether the current request may list unpublished announcements
         """
-        queryset = Announcement.objects.all().order_by('-published_at')
-        
-        # Get user info and log details
+        # Get user info
         user = self.request.user
         
-        # Determine if user is admin
-        is_admin = False
+        # Determine if user is admin (user type, roles and superuser flag are
+        # resolved once per request)
+        is_admin = self.is_librarian()
         
-        # Method 1: Check user type (if set)
-        if hasattr(user, 'user_type') and user.user_type:
-            user_type_value = user.user_type
-            # 1 is librarian, 2 is system admin
-            if str(user_type_value) == '1' or user_type_value == 1 or str(user_type_value) == '2' or user_type_value == 2:
-                is_admin = True
-        
-        # Method 2: Check username (backup check)
+        # Backup check: username
         if not is_admin and hasattr(user, 'username'):
             if user.username == 'admin' or user.username == 'librarian':
                 is_admin = True
         
-        # Method 3: Check user roles
-        if not is_admin and hasattr(user, 'roles'):
-            role_names = user.roles  # roles is already a list
-            if any(role in ['Librarian', 'System Admin', 'admin', 'librarian', 'librarian', 'system_admin'] for role in role_names):
-                is_admin = True
-        
-        # Method 4: Check if superuser
-        if not is_admin and getattr(user, 'is_superuser', False):
-            is_admin = True
-        
         # Compatibility mode: Also check URL parameters
         if not is_admin:
             user_type_param = self.request.query_params.get('user_type', None)
@@ -243,7 +234,35 @@ class AnnouncementViewSet(MineModelViewSet):
             if user_type_param in ['1', '2'] or is_librarian_param:
                 is_admin = True
         
-        print(f"Is admin: {is_admin}")
+        return is_admin
+    
+    def get_deleted_ids(self, since, until=None):
+        """
+        Announcements unpublished since the watermark are tombstones for readers
+        """
+        deleted = super().get_deleted_ids(since, until)
+        if not self.sees_hidden_announcements():
+            hidden = Announcement.objects.filter(is_visible=False, updated_at__gte=since)
+            if until is not None:
+                hidden = hidden.filter(updated_at__lt=until)
+            deleted.extend(hidden.values_list('id', flat=True))
+        return deleted
+    
+    def get_response_cache_audience(self):
+        """
+        Admins also see unpublished announcements, everyone else shares one cached list
+        """
+        if self.sees_hidden_announcements():
+            return 'admin'
+        if self.get_role_resolver().is_authenticated:
+            return 'reader'
+        return 'anonymous'
+    
+    def get_queryset(self):
+        """
+        Filter announcements based on user type
+        """
+        queryset = Announcement.objects.all().order_by('-published_at')
         
         # Get query parameters
         title = self.request.query_params.get('title', None)
@@ -251,11 +270,8 @@ class AnnouncementViewSet(MineModelViewSet):
             queryset = queryset.filter(title__icontains=title)
         
         # Only non-admins need visibility filtering
-        if not is_admin:
-            print("Filtering: Show only published announcements")
+        if not self.sees_hidden_announcements():
             queryset = queryset.filter(is_visible=True)
-        else:
-            print("No filtering: Show all announcements (published and unpublished)")
         
         return queryset
 
@@ -271,7 +287,7 @@ class AnnouncementViewSet(MineModelViewSet):
     def destroy(self, request, *args, **kwargs):
         return super().destroy(request, *args, **kwargs)
 
-class BookViewSet(MineModelViewSet):
+class BookViewSet(DeltaSyncMixin, FullTextSearchMixin, MineModelViewSet):
     """Book ViewSet"""
     queryset = Book.objects.all()
     serializer_class = BookSerializer
@@ -281,6 +297,18 @@ class BookViewSet(MineModelViewSet):
         'title': ['icontains'],  
         'category': ['exact']
     }
+    # ?ordering= values, each backed by an index (the counters are kept on the book row)
+    catalogue_orderings = {
+        'title': ('title', 'id'),
+        'popular': ('-borrow_count', '-id'),
+        'rating': ('-avg_rating', '-rating_count', '-id'),
+    }
+    # author_name / category_name come from the joined tables
+    response_cache_models = (Book, Author, Category)
+    conditional_timestamp_field = 'updated_at'
+    changes_related_timestamp_fields = ('author__updated_at', 'category__updated_at')
+    search_table = fulltext.BOOK_TABLE
+    search_rank = fulltext.BOOK_RANK
     
     @librarian_required
     def create(self, request, *args, **kwargs):
@@ -362,11 +390,105 @@ class BookViewSet(MineModelViewSet):
     def destroy(self, request, *args, **kwargs):
         return super().destroy(request, *args, **kwargs)
 
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Type-ahead suggestions for book titles and author names (?q=prefix&type=title|author),
+        answered from the in-process prefix index without a database query
+        """
+        kind = request.query_params.get('type')
+        kinds = (kind,) if kind in (TITLE, AUTHOR) else (TITLE, AUTHOR)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        matches = catalogue_index.search(request.query_params.get('q', ''), kinds=kinds, limit=limit)
+        return Response({
+            'results': [{'type': kind, 'id': pk, 'text': text} for kind, pk, text in matches]
+        })
+
+    @librarian_required
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_catalogue(self, request):
+        """
+        Bulk import of an uploaded CSV or JSONL file (title, author, category,
+        description per row), read as it streams in; see utils.catalogue_import.
+        Files over CATALOGUE_IMPORT_MAX_UPLOAD_SIZE go through the import_catalogue
+        command instead. When the import stops early the chunks before the failure
+        stay imported and the report says where to resume.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"success": False, "message": "Upload the catalogue as 'file'"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        max_size = getattr(settings, 'CATALOGUE_IMPORT_MAX_UPLOAD_SIZE', None)
+        if max_size and upload.size > max_size:
+            return Response({"success": False,
+                             "message": f"Files over {max_size} bytes are imported with "
+                                        f"'python manage.py import_catalogue <file>'"},
+                            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        fmt = request.data.get('format') or catalogue_import.detect_format(upload.name)
+        if fmt not in catalogue_import.FORMATS:
+            return Response({"success": False, "message": f"Format must be one of {', '.join(catalogue_import.FORMATS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        run = catalogue_import.import_catalogue(catalogue_import.text_stream(upload.file), fmt)
+        if run.failure is not None:
+            failure = run.failure
+            return Response({
+                "success": False,
+                "message": f"Import stopped at line {failure['first_line']} after {run.created} books: "
+                           f"{failure['error']}",
+                **run.report()
+            }, status=status.HTTP_400_BAD_REQUEST if failure['stage'] == 'input'
+                else status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({
+            "success": True,
+            "message": f"{run.created} books imported ({run.rows_per_second:.0f} rows/s)",
+            **run.report()
+        })
+
+    @property
+    def keyset_ordering(self):
+        """
+        Cursor pagination follows the requested ?ordering=
+        """
+        return self.catalogue_orderings[self.requested_ordering()]
+
+    def requested_ordering(self):
+        request = getattr(self, 'request', None)
+        ordering = request.query_params.get('ordering') if request is not None and hasattr(request, 'query_params') else None
+        return ordering if ordering in self.catalogue_orderings else 'title'
+
+    def get_serializer_class(self):
+        """
+        The catalogue list and search use the lean serializer unless the description is requested
+        """
+        if self.action in ('list', 'search') and not self.description_requested():
+            return BookListSerializer
+        return super().get_serializer_class()
+
+    def description_requested(self):
+        """
+        ?include=description (or ?fields=...,description) asks the list endpoint for the full book payload
+        """
+        request = getattr(self, 'request', None)
+        if request is None:
+            return False
+        include = request.query_params.get('include', '')
+        if 'description' in [name.strip() for name in include.split(',')]:
+            return True
+        requested, excluded = self.get_sparse_fieldset()
+        return requested is not None and 'description' in requested
+
     def get_queryset(self):
         """
         Override get_queryset to handle additional filtering
         """
-        queryset = super().get_queryset()
+        # author_name/category_name are read for every row
+        queryset = super().get_queryset().select_related('author', 'category')
+        if self.action in ('list', 'search') and not self.description_requested():
+            queryset = queryset.defer('description')
         
         # Get filter parameters
         category = self.request.query_params.get('category', None)
@@ -377,10 +499,12 @@ class BookViewSet(MineModelViewSet):
             queryset = queryset.filter(category_id=category)
         if title:
             queryset = queryset.filter(title__icontains=title)
+        if self.action == 'list':
+            queryset = queryset.order_by(*self.catalogue_orderings[self.requested_ordering()])
             
         return queryset
 
-class BorrowRecordViewSet(MineModelViewSet):
+class BorrowRecordViewSet(DeltaSyncMixin, ExportMixin, MineModelViewSet):
     """
     Borrow Record ViewSet
     """
@@ -390,11 +514,27 @@ class BorrowRecordViewSet(MineModelViewSet):
     filterset_fields = ['status']
     permission_classes = [RbacPermission]
     http_method_names = ['get', 'post', 'delete', 'head', 'options']
+    keyset_ordering = ('-borrow_date', '-id')
+    bulk_approve_limit = 1000
+    book_statuses_limit = 100
+    export_filename = 'borrow-records'
+    export_columns = (
+        ('id', 'id'), ('user_id', 'user_id'), ('username', 'user.username'),
+        ('book_id', 'book_id'), ('book_title', 'book.title'), ('status', 'status'),
+        ('borrow_date', 'borrow_date'), ('return_date', 'return_date'), ('updated_at', 'updated_at'),
+    )
+    # Columns read by BorrowRecordSerializer, loaded together with the user and book rows
+    list_only_fields = (
+        'id', 'status', 'borrow_date', 'return_date', 'updated_at',
+        'user__id', 'user__username', 'user__user_type',
+        'book__id', 'book__title',
+    )
+
     def get_permissions(self):
         """
         Return different permissions based on different operations
         """
-        if self.action in ['approve_borrow', 'pending_approvals']:
+        if self.action in ['approve_borrow', 'bulk_approve', 'pending_approvals']:
             return [IsLibrarianOrSystemAdmin()]
         elif self.action in ['create', 'return_book']:
             return [IsReader()]
@@ -402,17 +542,26 @@ class BorrowRecordViewSet(MineModelViewSet):
             return [IsSelfOrAdmin()]
         return super().get_permissions()
     
+    def get_tombstones(self, since, until=None):
+        """
+        Readers only learn about deletions of their own records
+        """
+        tombstones = super().get_tombstones(since, until)
+        if not self.is_librarian():
+            tombstones = tombstones.filter(owner_id=getattr(self.request.user, 'id', None))
+        return tombstones
+    
     def get_queryset(self):
         """
         Return different querysets based on user role:
         - Administrators can view all records
         - Regular users can only view their own records
         """
-        queryset = BorrowRecord.objects.all()
+        queryset = self.with_related(BorrowRecord.objects.all())
         user = self.request.user
         
-        # Check if user is admin using permission class
-        is_admin = IsLibrarianOrSystemAdmin().has_permission(self.request, self)
+        # Check if user is admin using the request-scoped role resolver
+        is_admin = self.is_librarian()
         
         # Only filter by user ID if user is authenticated and not admin
         if user and user.is_authenticated and not is_admin:
@@ -432,6 +581,16 @@ class BorrowRecordViewSet(MineModelViewSet):
             queryset = queryset.filter(status=status)
             
         return queryset
+
+    def with_related(self, queryset):
+        """
+        Join user and book so serializing a page does not query per row;
+        list pages only load the columns the serializer reads
+        """
+        queryset = queryset.select_related('user', 'book')
+        if self.action in ('list', 'pending_approvals'):
+            queryset = queryset.only(*self.list_only_fields)
+        return queryset
     
     @reader_required
     def create(self, request, *args, **kwargs):
@@ -494,8 +653,9 @@ class BorrowRecordViewSet(MineModelViewSet):
                 return Response({"error": "Only borrowed books can be returned"}, 
                             status=status.HTTP_400_BAD_REQUEST)
             
-            borrow_record.status = 'pending' 
-            borrow_record.save()
+            if not borrowing.request_return(borrow_record):
+                return Response({"error": borrowing.conflict_reason(borrow_record)},
+                            status=status.HTTP_409_CONFLICT)
             
             return Response({
                 "message": "Return request submitted, awaiting admin confirmation",
@@ -523,14 +683,10 @@ class BorrowRecordViewSet(MineModelViewSet):
                     return Response({"error": "Approval status must be 'borrowed'(approve) or 'rejected'(reject)", "success": False}, 
                                 status=status.HTTP_400_BAD_REQUEST)
                 
-                borrow_record.status = approval_status
-                if approval_status == 'borrowed':
-                    borrow_record.return_date = timezone.now() + timezone.timedelta(days=15)
-                    book = borrow_record.book
-                    book.is_available = False
-                    book.save()
-                
-                borrow_record.save()
+                transition = borrowing.approve_borrow if approval_status == 'borrowed' else borrowing.reject_borrow
+                if not transition(borrow_record):
+                    return Response({"error": borrowing.conflict_reason(borrow_record), "success": False},
+                                status=status.HTTP_409_CONFLICT)
                 
                 return Response({
                     "message": "Borrow request has been " + ("approved" if approval_status == 'borrowed' else "rejected"),
@@ -548,11 +704,9 @@ class BorrowRecordViewSet(MineModelViewSet):
                 })
                 
             elif borrow_record.status == 'approval':
-                borrow_record.status = 'returned'
-                book = borrow_record.book
-                book.is_available = True
-                book.save()
-                borrow_record.save()
+                if not borrowing.confirm_return(borrow_record):
+                    return Response({"error": borrowing.conflict_reason(borrow_record), "success": False},
+                                status=status.HTTP_409_CONFLICT)
                 
                 return Response({
                     "message": "Return request has been approved",
@@ -576,6 +730,41 @@ class BorrowRecordViewSet(MineModelViewSet):
             return Response({"error": "Borrow record does not exist", "success": False}, 
                         status=status.HTTP_404_NOT_FOUND)
 
+    @action(detail=False, methods=['post'], url_path='bulk-approve')
+    def bulk_approve(self, request):
+        """
+        Approve or reject many pending requests in one transaction:
+        {"items": [{"id": 1, "status": "borrowed"}, {"id": 2, "status": "rejected"}]}
+        or {"ids": [1, 2], "status": "borrowed"}. Results are reported per id.
+        """
+        items = request.data.get('items')
+        if items is None and 'ids' in request.data:
+            items = [{'id': record_id, 'status': request.data.get('status')} for record_id in request.data['ids']]
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Provide 'items' or 'ids' with 'status'", "success": False},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.bulk_approve_limit:
+            return Response({"error": f"At most {self.bulk_approve_limit} records per request", "success": False},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            decisions = [(int(item['id']), item.get('status')) for item in items]
+        except (KeyError, TypeError, ValueError):
+            return Response({"error": "Every item needs an integer 'id'", "success": False},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = borrowing.bulk_decide(decisions)
+        approved = sum(1 for result in results if result['success'] and result['status'] == 'borrowed')
+        rejected = sum(1 for result in results if result['success'] and result['status'] == 'rejected')
+        return Response({
+            "message": f"{approved} approved, {rejected} rejected, {len(results) - approved - rejected} failed",
+            "success": True,
+            "approved": approved,
+            "rejected": rejected,
+            "failed": len(results) - approved - rejected,
+            "results": results,
+            "refresh_needed": True
+        })
+
     @swagger_auto_schema(
         method='get',
         manual_parameters=[
@@ -614,25 +803,6 @@ class BorrowRecordViewSet(MineModelViewSet):
         except ValueError:
             return Response({"error": "Book ID must be a valid integer"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Status description mapping - user-friendly description text
-        status_descriptions = {
-            'pending': 'Your borrowing request is awaiting approval',
-            'borrowed': 'You have successfully borrowed this book',
-            'returned': 'You have returned this book',
-            'rejected': 'Your borrowing request has been rejected',
-            'approval': 'Your return request is awaiting approval'  # Add return request status description
-        }
-
-        # Button text mapping - text to display on buttons for different statuses
-        button_texts = {
-            'pending': 'Pending',
-            'borrowed': 'Borrowed',
-            'returned': 'Returned',
-            'rejected': 'Rejected',
-            'available': 'Available',
-            'approval': 'Return Processing'  # Add return request status button text
-        }
-
         # Check if user is authenticated
         if hasattr(user, 'id') and user.id is not None:
             latest_record = BorrowRecord.objects.filter(
@@ -641,40 +811,10 @@ class BorrowRecordViewSet(MineModelViewSet):
             ).order_by('-borrow_date').first()
 
             if latest_record:
-                record_status = latest_record.status
-
-                # If the latest record is "returned" or "rejected" status, consider it available for borrowing
-                if record_status in ['returned', 'rejected']:
-                        return Response({
-                            "book_id": book_id,
-                            "status": "available",
-                            "status_description": "This book is currently available for borrowing",
-                            "button_text": button_texts['available'],
-                            "can_borrow": True
-                        })
-
-                response_data = {
-                    "book_id": book_id,
-                    "status": record_status,
-                    "record_id": latest_record.id,
-                    "borrow_date": latest_record.borrow_date,
-                    "status_description": status_descriptions.get(record_status, "Unknown status"),
-                    "button_text": button_texts.get(record_status, "Available"),
-                    "can_borrow": record_status in ['returned', 'rejected'], # Only after returning or rejecting can it be borrowed again
-                }
-
-                # If there's a return date and status is borrowed, show return date
-                if latest_record.return_date and record_status == 'borrowed':
-                    response_data["return_date"] = latest_record.return_date
-                    response_data["expected_return_date"] = latest_record.return_date
-                    # Calculate days remaining
-                    today = timezone.now().date()
-                    return_date = latest_record.return_date.date()
-                    days_remaining = (return_date - today).days
-                    response_data["days_remaining"] = days_remaining
-                    response_data["return_date_info"] = f"Should be returned on {return_date.strftime('%Y-%m-%d')}"
-
-                return Response(response_data)
+                return Response(borrowing.book_status(
+                    book_id, latest_record.status, latest_record.id,
+                    latest_record.borrow_date, latest_record.return_date
+                ))
 
         # If no record found for the user, check if the book exists and is generally available
         try:
@@ -683,29 +823,65 @@ class BorrowRecordViewSet(MineModelViewSet):
              return Response({"error": f"Book with ID {book_id} not found"}, status=status.HTTP_404_NOT_FOUND)
 
         # Book exists, user has no record, so it's available for this user
+        return Response(borrowing.book_status(book_id))
+
+    @swagger_auto_schema(
+        method='get',
+        manual_parameters=[
+            openapi.Parameter(
+                'book_ids',
+                openapi.IN_QUERY,
+                description="Comma-separated book IDs, e.g. the books of one catalogue page",
+                type=openapi.TYPE_STRING,
+                required=True
+            )
+        ],
+        responses={
+            200: 'borrow status and own rating per book',
+            400: 'invalid request (missing, invalid or too many book_ids)'
+        },
+        operation_summary="check book statuses",
+        operation_description="borrow status, can-borrow flag, days remaining and own rating of many books for the current user"
+    )
+    @action(detail=False, methods=['get'], url_path='book-statuses')
+    def book_statuses(self, request):
+        """
+        check-book-status plus the user's rating for many books at once,
+        in two queries however many books are asked for
+        """
+        raw_ids = request.query_params.get('book_ids', '')
+        try:
+            book_ids = list(dict.fromkeys(int(book_id) for book_id in raw_ids.split(',') if book_id.strip()))
+        except ValueError:
+            return Response({"error": "Book IDs must be comma-separated integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if not book_ids:
+            return Response({"error": "Book IDs must be provided"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(book_ids) > self.book_statuses_limit:
+            return Response({"error": f"At most {self.book_statuses_limit} books per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        overlay = borrowing.user_overlay(getattr(request.user, 'id', None), book_ids)
         return Response({
-            "book_id": book_id,
-            "status": "available",
-            "status_description": "This book is currently available for borrowing",
-            "button_text": button_texts['available'],
-            "can_borrow": True
+            "results": [overlay[book_id] for book_id in book_ids if book_id in overlay],
+            "not_found": [book_id for book_id in book_ids if book_id not in overlay]
         })
-    
+
     @swagger_auto_schema(auto_schema=None)  # Hide this endpoint from Swagger documentation
     @action(detail=False, methods=['get'], url_path='pending-approvals')
     def pending_approvals(self, request):
         """
         Get all pending borrow requests
         """
-        pending_records = BorrowRecord.objects.filter(status='pending').order_by('-borrow_date')
+        pending_records = self.with_related(BorrowRecord.objects.filter(status='pending')).order_by('-borrow_date')
+        pending_records = self.restrict_queryset_columns(pending_records)
         
         page = self.paginate_queryset(pending_records)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
             data = serializer.data
-            for record in data:
+            for obj, record in zip(page, data):
                 record['has_approve_buttons'] = True
-                record['approve_url'] = f"/api/borrow-records/{record['id']}/approve/"
+                record['approve_url'] = f"/api/borrow-records/{obj.pk}/approve/"
                 record['can_approve'] = True
             
             paginated_response = self.get_paginated_response(data)
@@ -714,9 +890,9 @@ class BorrowRecordViewSet(MineModelViewSet):
         
         serializer = self.get_serializer(pending_records, many=True)
         data = serializer.data
-        for record in data:
+        for obj, record in zip(pending_records, data):
             record['has_approve_buttons'] = True
-            record['approve_url'] = f"/api/borrow-records/{record['id']}/approve/"
+            record['approve_url'] = f"/api/borrow-records/{obj.pk}/approve/"
             record['can_approve'] = True
         
         return Response({
@@ -748,6 +924,7 @@ class RecommendationViewSet(MineModelViewSet):
     
     @system_admin_required
     @action(detail=False, methods=['get'], url_path="popular_books_analysis")
+    @analytics_reads()
     def popular_books_analysis(self, request):
         """
         Popular category analysis API: Analyze which book categories are most popular, with optional AI summary
@@ -881,6 +1058,7 @@ class RecommendationViewSet(MineModelViewSet):
         return Response(response_data)
     @system_admin_required
     @action(detail=False, methods=['get'], url_path="predictive_analysis")
+    @analytics_reads()
     def predictive_analysis(self, request):
         """
         Predictive analysis API - Using ARIMA model to predict future borrowing volume
@@ -996,6 +1174,8 @@ class CategoryViewSet(MineModelViewSet):
     queryset = Category.objects.all().order_by('id')
     serializer_class = CategorySerializer
     pagination_class = StandardResultsSetPagination
+    response_cache_models = (Category,)
+    conditional_timestamp_field = 'updated_at'
     
     def dispatch(self, request, *args, **kwargs):
         try:
@@ -1097,6 +1277,8 @@ class AuthorViewSet(MineModelViewSet):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
     pagination_class = StandardResultsSetPagination
+    response_cache_models = (Author,)
+    conditional_timestamp_field = 'updated_at'
     
     def dispatch(self, request, *args, **kwargs):
         try:
@@ -1261,10 +1443,17 @@ class UserViewSet(MineModelViewSet):
     def destroy(self, request, *args, **kwargs):
         return super().destroy(request, *args, **kwargs)
 
-class RatingViewSet(MineModelViewSet):
+class RatingViewSet(ExportMixin, MineModelViewSet):
     """Book Rating and Smart Recommendation ViewSet"""
     serializer_class = RatingSerializer
     queryset = Rating.objects.all()
+    keyset_ordering = ('-created_at', '-id')
+    export_filename = 'ratings'
+    export_columns = (
+        ('id', 'id'), ('user_id', 'user_id'), ('username', 'user.username'),
+        ('book_id', 'book_id'), ('book_title', 'book.title'), ('score', 'score'),
+        ('comment', 'comment'), ('created_at', 'created_at'),
+    )
     # Limit the allowed HTTP methods
     http_method_names = ['get', 'post', 'head', 'options']
     
@@ -1401,7 +1590,9 @@ class RatingViewSet(MineModelViewSet):
             # Use serializer to validate and create rating
             serializer = self.get_serializer(data=data)
             serializer.is_valid(raise_exception=True)
-            self.perform_create(serializer)
+            with transaction.atomic():
+                self.perform_create(serializer)
+                counters.rating_added(serializer.instance.book_id, serializer.instance.score)
             headers = self.get_success_headers(serializer.data)
             
             return Response({
@@ -1442,6 +1633,7 @@ class RatingViewSet(MineModelViewSet):
     
     @reader_required
     @action(detail=False, methods=['GET'])
+    @analytics_reads()
     def recommended_books(self, request):
         # Check if it is called when generating swagger schema
         if getattr(self, 'swagger_fake_view', False):
@@ -1507,6 +1699,44 @@ class RatingViewSet(MineModelViewSet):
             }
         }, status=status.HTTP_200_OK)
 
+class BatchView(MineApiViewSet):
+    """Several API reads in one request, sharing its authentication"""
+
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['requests'],
+            properties={
+                'requests': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'id': openapi.Schema(type=openapi.TYPE_STRING, description="echoed back, defaults to the index"),
+                        'method': openapi.Schema(type=openapi.TYPE_STRING, description="GET"),
+                        'path': openapi.Schema(type=openapi.TYPE_STRING, description="e.g. /api/books/"),
+                        'query': openapi.Schema(type=openapi.TYPE_OBJECT, description="query parameters"),
+                    }
+                ))
+            }
+        ),
+        responses={
+            200: "One {id, status, duration_ms, body} per sub-request, in request order",
+            400: "Missing or too many sub-requests"
+        },
+        operation_summary="batch API reads",
+        operation_description="run several GET requests of the API in one round trip"
+    )
+    def post(self, request):
+        items = request.data.get('requests') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({"success": False, "message": "Provide a non-empty 'requests' list"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        limit = getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+        if len(items) > limit:
+            return Response({"success": False, "message": f"At most {limit} sub-requests per batch"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return batch.run_batch(request, items)
+
+
 class RegisterView(MineApiViewSet):
     """User registration view"""
     authentication_classes = []  # No authentication required
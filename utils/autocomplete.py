@@ -0,0 +1,129 @@
+"""
+In-process prefix index for type-ahead on book titles and author names.
+
+Every word start of a normalized name is a key in one sorted array, so a
+prefix query is a bisect plus a short forward scan and never reaches the
+database. The index is built on first use (wsgi.py warms it at startup),
+updated in place by the Book / Author signals in api/signals.py, and rebuilt
+after AUTOCOMPLETE_REBUILD_INTERVAL seconds to pick up writes made by other
+processes or bulk updates that bypass signals.
+"""
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+TITLE = 'title'
+AUTHOR = 'author'
+
+
+def normalize(text):
+    """Case-folded, accent-free, single-spaced form used for keys and queries"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.casefold().split())
+
+
+def word_starts(text):
+    """'the hobbit' -> ['the hobbit', 'hobbit']"""
+    words = text.split(' ')
+    return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+class PrefixIndex:
+    """Sorted (key, kind, id) entries with the display text of each (kind, id)"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = []
+        self._names = {}
+
+    def __len__(self):
+        return len(self._names)
+
+    def load(self, items):
+        """Replace the content with (kind, id, text) items"""
+        keys, names = [], {}
+        for kind, pk, text in items:
+            names[(kind, pk)] = text
+            keys.extend((key, kind, pk) for key in word_starts(normalize(text)))
+        keys.sort()
+        with self._lock:
+            self._keys, self._names = keys, names
+
+    def add(self, kind, pk, text):
+        with self._lock:
+            self.remove(kind, pk)
+            self._names[(kind, pk)] = text
+            for key in word_starts(normalize(text)):
+                insort(self._keys, (key, kind, pk))
+
+    def remove(self, kind, pk):
+        with self._lock:
+            text = self._names.pop((kind, pk), None)
+            if text is None:
+                return
+            for key in word_starts(normalize(text)):
+                position = bisect_left(self._keys, (key, kind, pk))
+                if position < len(self._keys) and self._keys[position] == (key, kind, pk):
+                    del self._keys[position]
+
+    def search(self, prefix, kinds=(TITLE, AUTHOR), limit=10):
+        """[(kind, id, text)] whose name has a word starting with the prefix"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results, seen = [], set()
+        with self._lock:
+            keys = self._keys
+            position = bisect_left(keys, (prefix,))
+            while position < len(keys) and len(results) < limit:
+                key, kind, pk = keys[position]
+                if not key.startswith(prefix):
+                    break
+                if kind in kinds and (kind, pk) not in seen:
+                    seen.add((kind, pk))
+                    results.append((kind, pk, self._names[(kind, pk)]))
+                position += 1
+        return results
+
+
+class CatalogueIndex(PrefixIndex):
+    """PrefixIndex of book titles and author names, loaded from the database"""
+
+    def __init__(self):
+        super().__init__()
+        self.built_at = None
+
+    def rebuild(self):
+        from api.models import Author, Book
+
+        items = [(TITLE, pk, title) for pk, title in Book.objects.values_list('id', 'title').iterator()]
+        items += [(AUTHOR, pk, name) for pk, name in Author.objects.values_list('id', 'name').iterator()]
+        self.load(items)
+        self.built_at = time.monotonic()
+
+    def ensure_built(self):
+        interval = getattr(settings, 'AUTOCOMPLETE_REBUILD_INTERVAL', 600)
+        if self.built_at is None or (interval and time.monotonic() - self.built_at > interval):
+            with self._lock:
+                if self.built_at is None or (interval and time.monotonic() - self.built_at > interval):
+                    self.rebuild()
+
+    def search(self, prefix, kinds=(TITLE, AUTHOR), limit=10):
+        self.ensure_built()
+        return super().search(prefix, kinds, limit)
+
+    def add(self, kind, pk, text):
+        # before the first build the whole table is read anyway
+        if self.built_at is not None:
+            super().add(kind, pk, text)
+
+    def remove(self, kind, pk):
+        if self.built_at is not None:
+            super().remove(kind, pk)
+
+
+catalogue_index = CatalogueIndex()
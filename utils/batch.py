@@ -0,0 +1,146 @@
+"""
+Batched reads: /api/batch/ runs several GET requests of the API in one round trip.
+
+Each sub-request is resolved and handed straight to its view, with the batch
+request's principal forced onto it, so the JWT is decoded and the user and
+roles are looked up once for the whole batch. Views render their responses as
+usual (caches, sparse fieldsets, envelopes) and the JSON bodies are spliced
+into the batch body as they are, without decoding them again.
+
+Sub-requests run on a thread pool of at most BATCH_MAX_CONCURRENCY workers;
+every worker closes its database connection when its request is done. Inside
+a transaction (ATOMIC_REQUESTS, tests) they run one after another on the
+calling connection instead, since other connections would not see its rows.
+"""
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.db import connection, connections
+from django.http import HttpRequest, HttpResponse, QueryDict
+from django.urls import Resolver404, resolve
+
+from utils.permissions import get_role_resolver
+
+logger = logging.getLogger('django.request')
+
+BATCH_METHODS = ('GET',)
+# request headers a sub-request must not inherit: the batch body, validators
+# meant for the batch response and encodings only the middleware applies
+DROPPED_META = (
+    'wsgi.input', 'CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_ACCEPT_ENCODING',
+    'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE',
+)
+
+
+class BatchError(ValueError):
+    """A sub-request that cannot be dispatched; reported as its own response"""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def parse_item(item, batch_path):
+    """(method, path, query string) of one sub-request description"""
+    if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+        raise BatchError(400, "Every sub-request needs a 'path'")
+    method = str(item.get('method') or 'GET').upper()
+    if method not in BATCH_METHODS:
+        raise BatchError(405, f"Method {method} is not allowed in a batch")
+
+    parts = urlsplit(item['path'])
+    query = item.get('query') or {}
+    if isinstance(query, dict):
+        query = urlencode(query, doseq=True)
+    elif not isinstance(query, str):
+        raise BatchError(400, "'query' must be an object or a query string")
+    query = '&'.join(part for part in (parts.query, query) if part)
+    if parts.path.rstrip('/') == batch_path.rstrip('/'):
+        raise BatchError(400, "A batch cannot contain itself")
+    return method, parts.path, query
+
+
+def build_request(request, method, path, query):
+    """A bare HttpRequest for the sub-request, authenticated as the batch request"""
+    sub = HttpRequest()
+    sub.method = method
+    sub.path = sub.path_info = path
+    sub.META = {key: value for key, value in request.META.items() if key not in DROPPED_META}
+    sub.META.update(REQUEST_METHOD=method, PATH_INFO=path, QUERY_STRING=query, HTTP_ACCEPT='application/json')
+    sub.GET = QueryDict(query)
+    # picked up by rest_framework.request.Request in place of the authentication classes
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    sub._role_resolver = get_role_resolver(request)
+    return sub
+
+
+def dispatch(request, item):
+    """(status code, JSON body bytes) of one sub-request"""
+    try:
+        method, path, query = parse_item(item, request.path)
+        try:
+            match = resolve(path)
+        except Resolver404:
+            raise BatchError(404, f"No API route matches {path}")
+        sub = build_request(request, method, path, query)
+        sub.resolver_match = match
+        response = match.func(sub, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+    except BatchError as exc:
+        return exc.status_code, error_body(exc.status_code, str(exc))
+    except Exception as exc:
+        logger.exception('Batch sub-request %r failed', item)
+        return 500, error_body(500, f"Sub-request failed: {exc}")
+
+    content = response.content
+    if not response.get('Content-Type', '').startswith('application/json'):
+        content = json.dumps(content.decode(response.charset or 'utf-8', 'replace')).encode()
+    return response.status_code, content or b'null'
+
+
+def error_body(status_code, message):
+    return json.dumps({"code": status_code, "data": {"success": False, "message": message}}).encode()
+
+
+def timed(request, index, item):
+    started = time.perf_counter()
+    status_code, body = dispatch(request, item)
+    duration = (time.perf_counter() - started) * 1000
+    head = {
+        "id": item.get('id', index) if isinstance(item, dict) else index,
+        "status": status_code,
+        "duration_ms": round(duration, 2),
+    }
+    # the sub-response body goes in as the last member, unparsed
+    return json.dumps(head)[:-1].encode() + b', "body": ' + body + b'}'
+
+
+def run_in_worker(request, index, item):
+    try:
+        return timed(request, index, item)
+    finally:
+        connections.close_all()
+
+
+def run_batch(request, items, max_workers=None):
+    """The enveloped JSON response for a list of sub-request descriptions"""
+    if max_workers is None:
+        max_workers = getattr(settings, 'BATCH_MAX_CONCURRENCY', 4)
+    started = time.perf_counter()
+    get_role_resolver(request)  # resolved once here, shared by every sub-request
+    if max_workers <= 1 or len(items) <= 1 or connection.in_atomic_block:
+        parts = [timed(request, index, item) for index, item in enumerate(items)]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix='batch') as pool:
+            parts = list(pool.map(run_in_worker, [request] * len(items), range(len(items)), items))
+    duration = (time.perf_counter() - started) * 1000
+
+    body = (b'{"code": 0, "data": {"duration_ms": ' + json.dumps(round(duration, 2)).encode()
+            + b', "responses": [' + b', '.join(parts) + b']}}')
+    return HttpResponse(body, content_type='application/json')
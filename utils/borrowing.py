@@ -0,0 +1,236 @@
+"""
+Borrow record state transitions.
+
+Each transition is a conditional UPDATE of the record (WHERE status = <the
+state it leaves>) checked by its row count, plus at most one F() UPDATE of
+the book row, in one transaction. Two librarians acting on the same request,
+or approving two requests for the same book, cannot both succeed: the losing
+UPDATE matches no row and the caller gets False. The transitions take the
+record the view already loaded (for permissions and the response) and update
+its in-memory fields on success.
+
+pending  -> borrowed   approve_borrow (only while no other record of the book is borrowed)
+pending  -> rejected   reject_borrow
+borrowed -> pending    request_return (a return request is a pending record again)
+approval -> returned   confirm_return
+
+bulk_decide() applies many approvals / rejections with set-based UPDATEs;
+book_status() and user_overlay() describe the records from a reader's side.
+"""
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Subquery
+from django.utils import timezone
+
+from utils import counters
+from utils.cache import bump_model_version
+
+LOAN_DAYS = 15
+
+# user-friendly description and button text of the latest record of a book
+STATUS_DESCRIPTIONS = {
+    'pending': 'Your borrowing request is awaiting approval',
+    'borrowed': 'You have successfully borrowed this book',
+    'returned': 'You have returned this book',
+    'rejected': 'Your borrowing request has been rejected',
+    'approval': 'Your return request is awaiting approval',
+}
+BUTTON_TEXTS = {
+    'pending': 'Pending',
+    'borrowed': 'Borrowed',
+    'returned': 'Returned',
+    'rejected': 'Rejected',
+    'available': 'Available',
+    'approval': 'Return Processing',
+}
+# after returning or rejection the book can be borrowed again
+REBORROWABLE_STATUSES = ('returned', 'rejected')
+
+
+def _transition(record, from_status, **values):
+    """UPDATE the record if it is still in from_status; True when it was"""
+    from api.models import BorrowRecord
+
+    values.setdefault('updated_at', timezone.now())
+    queryset = BorrowRecord.objects.filter(pk=record.pk, status=from_status)
+    if values['status'] == 'borrowed':
+        queryset = queryset.exclude(Exists(
+            BorrowRecord.objects.filter(book_id=OuterRef('book_id'), status='borrowed').exclude(pk=record.pk)
+        ))
+    if not queryset.update(**values):
+        return False
+    bump_model_version(BorrowRecord)
+    for name, value in values.items():
+        setattr(record, name, value)
+    return True
+
+
+def approve_borrow(record):
+    now = timezone.now()
+    with transaction.atomic():
+        if not _transition(record, 'pending', status='borrowed', updated_at=now,
+                           return_date=now + timezone.timedelta(days=LOAN_DAYS)):
+            return False
+        counters.status_changed(record.book_id, 'pending', 'borrowed', is_available=False)
+    return True
+
+
+def reject_borrow(record):
+    return _transition(record, 'pending', status='rejected')
+
+
+def request_return(record):
+    with transaction.atomic():
+        if not _transition(record, 'borrowed', status='pending'):
+            return False
+        counters.status_changed(record.book_id, 'borrowed', 'pending')
+    return True
+
+
+def confirm_return(record):
+    with transaction.atomic():
+        if not _transition(record, 'approval', status='returned'):
+            return False
+        counters.status_changed(record.book_id, 'approval', 'returned', is_available=True)
+    return True
+
+
+def conflict_reason(record):
+    """Why a transition found nothing to update: the record moved on, or the book is out"""
+    from api.models import BorrowRecord
+
+    current = BorrowRecord.objects.filter(pk=record.pk).values_list('status', flat=True).first()
+    if current is None:
+        return "Borrow record does not exist"
+    if current != record.status:
+        return f"Borrow record is already '{current}'"
+    return "The book is already borrowed by another reader"
+
+
+def bulk_decide(decisions):
+    """
+    Approve or reject many pending records at once: decisions is
+    [(record_id, 'borrowed' | 'rejected')], results come back in the same
+    order as {'id', 'status', 'success', 'error'}.
+
+    The records are read once (locked for the transaction: BEGIN IMMEDIATE
+    on SQLite, SELECT ... FOR UPDATE elsewhere), then written with one UPDATE
+    for the rejections, one for the approvals and one for their books,
+    whatever the number of ids. Approvals follow the single-record rule:
+    the first approval of a book wins, later ones and books already out fail.
+    """
+    from api.models import Book, BorrowRecord
+
+    results = [{'id': record_id, 'status': None, 'success': False, 'error': None} for record_id, _ in decisions]
+    seen = set()
+    for result, (record_id, target) in zip(results, decisions):
+        if target not in ('borrowed', 'rejected'):
+            result['error'] = "Approval status must be 'borrowed'(approve) or 'rejected'(reject)"
+        elif record_id in seen:
+            result['error'] = "Duplicate record id"
+        seen.add(record_id)
+
+    now = timezone.now()
+    with transaction.atomic():
+        records = {
+            pk: (status, book_id) for pk, status, book_id in
+            BorrowRecord.objects.select_for_update().filter(pk__in=seen).values_list('id', 'status', 'book_id')
+        }
+        requested_books = {records[record_id][1] for record_id, target in decisions
+                           if target == 'borrowed' and record_id in records}
+        borrowed_books = set(BorrowRecord.objects.filter(book_id__in=requested_books, status='borrowed')
+                             .values_list('book_id', flat=True))
+
+        approved, rejected = {}, []
+        for result, (record_id, target) in zip(results, decisions):
+            if result['error']:
+                continue
+            if record_id not in records:
+                result['error'] = "Borrow record does not exist"
+                continue
+            current, book_id = records[record_id]
+            if current != 'pending':
+                result['error'] = f"Borrow record is already '{current}'"
+            elif target == 'rejected':
+                rejected.append(record_id)
+            elif book_id in borrowed_books or book_id in approved:
+                result['error'] = "The book is already borrowed by another reader"
+            else:
+                approved[book_id] = record_id
+            if result['error'] is None:
+                result.update(status=target, success=True)
+
+        if rejected:
+            BorrowRecord.objects.filter(pk__in=rejected, status='pending').update(status='rejected', updated_at=now)
+        if approved:
+            BorrowRecord.objects.filter(pk__in=list(approved.values()), status='pending').update(
+                status='borrowed', updated_at=now, return_date=now + timezone.timedelta(days=LOAN_DAYS))
+            # at most one approval per book, so +1 is exact
+            Book.objects.filter(pk__in=approved).update(
+                is_available=False, updated_at=now,
+                borrow_count=F('borrow_count') + 1, active_borrow_count=F('active_borrow_count') + 1)
+    if rejected or approved:
+        bump_model_version(BorrowRecord)
+    if approved:
+        bump_model_version(Book)
+    return results
+
+
+def book_status(book_id, record_status=None, record_id=None, borrow_date=None, return_date=None):
+    """The check-book-status payload for the user's latest record of a book (None: no record)"""
+    if record_status is None or record_status in REBORROWABLE_STATUSES:
+        return {
+            "book_id": book_id,
+            "status": "available",
+            "status_description": "This book is currently available for borrowing",
+            "button_text": BUTTON_TEXTS['available'],
+            "can_borrow": True
+        }
+
+    data = {
+        "book_id": book_id,
+        "status": record_status,
+        "record_id": record_id,
+        "borrow_date": borrow_date,
+        "status_description": STATUS_DESCRIPTIONS.get(record_status, "Unknown status"),
+        "button_text": BUTTON_TEXTS.get(record_status, "Available"),
+        "can_borrow": False,
+    }
+    if return_date and record_status == 'borrowed':
+        return_day = return_date.date()
+        data["return_date"] = return_date
+        data["expected_return_date"] = return_date
+        data["days_remaining"] = (return_day - timezone.now().date()).days
+        data["return_date_info"] = f"Should be returned on {return_day.strftime('%Y-%m-%d')}"
+    return data
+
+
+def user_overlay(user_id, book_ids):
+    """
+    {book_id: book_status(...) + {'rating': {...} | None}} for the books that
+    exist, in two queries: the books with the user's latest record of each
+    as correlated subqueries, then the user's ratings of them.
+    """
+    from api.models import Book, BorrowRecord, Rating
+
+    books = Book.objects.filter(pk__in=book_ids).order_by()
+    if user_id is None:
+        return {book_id: {**book_status(book_id), 'rating': None}
+                for book_id in books.values_list('id', flat=True)}
+
+    latest = (BorrowRecord.objects.filter(user_id=user_id, book_id=OuterRef('pk'))
+              .order_by('-borrow_date', '-id'))
+    fields = ('id', 'status', 'borrow_date', 'return_date')
+    rows = books.annotate(**{f'record_{field}': Subquery(latest.values(field)[:1]) for field in fields}).values(
+        'id', *(f'record_{field}' for field in fields))
+    overlay = {
+        row['id']: {**book_status(row['id'], row['record_status'], row['record_id'],
+                                  row['record_borrow_date'], row['record_return_date']), 'rating': None}
+        for row in rows
+    }
+
+    if overlay:
+        ratings = Rating.objects.filter(user_id=user_id, book_id__in=list(overlay)).values(
+            'book_id', 'score', 'comment', 'created_at')
+        for rating in ratings:
+            overlay[rating.pop('book_id')]['rating'] = rating
+    return overlay
@@ -0,0 +1,146 @@
+"""
+Per-model write versions.
+
+Every create, update and delete of an api model bumps the model's version
+(see api/signals.py); bulk writes that bypass signals must call
+bump_model_version themselves. Caches derived from querysets put the versions
+of every table they read into their keys, so a write anywhere in those tables
+makes old entries unreachable instead of having to delete them.
+
+Versions only reach other processes (workers, management commands) through a
+shared cache backend, see CACHES in settings; check_shared_cache warns when
+the default cache is process-local.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.apps import apps
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import transaction
+
+from utils.compression import precompress
+
+VERSION_KEY_PREFIX = 'model_version'
+
+
+def _version_key(model):
+    return f"{VERSION_KEY_PREFIX}:{model._meta.label_lower}"
+
+
+def get_model_version(model):
+    """Current write version of the model"""
+    key = _version_key(model)
+    version = cache.get(key)
+    if version is None:
+        # start from the clock so a flushed or restarted cache never reuses an old version
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _next_version(models):
+    for model in models:
+        key = _version_key(model)
+        # the clock keeps versions unique across processes without an atomic increment
+        cache.set(key, max(int(time.time() * 1000), (cache.get(key) or 0) + 1), timeout=None)
+
+
+def bump_model_version(*models):
+    """
+    Invalidate every cache entry keyed on the given models. Inside a
+    transaction the versions are bumped again on commit: a read between the
+    first bump and the commit may have cached the old rows under the new version.
+    """
+    _next_version(models)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _next_version(models))
+
+
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Model versions bumped by one process must be seen by all of them"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend not in PROCESS_LOCAL_BACKENDS:
+        return []
+    return [checks.Warning(
+        f"The default cache ({backend}) is not shared between processes",
+        hint="Writes from other workers and from management commands will not invalidate cached "
+             "responses, counts and ETags; configure a file, Redis or Memcached cache in CACHES",
+        id='api.W001',
+    )]
+
+
+def get_models_version(models):
+    """Combined version stamp of several models"""
+    return '.'.join(str(get_model_version(model)) for model in models)
+
+
+def _models_by_table():
+    return {model._meta.db_table: model for model in apps.get_models()}
+
+
+def get_queryset_models(queryset):
+    """Models of every table the queryset reads (base table and joins)"""
+    tables = _models_by_table()
+    models = [queryset.model]
+    for join in queryset.query.alias_map.values():
+        model = tables.get(join.table_name)
+        if model is not None and model not in models:
+            models.append(model)
+    return models
+
+
+def queryset_cache_key(prefix, queryset):
+    """
+    Cache key for a value derived from the queryset: its SQL, its parameters
+    and the write versions of every table it touches
+    """
+    sql, params = queryset.query.sql_with_params()
+    models = get_queryset_models(queryset)
+    digest = hashlib.md5(f"{sql}|{params!r}".encode('utf-8')).hexdigest()
+    return f"{prefix}:{queryset.model._meta.label_lower}:{get_models_version(models)}:{digest}"
+
+
+# Cached HTTP responses
+#
+# List responses of the public catalogue are stored already rendered (and
+# compressed when large enough) under the request URL, the audience and the write
+# versions of the models the response is built from.
+
+RESPONSE_CACHE_PREFIX = 'response'
+
+
+def normalized_query_string(query_params):
+    """Query string with parameters and their values in a stable order"""
+    pairs = sorted((key, value) for key, values in query_params.lists() for value in values)
+    return urlencode(pairs)
+
+
+def response_cache_key(request, models, audience):
+    """
+    Cache key of a rendered response: host, path, normalized query string,
+    negotiated media type and audience, under the models' write versions
+    """
+    media_type = getattr(request, 'accepted_media_type', '') or ''
+    raw = '|'.join([request.get_host(), request.path, normalized_query_string(request.query_params),
+                    media_type, audience])
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f"{RESPONSE_CACHE_PREFIX}:{models[0]._meta.label_lower}:{get_models_version(models)}:{digest}"
+
+
+def cache_response_body(key, content_type, body, timeout, precompress_min_size=None):
+    """Store a rendered body, with compressed copies when it is big enough"""
+    entry = {'content_type': content_type, 'body': body, 'precompressed': {}}
+    if precompress_min_size is not None and len(body) >= precompress_min_size:
+        entry['precompressed'] = precompress(body)
+    cache.set(key, entry, timeout)
+    return entry
@@ -0,0 +1,228 @@
+"""
+Streaming bulk import of books, with their authors and categories, from CSV or JSONL.
+
+Rows are read one at a time from the stream (title, author, category and an
+optional description per row) and written in chunks: each chunk is one
+transaction holding a bulk_create of its new authors, its new categories and
+its books. Author and category names resolve through name -> id maps loaded
+once, and titles are deduplicated against the set of existing titles, so an
+import issues a handful of queries per chunk instead of several per book.
+A failing chunk is rolled back and ends the run; earlier chunks stay. An
+unreadable record (bad UTF-8, broken CSV) ends it too, after the rows read
+before it are written. Either way run.failure says where to resume.
+
+bulk_create sends no post_save signals, so each chunk does what the signals
+would have: it indexes its books for full-text search, adds titles and
+authors to the autocomplete index and bumps the model versions.
+"""
+import csv
+import io
+import json
+import time
+
+from django.db import DatabaseError, transaction
+
+from utils import search
+from utils.autocomplete import AUTHOR, TITLE, catalogue_index
+from utils.cache import bump_model_version
+
+FORMATS = ('csv', 'jsonl')
+FIELDS = ('title', 'author', 'category')
+# rows per transaction, and rows per INSERT statement within it
+CHUNK_SIZE = 5000
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(filename, default='csv'):
+    name = (filename or '').lower()
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    if name.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def read_rows(stream, fmt):
+    """(line number, row dict or None when unparseable) for every record of a text stream"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+    else:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {', '.join(FORMATS)}")
+
+
+def text_stream(binary):
+    """Decode an uploaded or opened binary file as it is read"""
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+def clean(row):
+    """(title, author, category, description) of a row, or the reason it is rejected"""
+    if row is None:
+        return None, "Unparseable record"
+    values = {field: str(row.get(field) or '').strip() for field in FIELDS}
+    missing = [field for field in FIELDS if not values[field]]
+    if missing:
+        return None, f"Missing {', '.join(missing)}"
+    if any(len(value) > 255 for value in values.values()):
+        return None, "Title, author and category are limited to 255 characters"
+    description = row.get('description')
+    return (values['title'], values['author'], values['category'],
+            str(description) if description not in (None, '') else None), None
+
+
+def name_map(model):
+    """name -> id, the oldest row winning like get_or_create's first match"""
+    names = {}
+    for pk, name in model.objects.order_by('id').values_list('id', 'name').iterator():
+        names.setdefault(name, pk)
+    return names
+
+
+class CatalogueImport:
+    """One import run; feed it rows with run() and read the counts off the instance"""
+
+    def __init__(self, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE):
+        from api.models import Author, Book, Category
+
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.authors = name_map(Author)
+        self.categories = name_map(Category)
+        self.titles = set(Book.objects.values_list('title', flat=True).iterator())
+        self.rows = self.created = self.duplicates = self.invalid = 0
+        self.authors_created = self.categories_created = 0
+        self.errors = []
+        self.failure = None
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def report(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'duplicates': self.duplicates,
+            'invalid': self.invalid,
+            'authors_created': self.authors_created,
+            'categories_created': self.categories_created,
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'errors': [{'line': line, 'error': error} for line, error in self.errors],
+            'completed': self.failure is None,
+            'failure': self.failure,
+        }
+
+    def fail(self, stage, first_line, last_line, exc):
+        """Stop the run at these lines: stage is 'input' (unreadable) or 'database' (chunk rolled back)"""
+        self.failure = {'stage': stage, 'first_line': first_line, 'last_line': last_line, 'error': str(exc)}
+
+    def reject(self, line, error):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, error))
+
+    def run(self, records, progress=None):
+        """Import (line, row) pairs; progress(self) is called after every chunk"""
+        started = time.perf_counter()
+        chunk = []
+        line = 0
+        try:
+            for line, row in records:
+                self.rows += 1
+                values, error = clean(row)
+                if error:
+                    self.reject(line, error)
+                    continue
+                if values[0] in self.titles:
+                    self.duplicates += 1
+                    continue
+                self.titles.add(values[0])
+                chunk.append((line, values))
+                if len(chunk) >= self.chunk_size:
+                    written = self.flush(chunk)
+                    chunk = []
+                    self.seconds = time.perf_counter() - started
+                    if not written:
+                        break
+                    if progress:
+                        progress(self)
+        except (UnicodeDecodeError, csv.Error) as exc:
+            # the rows read before the unreadable one are still written
+            if self.flush(chunk):
+                self.fail('input', line + 1, line + 1, exc)
+            chunk = []
+        self.flush(chunk)
+        self.seconds = time.perf_counter() - started
+        return self
+
+    def flush(self, chunk):
+        """Write (line, values) pairs; False, with the failure recorded, when the chunk was rolled back"""
+        if not chunk:
+            return True
+        try:
+            self.write([values for _, values in chunk])
+        except DatabaseError as exc:
+            self.fail('database', chunk[0][0], chunk[-1][0], exc)
+            return False
+        return True
+
+    def resolve(self, model, names, known):
+        """Create the names missing from the known map, add their ids to it and return them"""
+        missing = list(dict.fromkeys(name for name in names if name not in known))
+        if not missing:
+            return []
+        created = model.objects.bulk_create([model(name=name) for name in missing], batch_size=self.batch_size)
+        if all(obj.pk is not None for obj in created):
+            known.update((obj.name, obj.pk) for obj in created)
+        else:
+            # backends that cannot return ids from a bulk insert
+            for pk, name in model.objects.filter(name__in=missing).order_by('id').values_list('id', 'name'):
+                known.setdefault(name, pk)
+        return missing
+
+    def write(self, chunk):
+        from api.models import Author, Book, Category
+
+        with transaction.atomic():
+            new_authors = self.resolve(Author, (author for _, author, _, _ in chunk), self.authors)
+            new_categories = self.resolve(Category, (category for _, _, category, _ in chunk), self.categories)
+            books = Book.objects.bulk_create([
+                Book(title=title, description=description,
+                     author_id=self.authors[author], category_id=self.categories[category])
+                for title, author, category, description in chunk
+            ], batch_size=self.batch_size)
+            if any(book.pk is None for book in books):
+                ids = dict(Book.objects.filter(title__in=[book.title for book in books]).values_list('title', 'id'))
+                for book in books:
+                    book.pk = ids[book.title]
+            for start in range(0, len(books), self.batch_size):
+                part = [book.pk for book in books[start:start + self.batch_size]]
+                search.index_books(f"WHERE book.id IN ({', '.join(['%s'] * len(part))})", part)
+
+        self.created += len(books)
+        self.authors_created += len(new_authors)
+        self.categories_created += len(new_categories)
+        for name in new_authors:
+            catalogue_index.add(AUTHOR, self.authors[name], name)
+        for book in books:
+            catalogue_index.add(TITLE, book.pk, book.title)
+        bump_model_version(Book, Author, Category)
+
+
+def import_catalogue(stream, fmt, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE, progress=None):
+    """Import a text stream of CSV or JSONL rows; returns the finished CatalogueImport"""
+    return CatalogueImport(chunk_size, batch_size).run(read_rows(stream, fmt), progress)
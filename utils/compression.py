@@ -0,0 +1,201 @@
+"""
+Response compression.
+
+CompressionMiddleware negotiates br (when the brotli package is installed) or
+gzip from Accept-Encoding, leaves bodies under COMPRESSION_MIN_SIZE alone and
+reuses the compressed copies the response cache stored with the entry
+(response.precompressed). Bytes saved are counted per route: each process
+sums them in memory and, once the request is finished (request_finished, after
+the response went out), adds them to the CompressionStat rows if
+COMPRESSION_STATS_FLUSH_INTERVAL seconds have passed, so the compression_stats
+command sees every serving process without the middleware ever writing to the
+database. Counts of a process's last interval are lost if it exits before
+flushing.
+"""
+import gzip
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip only
+    brotli = None
+
+logger = logging.getLogger('compression')
+
+# route -> [responses, original bytes, compressed bytes] not yet written to the database
+_pending = defaultdict(lambda: [0, 0, 0])
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+COMPRESSIBLE_TYPES_RE = re.compile(r'^(text/|application/(json|javascript|xml|.*\+json|.*\+xml))')
+ACCEPT_ENCODING_RE = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def available_encodings():
+    """Encodings this server can produce, in order of preference"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(body, encoding, precompress=False):
+    """Compress bytes; precompressed cache entries are written once and may use a slower level"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=9 if precompress else 5)
+    return gzip.compress(body, compresslevel=9 if precompress else 6, mtime=0)
+
+
+def precompress(body):
+    """Compressed copies of a body for every available encoding"""
+    return {encoding: compress(body, encoding, precompress=True) for encoding in available_encodings()}
+
+
+def choose_encoding(accept_encoding, encodings=None):
+    """Best encoding accepted by the client (highest q, then server preference), or None"""
+    encodings = encodings or available_encodings()
+    weights = {}
+    for item in accept_encoding.split(','):
+        match = ACCEPT_ENCODING_RE.match(item)
+        if not match:
+            continue
+        try:
+            weights[match.group(1).lower()] = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+    best, best_weight = None, 0
+    for encoding in encodings:
+        weight = weights.get(encoding, weights.get('*', 0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else request.path
+
+
+def record_saving(route, original_size, compressed_size):
+    """Add one compressed response to this process's counters"""
+    with _pending_lock:
+        row = _pending[route]
+        row[0] += 1
+        row[1] += original_size
+        row[2] += compressed_size
+
+
+@receiver(request_finished)
+def flush_due_compression_stats(**kwargs):
+    """Write the counters once the interval has passed, outside the request/response path"""
+    global _last_flush
+    with _pending_lock:
+        now = time.monotonic()
+        due = bool(_pending) and now - _last_flush >= getattr(settings, 'COMPRESSION_STATS_FLUSH_INTERVAL', 60)
+        if due:
+            _last_flush = now
+    if due:
+        flush_compression_stats()
+
+
+def flush_compression_stats():
+    """Add this process's pending counters to the CompressionStat rows"""
+    from api.models import CompressionStat
+
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not pending:
+        return
+    try:
+        with transaction.atomic():
+            for route, (responses, original, compressed) in pending.items():
+                updated = CompressionStat.objects.filter(route=route).update(
+                    responses=F('responses') + responses,
+                    original_bytes=F('original_bytes') + original,
+                    compressed_bytes=F('compressed_bytes') + compressed,
+                )
+                if not updated:
+                    CompressionStat.objects.create(route=route, responses=responses, original_bytes=original,
+                                                   compressed_bytes=compressed)
+    except DatabaseError:
+        logger.warning("Compression stats of %d routes not saved", len(pending), exc_info=True)
+
+
+def get_compression_stats():
+    """{route: {'responses', 'original', 'compressed', 'saved'}} since the counters were reset"""
+    from api.models import CompressionStat
+
+    flush_compression_stats()
+    return {
+        stat.route: {'responses': stat.responses, 'original': stat.original_bytes,
+                     'compressed': stat.compressed_bytes, 'saved': stat.original_bytes - stat.compressed_bytes}
+        for stat in CompressionStat.objects.order_by('route')
+    }
+
+
+def reset_compression_stats():
+    from api.models import CompressionStat
+
+    with _pending_lock:
+        _pending.clear()
+    CompressionStat.objects.all().delete()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress JSON / text responses for clients that accept br or gzip"""
+
+    def process_response(self, request, response):
+        if not 200 <= response.status_code < 300 or response.has_header('Content-Encoding'):
+            return response
+        if not COMPRESSIBLE_TYPES_RE.match(response.get('Content-Type', '')):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+
+        if response.streaming:
+            # size is unknown up front, compress on the fly with gzip
+            if choose_encoding(accept_encoding, ('gzip',)) is None:
+                return response
+            response.streaming_content = compress_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+            return self.mark_encoded(response, 'gzip')
+
+        encoding = choose_encoding(accept_encoding)
+        original_size = len(response.content)
+        if encoding is None or original_size < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+            return response
+
+        stored = getattr(response, 'precompressed', None) or {}
+        body = stored.get(encoding)
+        if body is None:
+            body = compress(response.content, encoding)
+        if len(body) >= original_size:
+            return response
+
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        route = route_name(request)
+        record_saving(route, original_size, len(body))
+        logger.debug("%s: %s %d -> %d bytes", route, encoding, original_size, len(body))
+        return self.mark_encoded(response, encoding)
+
+    @staticmethod
+    def mark_encoded(response, encoding):
+        # the encoded bytes differ from the identity representation
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
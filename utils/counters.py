@@ -0,0 +1,103 @@
+"""
+Denormalized borrow and rating counters on Book.
+
+borrow_count        approved borrows, current or past (status borrowed / returned)
+active_borrow_count records currently in status borrowed
+rating_count, rating_sum, avg_rating  from Rating
+
+Both borrow counters count records by status, in the write paths as in
+reconcile(): a transition adds or removes one for every status set
+(BORROWED_STATUSES, ACTIVE_STATUSES) the record enters or leaves, see
+status_changed(). A return request (borrowed -> pending) therefore takes the
+record out of borrow_count until it is approved again.
+
+The write paths change them with a single F() UPDATE of the book row, so
+concurrent approvals or ratings never lose an increment. These UPDATEs
+bypass save() and its signals: they stamp updated_at for delta sync and bump
+the Book version for the caches themselves. reconcile() recomputes the
+counters from the source tables and repairs books that drifted.
+"""
+from django.db.models import Avg, Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.utils import timezone
+
+from utils.cache import bump_model_version
+
+BORROWED_STATUSES = ('borrowed', 'returned')
+ACTIVE_STATUSES = ('borrowed',)
+COUNTER_FIELDS = ('borrow_count', 'active_borrow_count', 'rating_count', 'rating_sum', 'avg_rating')
+
+
+def update_book(book_id, **values):
+    """One UPDATE of the book row, stamped and version-bumped like a save()"""
+    from api.models import Book
+
+    values.setdefault('updated_at', timezone.now())
+    updated = Book.objects.filter(pk=book_id).update(**values)
+    bump_model_version(Book)
+    return updated
+
+
+def status_changed(book_id, old_status, new_status, **values):
+    """A record of the book moved from old_status to new_status"""
+    for field, statuses in (('borrow_count', BORROWED_STATUSES), ('active_borrow_count', ACTIVE_STATUSES)):
+        delta = (new_status in statuses) - (old_status in statuses)
+        if delta:
+            values[field] = Greatest(F(field) + delta, 0)
+    return update_book(book_id, **values) if values else 0
+
+
+def rating_added(book_id, score):
+    # the right-hand sides read the values before the update
+    return update_book(book_id,
+                       rating_count=F('rating_count') + 1,
+                       rating_sum=F('rating_sum') + score,
+                       avg_rating=Cast(F('rating_sum') + score, FloatField()) / (F('rating_count') + 1))
+
+
+def counter_expressions(borrow_record_model, rating_model):
+    """Correlated subqueries computing every counter of the outer book from the source tables"""
+    def per_book(queryset, aggregate):
+        return Subquery(queryset.filter(book=OuterRef('pk')).order_by().values('book')
+                        .annotate(value=aggregate).values('value'))
+
+    borrows = borrow_record_model.objects
+    ratings = rating_model.objects.all()
+    return {
+        'borrow_count': Coalesce(per_book(borrows.filter(status__in=BORROWED_STATUSES), Count('id')), 0),
+        'active_borrow_count': Coalesce(per_book(borrows.filter(status__in=ACTIVE_STATUSES), Count('id')), 0),
+        'rating_count': Coalesce(per_book(ratings, Count('id')), 0),
+        'rating_sum': Coalesce(per_book(ratings, Sum('score')), 0),
+        'avg_rating': Coalesce(per_book(ratings, Avg('score')), Value(0.0)),
+    }
+
+
+def reconcile(dry_run=False):
+    """
+    Books whose stored counters differ from the source tables, as
+    [{'id', 'title', 'changes': {field: (stored, expected)}}]; fixed with one
+    set-based UPDATE unless dry_run.
+    """
+    from api.models import Book, BorrowRecord, Rating
+
+    expressions = counter_expressions(BorrowRecord, Rating)
+    drift = Q()
+    for field in COUNTER_FIELDS:
+        drift |= ~Q(**{field: F(f'expected_{field}')})
+    rows = list(
+        Book.objects.annotate(**{f'expected_{field}': expression for field, expression in expressions.items()})
+        .filter(drift).order_by('id')
+        .values('id', 'title', *COUNTER_FIELDS, *(f'expected_{field}' for field in COUNTER_FIELDS))
+    )
+    drifted = [
+        {'id': row['id'], 'title': row['title'], 'changes': {
+            field: (row[field], row[f'expected_{field}'])
+            for field in COUNTER_FIELDS if row[field] != row[f'expected_{field}']
+        }}
+        for row in rows
+    ]
+
+    if drifted and not dry_run:
+        Book.objects.filter(pk__in=[item['id'] for item in drifted]).update(updated_at=timezone.now(), **expressions)
+        bump_model_version(Book)
+    return drifted
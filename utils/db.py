@@ -0,0 +1,83 @@
+"""
+SQLite connection setup.
+
+configure_connection() runs for every new connection (connection_created
+signal, connected in ApiConfig.ready): it applies SQLITE_PRAGMAS (WAL so
+readers never wait for the writer, synchronous=NORMAL, a larger page cache,
+mmap and in-memory temp tables) and installs retry_on_busy, which retries a
+statement that failed with "database is locked" after exponential backoff.
+
+Only statements outside a transaction are retried, plus the BEGIN that
+opens one: with transaction_mode IMMEDIATE the write lock is taken at BEGIN,
+so that is where contention shows up and a retry is still safe. Connections
+are kept per thread for CONN_MAX_AGE seconds (see DATABASES in settings).
+"""
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError
+
+logger = logging.getLogger('db')
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,  # KiB, i.e. 64 MB
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+BUSY_MESSAGES = ('database is locked', 'database table is locked', 'database is busy')
+
+
+def get_pragmas():
+    return getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_PRAGMAS)
+
+
+def apply_pragmas(cursor, pragmas=None):
+    """Run PRAGMA name = value for every item; works on Django and sqlite3 cursors"""
+    for name, value in (get_pragmas() if pragmas is None else pragmas).items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_busy_error(exc):
+    return any(message in str(exc) for message in BUSY_MESSAGES)
+
+
+def backoff_delays(retries=None, backoff=None):
+    """Exponential delays with jitter: ~backoff, 2*backoff, 4*backoff ..."""
+    retries = getattr(settings, 'SQLITE_BUSY_RETRIES', 3) if retries is None else retries
+    backoff = getattr(settings, 'SQLITE_BUSY_BACKOFF', 0.05) if backoff is None else backoff
+    return [backoff * 2 ** attempt * random.uniform(0.5, 1.5) for attempt in range(retries)]
+
+
+def call_with_retry(func, *args, delays=None, errors=(OperationalError,), **kwargs):
+    """Call func, sleeping and calling again while it fails with a busy error"""
+    for delay in backoff_delays() if delays is None else delays:
+        try:
+            return func(*args, **kwargs)
+        except errors as exc:
+            if not is_busy_error(exc):
+                raise
+            logger.warning("SQLite busy, retrying in %.3fs: %s", delay, exc)
+            time.sleep(delay)
+    return func(*args, **kwargs)
+
+
+def retry_on_busy(execute, sql, params, many, context):
+    """Execute wrapper: retry on SQLITE_BUSY unless a transaction is already open"""
+    if context['connection'].in_atomic_block:
+        return execute(sql, params, many, context)
+    return call_with_retry(execute, sql, params, many, context)
+
+
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor)
+    # outermost, so temporary wrappers pushed by execute_wrapper() pop off the end as usual
+    if retry_on_busy not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, retry_on_busy)
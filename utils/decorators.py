@@ -2,6 +2,7 @@ import functools
 from django.http import JsonResponse
 from rest_framework import status
 from django.utils.translation import gettext_lazy as _
+from utils.permissions import get_role_resolver
 
 def role_required(role_names=None):
     """
@@ -11,36 +12,22 @@ def role_required(role_names=None):
     def decorator(view_func):
         @functools.wraps(view_func)
         def _wrapped_view(view_instance, request, *args, **kwargs):
-            if not hasattr(request, 'user') or not hasattr(request.user, 'id'):
+            resolver = get_role_resolver(request)
+            if not resolver.is_authenticated:
                 return JsonResponse(
                     {'detail': _('Authentication credentials not provided')},
                     status=status.HTTP_401_UNAUTHORIZED
                 )
             # Super users have all permissions
-            if hasattr(request.user, 'is_super') and request.user.is_super:
+            if resolver.is_super:
                 return view_func(view_instance, request, *args, **kwargs)
-            # Check user type - allows librarians(1) and system administrators(2) access
-            if hasattr(request.user, 'user_type'):
-                user_type = request.user.user_type
-                # System administrator check
-                if role_names == 'system_admin' and (user_type == 2 or user_type == '2'):
-                    return view_func(view_instance, request, *args, **kwargs)
-                # Librarian check
-                if role_names in (['librarian', 'system_admin'], 'librarian') and (
-                    user_type == 1 or user_type == '1' or user_type == 2 or user_type == '2'
-                ):
-                    return view_func(view_instance, request, *args, **kwargs)
-                # Reader permission check
-                if role_names in (['reader', 'librarian', 'system_admin'], 'reader'):
-                    return view_func(view_instance, request, *args, **kwargs)
-            # Get user roles
-            user_roles = getattr(request.user, 'roles', [])
             # Convert single role name to list
             required_roles = role_names
             if isinstance(required_roles, str):
                 required_roles = [required_roles]
-            # If no roles specified or user has any of the required roles, allow access
-            if not required_roles or any(role in user_roles for role in required_roles):
+            # If no roles specified or user satisfies any of the required roles, allow access
+            # (system administrators satisfy librarian, every user satisfies reader)
+            if not required_roles or any(resolver.satisfies(role) for role in required_roles):
                 return view_func(view_instance, request, *args, **kwargs)
             # No permission to access
             return JsonResponse(
@@ -64,16 +51,9 @@ def self_or_admin(model_class, lookup_kwargs_key='pk'):
     def decorator(view_func):
         @functools.wraps(view_func)
         def _wrapped_view(view_instance, request, *args, **kwargs):
-            if hasattr(request.user, 'is_super') and request.user.is_super:
-                return view_func(view_instance, request, *args, **kwargs)
-            # Check user type - librarians and system administrators
-            if hasattr(request.user, 'user_type'):
-                user_type = request.user.user_type
-                if user_type == 1 or user_type == '1' or user_type == 2 or user_type == '2':
-                    return view_func(view_instance, request, *args, **kwargs)
-            
-            # Administrators have all permissions
-            if hasattr(request.user, 'roles') and any(role in ['librarian', 'system_admin'] for role in request.user.roles):
+            # Super users, librarians and system administrators have all permissions
+            resolver = get_role_resolver(request)
+            if resolver.is_super or resolver.is_librarian:
                 return view_func(view_instance, request, *args, **kwargs)
             
             # Get object
@@ -1,17 +1,240 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from utils.cache import queryset_cache_key
+
+COUNT_CACHE_TIMEOUT = getattr(settings, 'COUNT_CACHE_TIMEOUT', 300)
+
+
+def is_unfiltered(queryset):
+    """True for a plain scan of the whole table"""
+    query = queryset.query
+    return not query.where and not query.distinct and query.group_by is None \
+        and query.low_mark == 0 and query.high_mark is None
+
+
+def cached_count(queryset):
+    """
+    Exact count, cached under the queryset SQL and the write versions of the
+    tables it reads, so any write to those tables invalidates it
+    """
+    if queryset.query.is_empty():
+        return 0
+    key = queryset_cache_key('count', queryset)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def estimated_count(queryset):
+    """
+    Upper bound of the row count of an unfiltered table: the largest primary key
+    (ids are never reused), read from the primary key index instead of a scan.
+    Returns None for filtered querysets.
+    """
+    if not is_unfiltered(queryset):
+        return None
+    return queryset.model._default_manager.using(queryset.db).aggregate(max_pk=Max('pk'))['max_pk'] or 0
+
+
+class CachedCountPaginator(DjangoPaginator):
+    """
+    Django paginator whose count comes from the count cache, or from the
+    primary key estimate when the client accepts an approximate total
+    """
+    def __init__(self, *args, estimate=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estimate = estimate
+        self.count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        if self.estimate:
+            count = estimated_count(self.object_list)
+            if count is not None:
+                self.count_is_estimate = True
+                return count
+        return cached_count(self.object_list)
 
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # ?count=estimate accepts an upper bound for the total on unfiltered tables
+        self.count_mode = request.query_params.get(self.count_query_param, 'exact').lower()
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, object_list, per_page):
+        """
+        PageNumberPagination builds the Django paginator through this attribute
+        """
+        return CachedCountPaginator(object_list, per_page, estimate=self.count_mode == 'estimate')
 
     def get_paginated_response(self, data):
-        return Response({
+        response = {
             'count': self.page.paginator.count,
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'results': data
-        })
+        }
+        if self.page.paginator.count_is_estimate:
+            response['count_is_estimate'] = True
+        return Response(response)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor (keyset) pagination over a stable ordering such as ('title', 'id').
+
+    The cursor stores the ordering values of the last row of a page, so the next
+    page is a single range query on an index instead of an OFFSET skip, and deep
+    pages cost the same as the first one. The total count is only computed when
+    the client asks for it with ?count=true (cached) or ?count=estimate.
+    Ordering fields must be non-null columns of the model and the last one
+    must be unique.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=('-id',)):
+        self.ordering = tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.count = self.get_count(queryset, request)
+
+        position, reverse = self.decode_cursor(request, queryset.model)
+        ordering = self.reversed_ordering() if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(position, reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = position is not None, has_more
+        self.rows = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        }
+        if self.count is not None:
+            response['count'] = self.count
+            if self.count_is_estimate:
+                response['count_is_estimate'] = True
+        return Response(response)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_count(self, queryset, request):
+        """
+        Count only on request (?count=true or ?count=estimate), the page itself never needs it
+        """
+        self.count_is_estimate = False
+        mode = request.query_params.get(self.count_query_param, '').lower()
+        if mode == 'estimate':
+            count = estimated_count(queryset)
+            if count is not None:
+                self.count_is_estimate = True
+                return count
+            return cached_count(queryset)
+        if mode in ('true', '1', 'exact'):
+            return cached_count(queryset)
+        return None
+
+    def get_next_link(self):
+        if not self.has_next or not self.rows:
+            return None
+        return self.build_link(self.rows[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.rows:
+            return None
+        return self.build_link(self.rows[0], reverse=True)
+
+    def build_link(self, row, reverse):
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(row, reverse))
+
+    @staticmethod
+    def field_name(ordering_field):
+        return ordering_field.lstrip('-')
+
+    def reversed_ordering(self):
+        return tuple(
+            self.field_name(field) if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        )
+
+    def keyset_filter(self, position, reverse):
+        """
+        (a, b) > (x, y)  ==>  a > x OR (a = x AND b > y), honouring each field direction
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, position):
+            name = self.field_name(field)
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def encode_cursor(self, row, reverse):
+        values = []
+        for field in self.ordering:
+            value = getattr(row, self.field_name(field))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = json.dumps({'v': values, 'r': reverse}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
 
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values = payload['v']
+            if len(values) != len(self.ordering):
+                raise ValueError(encoded)
+            position = [
+                model._meta.get_field(self.field_name(field)).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+            return position, bool(payload.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
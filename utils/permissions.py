@@ -19,18 +19,16 @@ class RbacPermission(BasePermission):
         # for safe methods (GET, HEAD, OPTIONS), directly pass
         if method in ['get', 'head', 'post', 'options']:
             return True
+        resolver = get_role_resolver(request)
         # if there is no authenticated user, reject access
-        if not hasattr(request.user, 'id'):
+        if not resolver.is_authenticated:
             return False
         # 2. super admin has all permissions
-        if hasattr(request.user, 'is_super') and request.user.is_super:
+        if resolver.is_super:
+            return True
+        # 3. check user roles, librarians and system admins have modification permissions
+        if resolver.is_librarian:
             return True
-        # 3. check user type, librarians and system admins have modification permissions
-        if hasattr(request.user, 'user_type'):
-            # Use str() to standardize comparison, simplify logic
-            user_type = str(request.user.user_type)
-            if user_type in ['1', '2']:
-                return True
         # for PUT/PATCH/DELETE requests, need to check if there is admin permission
         if method in ['put', 'patch', 'delete'] and view.__class__.__name__ in ['BookViewSet', 'AuthorViewSet', 'CategoryViewSet', 'AnnouncementViewSet']:
             return False
@@ -39,36 +37,27 @@ class RbacPermission(BasePermission):
         return False
     def has_object_permission(self, request, view, obj):
         """object-level permission check"""
+        resolver = get_role_resolver(request)
         # if super admin, has all permissions
-        if hasattr(request.user, 'is_super') and request.user.is_super:
+        if resolver.is_super:
             return True
         # if safe method (GET, HEAD, etc.), directly pass
         if request.method.lower() in ['get', 'head', 'options']:
             return True
-        # check user type, librarians and system admins have modification permissions
-        if hasattr(request.user, 'user_type'):
-            # Use str() to standardize comparison, simplify logic
-            user_type = str(request.user.user_type)
-            # librarian (1) or system admin (2) has modification permissions for books, authors, categories
-            if user_type in ['1', '2']:
-                # allow admin to modify books, authors, categories and announcements
-                if isinstance(obj, (models.Book, models.Author, models.Category, models.Announcement)):
-                    return True
+        # librarian (1) or system admin (2) has modification permissions for books, authors, categories
+        if resolver.is_librarian:
+            # allow admin to modify books, authors, categories and announcements
+            if isinstance(obj, (models.Book, models.Author, models.Category, models.Announcement)):
+                return True
         
         # borrowing record object-level permission: normal users can only view/modify their borrowing records
         if hasattr(obj, 'user') and isinstance(obj, models.BorrowRecord):
             # if the record owner, allow access
-            if obj.user.id == request.user.id:
+            if obj.user_id == getattr(request.user, 'id', None):
                 return True
                 
             # if the user is a librarian or system admin, allow access
-            if hasattr(request.user, 'user_type'):
-                # Use str() to standardize comparison, simplify logic
-                user_type = str(request.user.user_type)
-                if user_type in ['1', '2']:
-                    return True
-            
-            return False
+            return resolver.is_librarian
         
         # check for announcements:
         if isinstance(obj, models.Announcement):
@@ -77,17 +66,116 @@ class RbacPermission(BasePermission):
                 return True
                 
             # invisible announcements can only be seen by admins
-            if hasattr(request.user, 'user_type'):
-                # Use str() to standardize comparison, simplify logic
-                user_type = str(request.user.user_type)
-                if user_type in ['1', '2']:
-                    return True
-                
-            return False
+            return resolver.is_librarian
         
         # for other types of objects, non-admins are not allowed to modify
         return False
 
+class RoleResolver:
+    """
+    effective role set of one user, resolved once and reused for the whole request
+    """
+    READER = models.UserType.READER
+    LIBRARIAN = models.UserType.LIBRARIAN
+    SYSTEM_ADMIN = models.UserType.SYSTEM_ADMIN
+
+    # role names used by init_permissions, UserViewSet and older data
+    role_name_map = {
+        'reader': READER,
+        'librarian': LIBRARIAN,
+        'system_admin': SYSTEM_ADMIN,
+        'system_administrator': SYSTEM_ADMIN,
+        'admin': SYSTEM_ADMIN,
+    }
+
+    def __init__(self, user):
+        self.user = user
+        self.is_authenticated = bool(user is not None and getattr(user, 'id', None) is not None)
+        self.is_super = bool(getattr(user, 'is_super', False) or getattr(user, 'is_superuser', False))
+        self.role_names = frozenset(self.normalize_role_name(name) for name in self._load_role_names(user))
+
+        roles = set()
+        user_type = self._normalize_user_type(getattr(user, 'user_type', None))
+        if user_type is not None:
+            roles.add(user_type)
+        for name in self.role_names:
+            if name in self.role_name_map:
+                roles.add(self.role_name_map[name])
+        if self.is_super:
+            roles.add(self.SYSTEM_ADMIN)
+        self.roles = frozenset(roles)
+
+    @staticmethod
+    def normalize_role_name(name):
+        return str(name).strip().lower().replace(' ', '_')
+
+    @staticmethod
+    def _normalize_user_type(user_type):
+        try:
+            return int(user_type)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _load_role_names(user):
+        """
+        the JWT principal carries a list of role names, model users carry a related manager
+        """
+        roles = getattr(user, 'roles', None)
+        if roles is None:
+            return []
+        try:
+            if hasattr(roles, 'values_list'):
+                return list(roles.values_list('name', flat=True))
+            return [role.name if hasattr(role, 'name') else role for role in roles]
+        except (ObjectDoesNotExist, AttributeError, TypeError, ValueError):
+            # unsaved model users cannot use the m2m manager
+            return []
+
+    def has_role(self, role_type):
+        """check if the user has exactly the specified role type"""
+        return self._normalize_user_type(role_type) in self.roles
+
+    def has_role_name(self, role_name):
+        return self.normalize_role_name(role_name) in self.role_names
+
+    @property
+    def is_admin(self):
+        """system admin (or superuser)"""
+        return self.SYSTEM_ADMIN in self.roles
+
+    @property
+    def is_librarian(self):
+        """librarian or system admin"""
+        return self.is_admin or self.LIBRARIAN in self.roles
+
+    def satisfies(self, role_name):
+        """
+        check a role requirement by name: system admins satisfy librarian requirements
+        and every authenticated user satisfies reader requirements
+        """
+        role_type = self.role_name_map.get(self.normalize_role_name(role_name))
+        if role_type == self.SYSTEM_ADMIN:
+            return self.is_admin
+        if role_type == self.LIBRARIAN:
+            return self.is_librarian
+        if role_type == self.READER:
+            return self.is_authenticated
+        return self.has_role_name(role_name)
+
+
+def get_role_resolver(request):
+    """
+    return the role resolver attached to the request, creating it on first use
+    """
+    user = getattr(request, 'user', None)
+    resolver = getattr(request, '_role_resolver', None)
+    if resolver is None or resolver.user is not user:
+        resolver = RoleResolver(user)
+        request._role_resolver = resolver
+    return resolver
+
+
 class BaseRolePermission(permissions.BasePermission):
     """
     base role permission class, providing common role check methods
@@ -103,31 +191,10 @@ class BaseRolePermission(permissions.BasePermission):
         Returns:
             bool: whether the user has the specified role
         """
-        # check user type - Use string comparison to simplify logic
-        if hasattr(user, 'user_type'):
-            if str(user.user_type) == str(role_type):
-                return True
-                
-        # check user roles
-        try:
-            if hasattr(user, 'roles'):
-                role_map = {
-                    0: ['Reader'],
-                    1: ['Librarian'],
-                    2: ['System Administrator', 'System Admin']
-                }
-                role_names = role_map.get(role_type, [])
-                user_roles = [role.name if hasattr(role, 'name') else str(role) for role in user.roles.all()]
-                if any(role in role_names for role in user_roles):
-                    return True
-        except (ObjectDoesNotExist, AttributeError):
-            pass
-            
-        # for system admin, check superuser status
-        if role_type == 2 and getattr(user, 'is_superuser', False):
-            return True
-            
-        return False
+        return RoleResolver(user).has_role(role_type)
+
+    def get_resolver(self, request):
+        return get_role_resolver(request)
 
 class IsLibrarian(BaseRolePermission):
     """
@@ -136,7 +203,7 @@ class IsLibrarian(BaseRolePermission):
     message = 'Only librarians can perform this action'
     
     def has_permission(self, request, view):
-        return bool(request.user and self.has_role(request.user, 1))
+        return self.get_resolver(request).has_role(RoleResolver.LIBRARIAN)
 
 class IsSystemAdmin(BaseRolePermission):
     """
@@ -145,7 +212,7 @@ class IsSystemAdmin(BaseRolePermission):
     message = 'Only system admins can perform this action'
     
     def has_permission(self, request, view):
-        return bool(request.user and self.has_role(request.user, 2))
+        return self.get_resolver(request).is_admin
 
 class IsLibrarianOrSystemAdmin(BaseRolePermission):
     """
@@ -154,10 +221,7 @@ class IsLibrarianOrSystemAdmin(BaseRolePermission):
     message = 'Only librarians or system admins can perform this action'
     
     def has_permission(self, request, view):
-        return bool(
-            request.user and 
-            (self.has_role(request.user, 1) or self.has_role(request.user, 2))
-        )
+        return self.get_resolver(request).is_librarian
 
 class IsReader(BaseRolePermission):
     """
@@ -167,7 +231,7 @@ class IsReader(BaseRolePermission):
     
     def has_permission(self, request, view):
         # All authenticated users have reader permissions by default
-        return bool(request.user and request.user.is_authenticated)
+        return self.get_resolver(request).is_authenticated
 
 class IsSelfOrAdmin(BaseRolePermission):
     """
@@ -178,8 +242,7 @@ class IsSelfOrAdmin(BaseRolePermission):
     
     def has_object_permission(self, request, view, obj):
         # check if the user is an admin
-        is_admin = self.has_role(request.user, 1) or self.has_role(request.user, 2)
-        if is_admin:
+        if self.get_resolver(request).is_librarian:
             return True
             
         # check if the user is himself
@@ -0,0 +1,57 @@
+"""
+EXPLAIN QUERY PLAN helpers (SQLite).
+
+A plan is a list of detail strings as printed by SQLite, for example
+'SEARCH borrow_record USING INDEX borrow_user_book_date_idx (user_id=? AND book_id=?)'.
+Full table scans show up as 'SCAN <table>' without an index, sorts the
+indexes cannot provide as 'USE TEMP B-TREE FOR ORDER BY'.
+"""
+import re
+
+from django.db import connections
+
+SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?(.*)$')
+VIRTUAL_TABLE_MARKER = 'VIRTUAL TABLE INDEX'
+
+
+def explain_sql(sql, params=(), using='default'):
+    """EXPLAIN QUERY PLAN detail lines of a SELECT statement"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def explain(queryset):
+    """EXPLAIN QUERY PLAN detail lines of the queryset's SQL"""
+    sql, params = queryset.query.sql_with_params()
+    return explain_sql(sql, params, using=queryset.db)
+
+
+def full_scans(plan):
+    """Tables read front to back without an index"""
+    tables = []
+    for detail in plan:
+        match = SCAN_RE.match(detail)
+        if match and 'INDEX' not in match.group(2) and VIRTUAL_TABLE_MARKER not in match.group(2):
+            tables.append(match.group(1))
+    return tables
+
+
+def index_scans(plan):
+    """Tables read front to back in the order of an index (whole index unless a LIMIT stops it)"""
+    tables = []
+    for detail in plan:
+        match = SCAN_RE.match(detail)
+        if match and 'INDEX' in match.group(2) and VIRTUAL_TABLE_MARKER not in match.group(2):
+            tables.append(match.group(1))
+    return tables
+
+
+def temp_btrees(plan):
+    """Sorts / groupings / DISTINCTs that need a temporary B-tree"""
+    return [detail for detail in plan if 'TEMP B-TREE' in detail]
+
+
+def used_indexes(plan):
+    return [match.group(1) for match in (re.search(r'USING (?:COVERING )?INDEX (\w+)', detail) for detail in plan)
+            if match]
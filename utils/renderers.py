@@ -0,0 +1,50 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to DRF's json encoder
+    orjson = None
+
+# DRF's encoder handles everything orjson does not know natively
+# (lazy translation strings, Decimal, timedelta, sets, querysets, ...)
+_fallback_encoder = encoders.JSONEncoder()
+
+
+def envelope(data, code):
+    """The {"code": ..., "data": ...} wrapper used by MineApiViewSet responses"""
+    return {"code": code, "data": data}
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson.
+
+    Datetimes, dates, UUIDs and numpy values are encoded natively, other types
+    go through DRF's encoder. When the view marked the response with
+    `envelope_code` (see BaseViewMixin) the {"code", "data"} envelope is added
+    here, while encoding, instead of rewriting response.data.
+    Indented output (?indent / Accept: application/json; indent=4) and missing
+    orjson fall back to DRF's JSONRenderer.
+    """
+    supports_envelope = True
+
+    if orjson is not None:
+        options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        response = renderer_context.get('response')
+        code = getattr(response, 'envelope_code', None)
+        if code is not None:
+            data = envelope(data, code)
+
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_fallback_encoder.default, option=self.options)
+        # same as JSONRenderer: keep the output safe to embed in <script> / JSONP
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,111 @@
+"""
+Read replica routing.
+
+Analytics and recommendation code runs inside analytics_reads(); while that
+scope is active ReplicaRouter sends reads to the REPLICA_DATABASE alias, a
+SQLite snapshot of the primary refreshed with the online backup API
+(refresh_replica() / the refresh_replica command). Writes, migrations and
+every read outside the scope stay on 'default', so long report scans never
+compete with borrow writes on the primary file.
+
+Until the first snapshot exists, or when the alias mirrors the primary
+(TEST: {'MIRROR': 'default'}), analytics read from the primary as before.
+
+The replica alias is opened read-only (NAME is a file: URI with mode=ro), so
+a write routed there by mistake fails instead of changing the snapshot;
+refresh_replica() writes the file through a connection of its own.
+"""
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_analytics = ContextVar('analytics_reads', default=False)
+
+
+def replica_alias():
+    return getattr(settings, 'REPLICA_DATABASE', 'replica')
+
+
+def database_path(alias):
+    """File of a SQLite alias whose NAME is a path or a file: URI (file:/srv/db.sqlite3?mode=ro)"""
+    name = str(connections[alias].settings_dict['NAME'])
+    return unquote(urlsplit(name).path) if name.startswith('file:') else name
+
+
+def replica_available(alias=None):
+    """The replica alias is configured, is a separate database and has a snapshot"""
+    alias = alias or replica_alias()
+    if alias not in settings.DATABASES:
+        return False
+    path = database_path(alias)
+    if path == database_path(DEFAULT_DB_ALIAS):
+        return False
+    return os.path.exists(path)
+
+
+@contextmanager
+def analytics_reads():
+    """Route reads made in this block (or decorated function) to the replica"""
+    token = _analytics.set(True)
+    try:
+        yield
+    finally:
+        _analytics.reset(token)
+
+
+def in_analytics_reads():
+    return _analytics.get()
+
+
+def refresh_replica(alias=None, source=DEFAULT_DB_ALIAS):
+    """
+    Copy the primary into the replica file with the SQLite online backup API.
+    The copy is written in one step; replica readers keep their snapshot
+    until it commits and writers on the primary are not blocked (WAL).
+    Returns (seconds taken, size in bytes).
+    """
+    alias = alias or replica_alias()
+    source_connection = connections[source]
+    if source_connection.vendor != 'sqlite' or connections[alias].vendor != 'sqlite':
+        raise ValueError('refresh_replica copies SQLite databases only')
+
+    started = time.perf_counter()
+    # a connection of its own: the snapshot holds committed rows only, whatever
+    # transaction the caller's connection has open
+    source_db = source_connection.get_new_connection(source_connection.get_connection_params())
+    path = database_path(alias)
+    target = sqlite3.connect(path, timeout=connections[alias].settings_dict.get('OPTIONS', {}).get('timeout', 5))
+    try:
+        source_db.backup(target)
+        # read-only connections cannot switch the journal mode, see configure_connection
+        target.execute('PRAGMA journal_mode = WAL')
+    finally:
+        target.close()
+        source_db.close()
+    return time.perf_counter() - started, os.path.getsize(path)
+
+
+class ReplicaRouter:
+    """Reads inside analytics_reads() go to the replica, everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if in_analytics_reads() and replica_available():
+            return replica_alias()
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # the replica gets its schema with the snapshot
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+@File: runner.py
+Test runner that keeps the suite away from the shared response cache
+"""
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.test import runner as django_runner
+from django.test.runner import DiscoverRunner, ParallelTestSuite
+
+
+def isolated_caches(location):
+    """settings.CACHES with the default cache moved to `location`, same backend and options"""
+    caches = {alias: dict(config) for alias, config in settings.CACHES.items()}
+    caches['default']['LOCATION'] = location
+    return caches
+
+
+def _init_worker(counter, *args, **kwargs):
+    """Django's worker setup, then a cache directory of the worker's own so cache.clear() stays local"""
+    django_runner._init_worker(counter, *args, **kwargs)
+    location = os.path.join(settings.CACHES['default']['LOCATION'], f'worker-{django_runner._worker_id}')
+    override_settings(CACHES=isolated_caches(location)).enable()
+
+
+class IsolatedCacheParallelTestSuite(ParallelTestSuite):
+    init_worker = _init_worker
+
+
+class IsolatedCacheTestRunner(DiscoverRunner):
+    """
+    Runs the tests against a file cache in a temporary directory, so the
+    cache.clear() calls of the tests never wipe the cache of a running server
+    (settings.CACHES points at BASE_DIR/cache by default). Parallel workers
+    each get a subdirectory of it.
+    """
+    parallel_test_suite = IsolatedCacheParallelTestSuite
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp(prefix='lms-test-cache-')
+        # spawned workers import the settings again and read the directory from the environment
+        self.cache_dir_env = os.environ.get('DJANGO_CACHE_DIR')
+        os.environ['DJANGO_CACHE_DIR'] = self.cache_dir
+        self.cache_override = override_settings(CACHES=isolated_caches(self.cache_dir))
+        self.cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_override.disable()
+        if self.cache_dir_env is None:
+            os.environ.pop('DJANGO_CACHE_DIR', None)
+        else:
+            os.environ['DJANGO_CACHE_DIR'] = self.cache_dir_env
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,121 @@
+"""
+SQLite FTS5 full-text index of books and announcements.
+
+book_fts (title, description, author, category) and announcement_fts
+(title, content) use the rowid of the indexed row. They are created by
+migration 0011, kept in step by the signals in api/signals.py and rebuilt
+with the rebuild_search_index command after bulk writes. On other database
+backends every function here is a no-op and search falls back to icontains.
+"""
+import re
+
+from django.db import connection
+
+BOOK_TABLE = 'book_fts'
+ANNOUNCEMENT_TABLE = 'announcement_fts'
+
+# bm25 column weights: a hit in the title outranks the author, the category and the body
+BOOK_RANK = f"bm25({BOOK_TABLE}, 10.0, 1.0, 5.0, 2.0)"
+ANNOUNCEMENT_RANK = f"bm25({ANNOUNCEMENT_TABLE}, 5.0, 1.0)"
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_available(using=None):
+    return (using or connection).vendor == 'sqlite'
+
+
+def match_expression(text):
+    """
+    FTS5 query for free text: every word must match, the last one as a prefix
+    so results follow the user while typing. None when there is nothing to match.
+    """
+    tokens = TOKEN_RE.findall(text or '')
+    if not tokens:
+        return None
+    terms = ['"%s"' % token.replace('"', '""') for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def create_tables(cursor):
+    cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {BOOK_TABLE} USING fts5("
+                   "title, description, author, category, tokenize='unicode61 remove_diacritics 2')")
+    cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {ANNOUNCEMENT_TABLE} USING fts5("
+                   "title, content, tokenize='unicode61 remove_diacritics 2')")
+
+
+def drop_tables(cursor):
+    cursor.execute(f"DROP TABLE IF EXISTS {BOOK_TABLE}")
+    cursor.execute(f"DROP TABLE IF EXISTS {ANNOUNCEMENT_TABLE}")
+
+
+def _index_books_sql(where=''):
+    return (f"INSERT INTO {BOOK_TABLE} (rowid, title, description, author, category) "
+            "SELECT book.id, book.title, COALESCE(book.description, ''), author.name, category.name "
+            "FROM book JOIN author ON author.id = book.author_id "
+            f"JOIN category ON category.id = book.category_id {where}")
+
+
+def rebuild(cursor):
+    """Re-read every book and announcement into the index"""
+    cursor.execute(f"DELETE FROM {BOOK_TABLE}")
+    cursor.execute(_index_books_sql())
+    cursor.execute(f"DELETE FROM {ANNOUNCEMENT_TABLE}")
+    cursor.execute(f"INSERT INTO {ANNOUNCEMENT_TABLE} (rowid, title, content) "
+                   "SELECT id, title, content FROM announcement")
+
+
+def index_books(where, params):
+    """(Re)index the books selected by a WHERE clause on book / author / category"""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {BOOK_TABLE} WHERE rowid IN (SELECT book.id FROM book {where})", params)
+        cursor.execute(_index_books_sql(where), params)
+
+
+def index_book(book_id):
+    index_books("WHERE book.id = %s", [book_id])
+
+
+def index_books_by_author(author_id):
+    index_books("WHERE book.author_id = %s", [author_id])
+
+
+def index_books_by_category(category_id):
+    index_books("WHERE book.category_id = %s", [category_id])
+
+
+def index_announcement(announcement):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {ANNOUNCEMENT_TABLE} WHERE rowid = %s", [announcement.pk])
+        cursor.execute(f"INSERT INTO {ANNOUNCEMENT_TABLE} (rowid, title, content) VALUES (%s, %s, %s)",
+                       [announcement.pk, announcement.title, announcement.content])
+
+
+def unindex(table, pk):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [pk])
+
+
+def search(queryset, table, rank, text):
+    """
+    Restrict the queryset to rows matching the text, best BM25 rank first.
+    The FTS table is joined on rowid, so filtering and ranking stay inside the
+    index. Rows carry the score as search_rank (lower is better).
+    """
+    expression = match_expression(text)
+    if expression is None:
+        return queryset.none()
+    model_table = queryset.model._meta.db_table
+    return queryset.extra(
+        select={'search_rank': rank},
+        tables=[table],
+        where=[f"{table}.rowid = {model_table}.id", f"{table} MATCH %s"],
+        params=[expression],
+    ).order_by('search_rank', 'id')
@@ -1,13 +1,33 @@
+import base64
+import hashlib
+import json
 import re
 
-from django.http import Http404
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.db.models import Count, F, Max
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, quote_etag
 from rest_framework.views import set_rollback, APIView
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError, AuthenticationFailed, PermissionDenied
 from rest_framework.exceptions import APIException
 from rest_framework.viewsets import ModelViewSet
-from rest_framework import status
-from utils.permissions import RbacPermission
+from rest_framework.decorators import action
+from rest_framework import serializers, status
+from django.core.exceptions import FieldDoesNotExist
+from utils.cache import cache_response_body, get_models_version, normalized_query_string, queryset_cache_key, \
+    response_cache_key
+from utils.pagination import KeysetPagination
+from utils.renderers import envelope
+from utils.permissions import IsLibrarianOrSystemAdmin, RbacPermission, get_role_resolver
+from api.models import DeletionLog
+from utils import export
+from utils import search as fulltext
 
 
 def handle_exception(exc, context):
@@ -67,6 +87,9 @@ def handle_exception(exc, context):
 class BaseViewMixin:
     def finalize_response(self, request, response, *args, **kwargs):
         response = super().finalize_response(request, response, *args, **kwargs)
+        # Pre-rendered bodies (batch responses) carry their own envelope
+        if not isinstance(response, Response):
+            return response
         # If this is an exception response, return it directly
         if response.exception:
             return response
@@ -74,11 +97,17 @@ class BaseViewMixin:
         # 包装数据，为非200状态码添加错误代码
         if response.status_code >= 400:
             # 对于错误响应，使用非零错误码
-            error_code = response.status_code  # 使用HTTP状态码作为错误码
-            response.data = {"code": error_code, "data": response.data}
+            code = response.status_code  # 使用HTTP状态码作为错误码
         else:
             # 对于成功响应，使用0作为成功码
-            response.data = {"code": 0, "data": response.data}
+            code = 0
+
+        if getattr(response, 'accepted_renderer', None) is not None and \
+                getattr(response.accepted_renderer, 'supports_envelope', False):
+            # 渲染器在编码时直接生成 {"code": ..., "data": ...}，无需再复制一层字典
+            response.envelope_code = code
+        else:
+            response.data = envelope(response.data, code)
         
         # 保留原始状态码，不再统一设为200
         # response.status_code = status.HTTP_200_OK
@@ -88,46 +117,23 @@ class BaseViewMixin:
 class PermissionCheckerMixin:
     """Mixin class that provides permission checking functionality"""
     
+    def get_role_resolver(self, request=None):
+        """Return the role resolver cached on the request"""
+        return get_role_resolver(request or self.request)
+
     def is_admin(self, request=None):
-        """Check if user is a system administrator"""
+        """Check if user is a system administrator (or super administrator)"""
         request = request or self.request
         if not hasattr(request, 'user'):
             return False
-        
-        # Super administrator
-        if hasattr(request.user, 'is_superuser') and request.user.is_superuser:
-            return True
-        
-        # System administrator role
-        if hasattr(request.user, 'roles') and 'system_admin' in request.user.roles:
-            return True
-            
-        # User type is system administrator
-        if hasattr(request.user, 'user_type') and request.user.user_type == '2':
-            return True
-            
-        return False
+        return self.get_role_resolver(request).is_admin
     
     def is_librarian(self, request=None):
-        """Check if user is a librarian"""
+        """Check if user is a librarian (system administrators included)"""
         request = request or self.request
-        
-        # Super administrator or system administrator
-        if self.is_admin(request):
-            return True
-            
         if not hasattr(request, 'user'):
             return False
-            
-        # Librarian role
-        if hasattr(request.user, 'roles') and 'librarian' in request.user.roles:
-            return True
-            
-        # User type is librarian
-        if hasattr(request.user, 'user_type') and request.user.user_type == '1':
-            return True
-            
-        return False
+        return self.get_role_resolver(request).is_librarian
     
     def is_reader(self, request=None):
         """Check if user is a reader"""
@@ -148,11 +154,312 @@ class PermissionCheckerMixin:
             
         return obj.user_id == self.request.user.id
 
-class MineModelViewSet(PermissionCheckerMixin, ModelViewSet):
+class SparseFieldsetMixin:
+    """
+    Sparse fieldsets for read requests: ?fields=id,title keeps only the listed
+    serializer fields, ?exclude=description drops fields. Dropped fields are
+    never computed, and the queryset only loads the columns the kept fields read.
+
+    SerializerMethodFields declare the columns they read in
+    Meta.method_field_sources ({'is_overdue': ['status', 'return_date']});
+    when a kept method field is not declared there, all columns are loaded.
+    """
+    fields_query_param = 'fields'
+    exclude_query_param = 'exclude'
+
+    def get_sparse_fieldset(self):
+        """Return (requested field names or None, excluded field names)"""
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in ('GET', 'HEAD') or not hasattr(request, 'query_params'):
+            return None, set()
+
+        def split(param):
+            value = request.query_params.get(param)
+            if value is None:
+                return None
+            return {name.strip() for name in value.split(',') if name.strip()}
+
+        return split(self.fields_query_param), split(self.exclude_query_param) or set()
+
+    def has_sparse_fieldset(self):
+        requested, excluded = self.get_sparse_fieldset()
+        return requested is not None or bool(excluded)
+
+    def trim_serializer_fields(self, serializer):
+        """Drop unrequested fields from a (list) serializer before it renders"""
+        requested, excluded = self.get_sparse_fieldset()
+        if requested is None and not excluded:
+            return serializer
+        target = serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer
+        for name in list(target.fields):
+            if (requested is not None and name not in requested) or name in excluded:
+                target.fields.pop(name)
+        return serializer
+
+    def get_serializer(self, *args, **kwargs):
+        return self.trim_serializer_fields(super().get_serializer(*args, **kwargs))
+
+    def filter_queryset(self, queryset):
+        return self.restrict_queryset_columns(super().filter_queryset(queryset))
+
+    def restrict_queryset_columns(self, queryset):
+        """
+        Push the sparse fieldset down to the queryset as .only() on the columns
+        (and joined relations) the kept fields read
+        """
+        if not self.has_sparse_fieldset():
+            return queryset
+        serializer = self.trim_serializer_fields(self.get_serializer_class()(context=self.get_serializer_context()))
+        paths = set()
+        method_sources = getattr(getattr(serializer, 'Meta', None), 'method_field_sources', {})
+        for name, field in serializer.fields.items():
+            if isinstance(field, serializers.SerializerMethodField):
+                if name not in method_sources:
+                    return queryset
+                field_paths = [source.split('.') for source in method_sources[name]]
+            elif field.source == '*':
+                return queryset
+            else:
+                field_paths = [field.source_attrs]
+            for source_attrs in field_paths:
+                path = self.resolve_column_path(queryset.model, source_attrs)
+                if path is None:
+                    return queryset
+                paths.add(path)
+
+        only = {queryset.model._meta.pk.name}
+        relations = set()
+        for path in paths:
+            only.add(path)
+            parts = path.split('__')
+            for depth in range(1, len(parts)):
+                relations.add('__'.join(parts[:depth]))
+        # relations that are no longer read must not stay in select_related
+        queryset = queryset.select_related(None)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*only)
+
+    @staticmethod
+    def resolve_column_path(model, source_attrs):
+        """
+        Map serializer source attributes (['book', 'title'], ['get_status_display'])
+        to a queryset path ('book__title', 'status'); None when it is not a column
+        """
+        parts = []
+        for attr in source_attrs:
+            if attr.startswith('get_') and attr.endswith('_display'):
+                attr = attr[len('get_'):-len('_display')]
+            try:
+                field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                return None
+            if field.many_to_many or field.one_to_many:
+                return None
+            parts.append(field.name)
+            if field.is_relation:
+                model = field.related_model
+        return '__'.join(parts)
+
+
+class ResponseCacheMixin:
+    """
+    Server-side cache of rendered list responses.
+
+    Viewsets opt in by naming the models their list output is built from in
+    response_cache_models; any create, update or delete of those models bumps
+    their version and retires the cached pages. Entries are keyed by the
+    normalized query string and the audience, so views whose output depends on
+    the user override get_response_cache_audience. Bodies are stored encoded
+    and, when RESPONSE_CACHE_PRECOMPRESS is on and the body reaches
+    COMPRESSION_MIN_SIZE, compressed as well for CompressionMiddleware to send.
+    """
+    response_cache_models = None
+    response_cache_header = 'X-Response-Cache'
+
+    def get_response_cache_audience(self):
+        """Name of the group of users that all receive the same list response"""
+        return 'public'
+
+    def get_response_cache_key(self, request):
+        if not self.response_cache_models or request.method not in ('GET', 'HEAD'):
+            return None
+        renderer = getattr(request, 'accepted_renderer', None)
+        if renderer is None or renderer.format != 'json':
+            return None
+        return response_cache_key(request, self.response_cache_models, self.get_response_cache_audience())
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        if key is None:
+            return super().list(request, *args, **kwargs)
+
+        entry = cache.get(key)
+        if entry is not None:
+            return self.build_cached_response(request, entry)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response.add_post_render_callback(lambda rendered: self.store_response(key, rendered))
+            patch_vary_headers(response, ('Accept-Encoding',))
+            response[self.response_cache_header] = 'miss'
+        return response
+
+    def store_response(self, key, response):
+        precompress_min_size = None
+        if getattr(settings, 'RESPONSE_CACHE_PRECOMPRESS', True):
+            precompress_min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        cache_response_body(
+            key, response['Content-Type'], response.content,
+            timeout=getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300),
+            precompress_min_size=precompress_min_size,
+        )
+
+    def build_cached_response(self, request, entry):
+        response = HttpResponse(entry['body'], content_type=entry['content_type'])
+        # compressed copies picked up by CompressionMiddleware
+        response.precompressed = entry['precompressed']
+        patch_vary_headers(response, ('Accept-Encoding',))
+        response[self.response_cache_header] = 'hit'
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified validators for list and detail reads, answered with
+    304 Not Modified before anything is serialized.
+
+    Models with conditional_timestamp_field (e.g. updated_at) are validated by
+    max(timestamp) and row count read from the database: of the filtered
+    queryset on lists, of the object itself on detail reads, and table-wide
+    for the other models in response_cache_models (joined author / category
+    names, ...). Models without the column add their write versions.
+    ETags are weak since the same representation may be sent gzipped; on lists
+    only the ETag sees deletions, Last-Modified is the newest timestamp.
+    """
+    conditional_timestamp_field = None
+
+    def has_conditional_timestamp(self, model):
+        field = self.conditional_timestamp_field
+        return bool(field) and field in {f.name for f in model._meta.concrete_fields}
+
+    def get_conditional_version_models(self):
+        """Models without a timestamp column, validated by their write version"""
+        return [model for model in self.response_cache_models or () if not self.has_conditional_timestamp(model)]
+
+    def get_conditional_related_models(self):
+        """Models the response joins that have the timestamp column, validated table-wide"""
+        return [model for model in (self.response_cache_models or ())[1:] if self.has_conditional_timestamp(model)]
+
+    def get_timestamp_stats(self, queryset):
+        """max(timestamp) and row count of the queryset"""
+        queryset = queryset.order_by()
+        # cached like page counts: any write to the table retires the entry
+        key = queryset_cache_key('validators', queryset)
+        stats = cache.get(key)
+        if stats is None:
+            stats = queryset.aggregate(last=Max(self.conditional_timestamp_field), count=Count('pk'))
+            cache.set(key, stats, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+        return stats
+
+    def timestamp_validators(self, request, stats, *parts):
+        """(etag, last_modified) from the stats of the response's own rows and of the joined tables"""
+        stats = [stats] + [self.get_timestamp_stats(model._default_manager.all())
+                           for model in self.get_conditional_related_models()]
+        last = max((row['last'] for row in stats if row['last']), default=None)
+        etag = self.build_etag(request, *parts, *(
+            f"{row['last'].isoformat() if row['last'] else ''}:{row['count']}" for row in stats))
+        return etag, int(last.timestamp()) if last else None
+
+    def build_etag(self, request, *parts):
+        models = self.get_conditional_version_models()
+        raw = '|'.join([request.path, normalized_query_string(request.query_params),
+                        getattr(request, 'accepted_media_type', '') or '',
+                        get_models_version(models) if models else ''] + [str(part) for part in parts])
+        return 'W/' + quote_etag(hashlib.md5(raw.encode('utf-8')).hexdigest())
+
+    def get_list_validators(self, request):
+        """(etag, last_modified timestamp) of the filtered list, None when not supported"""
+        if self.conditional_timestamp_field:
+            return self.timestamp_validators(request, self.get_timestamp_stats(
+                self.filter_queryset(self.get_queryset())))
+        if self.response_cache_models:
+            return self.build_etag(request), None
+        return None, None
+
+    def get_object_validators(self, request, instance):
+        if self.conditional_timestamp_field:
+            last = getattr(instance, self.conditional_timestamp_field)
+            return self.timestamp_validators(request, {'last': last, 'count': 1}, instance.pk)
+        if self.response_cache_models:
+            return self.build_etag(request, instance.pk), None
+        return None, None
+
+    @staticmethod
+    def set_validator_headers(response, etag, last_modified):
+        if etag:
+            response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def conditional_response(self, request, etag, last_modified):
+        """304 / 412 response for the request's preconditions, or None"""
+        if etag is None and last_modified is None:
+            return None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            self.set_validator_headers(response, etag, last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().list(request, *args, **kwargs)
+        etag, last_modified = self.get_list_validators(request)
+        not_modified = self.conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            self.set_validator_headers(response, etag, last_modified)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.get_object_validators(request, instance)
+        not_modified = self.conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(instance)
+        return self.set_validator_headers(Response(serializer.data), etag, last_modified)
+
+
+class MineModelViewSet(PermissionCheckerMixin, SparseFieldsetMixin, ConditionalGetMixin, ResponseCacheMixin,
+                       ModelViewSet):
     """Extended ModelViewSet with permission checking functionality"""
     
     # Default to using RBAC permission system
     permission_classes = [RbacPermission]
+    # Stable ordering for cursor pagination, e.g. ('title', 'id'); None disables it
+    keyset_ordering = None
+    keyset_pagination_class = KeysetPagination
+
+    @property
+    def paginator(self):
+        """
+        Clients opt into cursor pagination with ?pagination=cursor (next/previous
+        links carry ?cursor=), everything else keeps page-number pagination
+        """
+        if not hasattr(self, '_paginator') and self.keyset_ordering and self.wants_keyset_pagination():
+            self._paginator = self.keyset_pagination_class(self.keyset_ordering)
+        return super().paginator
+
+    def wants_keyset_pagination(self):
+        request = getattr(self, 'request', None)
+        if request is None or not hasattr(request, 'query_params'):
+            return False
+        params = request.query_params
+        return params.get('pagination') == 'cursor' or self.keyset_pagination_class.cursor_query_param in params
     
     def filter_queryset_by_role(self, queryset):
         """Filter queryset based on user role"""
@@ -160,7 +467,7 @@ class MineModelViewSet(PermissionCheckerMixin, ModelViewSet):
             return queryset.none()  # Unauthenticated users get empty results
             
         # Administrators can view all
-        if self.is_librarian() or self.is_admin():
+        if self.is_librarian():
             return queryset
             
         # Define field name to determine if object belongs to user
@@ -179,5 +486,194 @@ class MineModelViewSet(PermissionCheckerMixin, ModelViewSet):
         return super().create(request, *args, **kwargs)
         
 
+class DeltaSyncMixin:
+    """
+    GET <route>/changes/?since=<ISO timestamp> for incremental client sync.
+
+    Returns the rows of the viewset's queryset changed at or after `since`
+    (upserts, serialized like detail reads) and the ids deleted since then
+    (tombstones from DeletionLog). A row counts as changed when its own
+    updated_at, or that of a joined table listed in changes_related_timestamp_fields
+    (whose names it embeds), moves. Batches are ordered by (changed_at, pk); while
+    has_more is true the response carries an opaque `cursor` to send as ?cursor=
+    for the next batch, so rows sharing one timestamp are never repeated or
+    skipped. The last batch lists the tombstones and the watermark to send as
+    `since` next time. Without `since`, or with one older than the tombstone
+    retention, the response is a full snapshot flagged with reset=true.
+    """
+    changes_timestamp_field = 'updated_at'
+    # Timestamps of joined rows embedded in the serialized data, e.g. ('author__updated_at',)
+    changes_related_timestamp_fields = ()
+    changes_since_query_param = 'since'
+    changes_cursor_query_param = 'cursor'
+    changes_limit_query_param = 'limit'
+    changes_limit = 500
+    max_changes_limit = 1000
+    invalid_changes_cursor_message = 'Invalid cursor'
+
+    def parse_changes_since(self, request):
+        value = request.query_params.get(self.changes_since_query_param)
+        if not value:
+            return None
+        since = parse_datetime(value.replace(' ', '+'))
+        if since is None:
+            raise ValidationError({self.changes_since_query_param: ['Expected an ISO 8601 timestamp']})
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def encode_changes_cursor(self, row, started):
+        """Position (changed_at, pk) of the last row sent and the start of the tombstone window"""
+        payload = {'v': [row.changed_at.isoformat(), row.pk], 't': started.isoformat()}
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+    def decode_changes_cursor(self, request):
+        encoded = request.query_params.get(self.changes_cursor_query_param)
+        if not encoded:
+            return None, None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            changed_at, pk = payload['v']
+            position = [parse_datetime(changed_at), self.get_queryset().model._meta.pk.to_python(pk)]
+            started = parse_datetime(payload['t'])
+            if position[0] is None or started is None:
+                raise ValueError(encoded)
+            return position, started
+        except Exception:
+            raise ValidationError({self.changes_cursor_query_param: [self.invalid_changes_cursor_message]})
+
+    def get_changes_limit(self, request):
+        try:
+            limit = int(request.query_params[self.changes_limit_query_param])
+        except (KeyError, ValueError):
+            return self.changes_limit
+        return min(max(limit, 1), self.max_changes_limit)
+
+    def get_changes_queryset(self):
+        """The filtered queryset annotated with changed_at, the latest timestamp the serialized row depends on"""
+        fields = (self.changes_timestamp_field, *self.changes_related_timestamp_fields)
+        changed_at = Greatest(*fields) if len(fields) > 1 else F(fields[0])
+        return self.filter_queryset(self.get_queryset()).annotate(changed_at=changed_at)
+
+    def get_tombstones(self, since, until=None):
+        """DeletionLog rows of this viewset's model in [since, until)"""
+        tombstones = DeletionLog.objects.filter(model=self.get_queryset().model._meta.label_lower,
+                                                deleted_at__gte=since)
+        if until is not None:
+            tombstones = tombstones.filter(deleted_at__lt=until)
+        return tombstones
+
+    def get_deleted_ids(self, since, until=None):
+        return list(self.get_tombstones(since, until).values_list('object_id', flat=True).distinct())
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request, *args, **kwargs):
+        """
+        Records created, updated or deleted since a timestamp
+        """
+        now = timezone.now()
+        retention = timezone.timedelta(days=getattr(settings, 'DELETION_LOG_RETENTION_DAYS', 30))
+        position, started = self.decode_changes_cursor(request)
+        if position is not None and started < now - retention:
+            # the tombstones of the interrupted sync have expired, start over
+            position = started = None
+        since = started if position is not None else self.parse_changes_since(request)
+        reset = position is None and (since is None or since < now - retention)
+        if reset:
+            # a snapshot reports the deletions made while its batches are fetched
+            since = None
+            started = now
+        elif position is None:
+            started = since
+
+        queryset = self.get_changes_queryset()
+        if position is not None:
+            queryset = queryset.filter(KeysetPagination(('changed_at', 'pk')).keyset_filter(position, False))
+        elif since is not None:
+            queryset = queryset.filter(changed_at__gte=since)
+        limit = self.get_changes_limit(request)
+        rows = list(queryset.order_by('changed_at', 'pk')[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        return Response({
+            'since': since,
+            'watermark': None if has_more else now,
+            'cursor': self.encode_changes_cursor(rows[-1], started) if has_more else None,
+            'reset': reset,
+            'has_more': has_more,
+            'upserts': self.get_serializer(rows, many=True).data,
+            # tombstones go with the last batch, so none is lost between batches
+            'deleted': [] if has_more or reset else self.get_deleted_ids(started),
+        })
+
+
+class ExportMixin:
+    """
+    GET <route>/export/?output=csv|jsonl streams every row of the viewset's
+    filtered queryset in primary key order (see utils/export.py), without
+    pagination, COUNT or OFFSET. Viewsets list the exported columns as
+    (name, attribute path) in export_columns; the relations those paths walk
+    are joined and only the columns read are loaded.
+    """
+    export_columns = ()
+    export_filename = 'export'
+    export_query_param = 'output'
+    export_permission_classes = (IsLibrarianOrSystemAdmin,)
+
+    def get_permissions(self):
+        if self.action == 'export':
+            return [permission() for permission in self.export_permission_classes]
+        return super().get_permissions()
+
+    def get_export_queryset(self):
+        paths = [path.replace('.', '__') for _, path in self.export_columns]
+        related = {path.rsplit('__', 1)[0] for path in paths if '__' in path}
+        queryset = self.filter_queryset(self.get_queryset())
+        return queryset.select_related(*related).only(*paths).order_by('pk')
+
+    @action(detail=False, methods=['get'])
+    def export(self, request, *args, **kwargs):
+        """
+        All matching rows as CSV or JSON Lines, streamed row by row
+        """
+        fmt = request.query_params.get(self.export_query_param, 'csv')
+        if fmt not in export.FORMATS:
+            raise ValidationError({self.export_query_param: [f"Expected one of {', '.join(export.FORMATS)}"]})
+        return export.export_response(self.get_export_queryset(), self.export_columns, fmt, self.export_filename)
+
+
+class FullTextSearchMixin:
+    """
+    GET <route>/search/?q=... ranked by the FTS5 index (see utils/search.py),
+    best BM25 match first; the last word matches as a prefix. Filters and
+    role scoping of the viewset's queryset still apply. Without FTS5 the
+    search falls back to icontains on search_fallback_field.
+    """
+    search_table = None
+    search_rank = None
+    search_fallback_field = 'title'
+    search_query_param = 'q'
+
+    def search_queryset(self, queryset, text):
+        if fulltext.is_available():
+            return fulltext.search(queryset, self.search_table, self.search_rank, text)
+        return queryset.filter(**{f'{self.search_fallback_field}__icontains': text})
+
+    @action(detail=False, methods=['get'])
+    def search(self, request, *args, **kwargs):
+        """
+        Full-text search, best match first
+        """
+        text = request.query_params.get(self.search_query_param, '').strip()
+        if not text:
+            raise ValidationError({self.search_query_param: ['This field is required']})
+        queryset = self.search_queryset(self.filter_queryset(self.get_queryset()), text)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(queryset, many=True).data)
+
+
 class MineApiViewSet(BaseViewMixin, APIView):
     pass
\ No newline at end of file